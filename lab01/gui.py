@@ -7,7 +7,7 @@ from matplotlib.figure import Figure
 from matplotlib.animation import FuncAnimation
 from typing import List
 
-from simulation import BallisticSimulator, SimulationResult
+from lab01.simulation import BallisticSimulator, SimulationResult
 
 
 class BallisticApp:
@@ -1,5 +1,5 @@
 import ttkbootstrap as tb
-from gui import BallisticApp
+from lab01.gui import BallisticApp
 
 def main():
     root = tb.Window(themename="flatly")
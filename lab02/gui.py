@@ -6,7 +6,7 @@ import time
 import threading
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-from model import simulate, calculate_next_step
+from lab02.model import simulate, calculate_next_step
 
 
 # ─────────────────────────────────────────────────────────────
@@ -1,5 +1,5 @@
 import tkinter as tk
-from gui import HeatApp
+from lab02.gui import HeatApp
 
 if __name__ == "__main__":
     root = tk.Tk()
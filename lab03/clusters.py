@@ -0,0 +1,345 @@
+from collections import deque
+
+import numpy as np
+from lab03.simulation import TREE, FIRE
+
+
+class ClusterTracker:
+    """Инкрементальное отслеживание пожаров и лесных кластеров (4-связность, тор).
+
+    Подключается к SimulationRunner как наблюдатель. За поколение обрабатываются
+    только изменившиеся клетки:
+      - пожар — связная во времени область горения: новая горящая клетка рядом
+        с горевшей на прошлом шаге (или с новой соседней) принадлежит тому же
+        пожару. Номера объединяются через систему непересекающихся множеств,
+        для каждого пожара хранятся размер (всего сгоревших клеток) и время жизни;
+      - лесной кластер — связная область деревьев. Рост дерева — объединение
+        множеств. Выгорание может расколоть кластер: от уцелевших соседей каждой
+        связной области выгоревших клеток запускаются параллельные обходы, и все
+        куски, кроме последнего незавершенного, получают новые номера. Поэтому
+        стоимость определяется изменениями и отколовшимися кусками, а не
+        размером кластера.
+    """
+
+    def __init__(self, sim):
+        self.width = sim.width
+        self.height = sim.height
+        grid = sim.grid.ravel()
+        self._prev = grid.copy()
+        self.generation = sim.generation
+
+        # Пожары: номер клетки -> id, id -> (родитель, размер, начало, конец)
+        self.fire_label = np.full(grid.size, -1, dtype=np.int64)
+        self._fire_parent = []
+        self._fire_size = []
+        self._fire_start = []
+        self._fire_end = []
+
+        # Лес: номер клетки -> метка кластера, метка -> (родитель, размер корня)
+        self.tree_label = np.full(grid.size, -1, dtype=np.int64)
+        self._tree_parent = []
+        self._tree_size = []
+        self._tree_cells = 0
+
+        for cell in np.flatnonzero(grid == FIRE):
+            self._new_fire_cell(int(cell), sim.generation)
+        self._label_forest(grid)
+
+    # --- соседи и системы множеств ---
+
+    def neighbors(self, cell):
+        w, h = self.width, self.height
+        r, c = divmod(cell, w)
+        return (((r - 1) % h) * w + c, ((r + 1) % h) * w + c,
+                r * w + (c - 1) % w, r * w + (c + 1) % w)
+
+    @staticmethod
+    def _find(parent, x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def _new_tree_label(self, size):
+        label = len(self._tree_parent)
+        self._tree_parent.append(label)
+        self._tree_size.append(size)
+        return label
+
+    def _union_trees(self, a, b):
+        parent, size = self._tree_parent, self._tree_size
+        ra, rb = self._find(parent, a), self._find(parent, b)
+        if ra == rb:
+            return ra
+        if size[ra] < size[rb]:
+            ra, rb = rb, ra
+        parent[rb] = ra
+        size[ra] += size[rb]
+        size[rb] = 0
+        return ra
+
+    def _union_fires(self, a, b):
+        # Корнем остается более старый пожар (меньший id)
+        parent = self._fire_parent
+        ra, rb = self._find(parent, a), self._find(parent, b)
+        if ra == rb:
+            return ra
+        if rb < ra:
+            ra, rb = rb, ra
+        parent[rb] = ra
+        self._fire_size[ra] += self._fire_size[rb]
+        self._fire_start[ra] = min(self._fire_start[ra], self._fire_start[rb])
+        self._fire_end[ra] = max(self._fire_end[ra], self._fire_end[rb])
+        return ra
+
+    # --- обновление ---
+
+    def observe(self, sim):
+        grid = sim.grid.ravel()
+        prev = self._prev
+        changed = np.flatnonzero(grid != prev)
+        old, new = prev[changed], grid[changed]
+        generation = sim.generation
+
+        # Пожары: метки погасших клеток снимаются после разметки новых,
+        # чтобы новые очаги успели к ним присоединиться
+        for cell in changed[new == FIRE]:
+            self._new_fire_cell(int(cell), generation)
+        self.fire_label[changed[(old == FIRE) & (new != FIRE)]] = -1
+
+        # Лес: сначала выгорание/вырубка с расколом кластеров, затем рост
+        removed = changed[(old == TREE) & (new != TREE)]
+        added = changed[(new == TREE) & (old != TREE)]
+        self._remove_trees(removed)
+        for cell in added:
+            self._add_tree(int(cell))
+        self._tree_cells += added.size - removed.size
+
+        if len(self._tree_parent) > 4 * max(self._tree_cells, 1024):
+            self._compact_forest()
+
+        self._prev = grid.copy()
+        self.generation = generation
+
+    def _new_fire_cell(self, cell, generation):
+        labels = self.fire_label
+        fire = -1
+        for nb in self.neighbors(cell):
+            if labels[nb] >= 0:
+                fire = int(labels[nb]) if fire < 0 else self._union_fires(fire, int(labels[nb]))
+        if fire < 0:
+            fire = len(self._fire_parent)
+            self._fire_parent.append(fire)
+            self._fire_size.append(0)
+            self._fire_start.append(generation)
+            self._fire_end.append(generation)
+        root = self._find(self._fire_parent, fire)
+        labels[cell] = root
+        self._fire_size[root] += 1
+        self._fire_end[root] = generation
+
+    def _add_tree(self, cell):
+        labels = self.tree_label
+        root = -1
+        for nb in self.neighbors(cell):
+            if labels[nb] >= 0:
+                if root < 0:
+                    root = self._find(self._tree_parent, int(labels[nb]))
+                    self._tree_size[root] += 1
+                else:
+                    root = self._union_trees(root, int(labels[nb]))
+        labels[cell] = root if root >= 0 else self._new_tree_label(1)
+
+    def _remove_trees(self, cells):
+        if cells.size == 0:
+            return
+        labels, parent, size = self.tree_label, self._tree_parent, self._tree_size
+        cell_root = {}
+        for cell in cells:
+            cell = int(cell)
+            cell_root[cell] = self._find(parent, int(labels[cell]))
+            size[cell_root[cell]] -= 1
+            labels[cell] = -1
+
+        # Связная область удаленных клеток целиком лежит в одном кластере
+        by_root = {}
+        for region in self._regions(cell_root):
+            by_root.setdefault(cell_root[region[0]], []).append(region)
+        for root, regions in by_root.items():
+            if size[root] > 0:
+                self._check_split(root, regions)
+
+    def _check_split(self, root, regions):
+        """Проверка раскола кластера root после удаления клеток regions.
+
+        Если уцелевшие соседи каждой области удаленных клеток связаны между
+        собой, кластер остался связным, поэтому проверка локальна. Отколовшийся
+        кусок, касающийся нескольких областей, для остальных клеток равносилен
+        удаленному: такие области сливаются и проверяются заново.
+        """
+        labels, parent = self.tree_label, self._tree_parent
+        region_of = {cell: i for i, region in enumerate(regions) for cell in region}
+        merged = list(range(len(regions)))
+        cells_of = [list(region) for region in regions]
+        pending = set(range(len(regions)))
+        while pending:
+            i = pending.pop()
+            seeds = {nb for cell in cells_of[i] for nb in self.neighbors(cell)
+                     if labels[nb] >= 0 and self._find(parent, int(labels[nb])) == root}
+            if len(seeds) < 2:
+                continue
+            for piece in self._split(root, seeds):
+                touched = {self._find(merged, region_of[nb])
+                           for cell in piece for nb in self.neighbors(cell) if nb in region_of}
+                touched.discard(i)
+                for j in touched:
+                    merged[j] = i
+                    cells_of[i].extend(cells_of[j])
+                    cells_of[j] = []
+                    pending.discard(j)
+                if touched:
+                    pending.add(i)
+
+    def _regions(self, cells):
+        """Связные (4-связность) области среди удаленных за шаг клеток"""
+        remaining = set(cells)
+        while remaining:
+            start = remaining.pop()
+            region, queue = [start], deque([start])
+            while queue:
+                for nb in self.neighbors(queue.popleft()):
+                    if nb in remaining:
+                        remaining.discard(nb)
+                        region.append(nb)
+                        queue.append(nb)
+            yield region
+
+    def _split(self, root, seeds):
+        """Параллельные обходы от seeds до тех пор, пока не останется один
+        незавершенный; завершенные куски получают новые метки и возвращаются"""
+        labels = self.tree_label
+        owner = {}
+        comp_parent = list(range(len(seeds)))
+        frontiers, members = [], []
+        for i, seed in enumerate(seeds):
+            owner[seed] = i
+            frontiers.append(deque([seed]))
+            members.append([seed])
+
+        active = set(range(len(seeds)))
+        finished = []
+        while len(active) > 1:
+            for i in list(active):
+                if i not in active:
+                    continue
+                if not frontiers[i]:
+                    active.discard(i)
+                    finished.append(i)
+                    continue
+                cell = frontiers[i].popleft()
+                for nb in self.neighbors(cell):
+                    if labels[nb] < 0:
+                        continue
+                    j = owner.get(nb)
+                    if j is None:
+                        owner[nb] = i
+                        frontiers[i].append(nb)
+                        members[i].append(nb)
+                        continue
+                    j = self._find(comp_parent, j)
+                    if j != i:
+                        # Обходы встретились: это один кусок, сливаем в i
+                        comp_parent[j] = i
+                        frontiers[i].extend(frontiers[j])
+                        members[i].extend(members[j])
+                        frontiers[j].clear()
+                        members[j] = []
+                        active.discard(j)
+                if len(active) <= 1:
+                    break
+
+        # Последний незавершенный (или последний завершенный) кусок сохраняет старую метку
+        if not active:
+            finished.pop()
+        pieces = []
+        for i in finished:
+            piece = np.array(members[i], dtype=np.int64)
+            labels[piece] = self._new_tree_label(piece.size)
+            self._tree_size[root] -= piece.size
+            pieces.append(members[i])
+        return pieces
+
+    def _label_forest(self, grid):
+        labels = self.tree_label
+        for start in np.flatnonzero(grid == TREE):
+            if labels[start] >= 0:
+                continue
+            label = self._new_tree_label(0)
+            labels[start] = label
+            queue = deque([int(start)])
+            count = 0
+            while queue:
+                cell = queue.popleft()
+                count += 1
+                for nb in self.neighbors(cell):
+                    if labels[nb] < 0 and grid[nb] == TREE:
+                        labels[nb] = label
+                        queue.append(nb)
+            self._tree_size[label] = count
+            self._tree_cells += count
+
+    def _compact_forest(self):
+        """Перенумерация кластеров подряд: отбрасывает мертвые метки"""
+        parent = np.array(self._tree_parent, dtype=np.int64)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+        alive = np.flatnonzero(self.tree_label >= 0)
+        roots, new_labels = np.unique(parent[self.tree_label[alive]], return_inverse=True)
+        self.tree_label[alive] = new_labels
+        self._tree_parent = list(range(roots.size))
+        self._tree_size = np.bincount(new_labels, minlength=roots.size).tolist()
+
+    # --- результаты ---
+
+    def fires(self, active_only=False):
+        """Пожары: id, размер (сгоревших клеток), первое и последнее поколение горения"""
+        # Клетка горит одно поколение, поэтому активен пожар, получивший клетки на последнем шаге
+        result = []
+        for fire, parent in enumerate(self._fire_parent):
+            if parent != fire:
+                continue
+            active = self._fire_end[fire] == self.generation
+            if active_only and not active:
+                continue
+            result.append({
+                'id': fire,
+                'size': self._fire_size[fire],
+                'start': self._fire_start[fire],
+                'end': self._fire_end[fire],
+                'lifetime': self._fire_end[fire] - self._fire_start[fire] + 1,
+                'active': active,
+            })
+        return result
+
+    def fire_id_at(self, x, y):
+        label = int(self.fire_label[y * self.width + x])
+        return self._find(self._fire_parent, label) if label >= 0 else None
+
+    def forest_cluster_sizes(self):
+        """Размеры всех лесных кластеров (по убыванию)"""
+        parent, size = self._tree_parent, self._tree_size
+        sizes = [size[i] for i in range(len(parent)) if parent[i] == i and size[i] > 0]
+        return np.sort(np.array(sizes, dtype=np.int64))[::-1]
+
+    def forest_cluster_at(self, x, y):
+        """(метка, размер) кластера, которому принадлежит дерево в (x, y), или None"""
+        label = int(self.tree_label[y * self.width + x])
+        if label < 0:
+            return None
+        root = self._find(self._tree_parent, label)
+        return root, self._tree_size[root]
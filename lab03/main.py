@@ -1,7 +1,11 @@
 import pygame
 import numpy as np
 import math
-from simulation import ForestFire, EMPTY, TREE, FIRE, WATER, ASH
+import time
+from lab03.simulation import ForestFire
+from lab03.scheduler import SimulationRunner
+from lab03.replay import RunRecorder
+from lab03.clusters import ClusterTracker
 
 # --- Настройки окна ---
 SIM_WIDTH = 900
@@ -14,6 +18,9 @@ CELL_SIZE = 5
 GRID_W = SIM_WIDTH // CELL_SIZE
 GRID_H = SIM_HEIGHT // CELL_SIZE
 FPS = 60
+SIM_RATE = 60            # Тактов симуляции в секунду (не зависит от FPS)
+MAX_GENS_PER_TICK = 50
+FAST_FORWARD_GENS = 10000
 
 BG_COLOR = (18, 18, 24)
 PANEL_COLOR = (28, 28, 38)
@@ -102,9 +109,15 @@ def main():
     font_title = pygame.font.SysFont("Segoe UI, Helvetica", 22, bold=True)
     font_stats = pygame.font.SysFont("Consolas, Courier", 14)
 
-    sim = ForestFire(GRID_W, GRID_H)
+    # Базовая модель p/f; клавиша T переключает неоднородную местность (топливо, влажность, рельеф)
+    heterogeneous = False
+    runner = SimulationRunner(ForestFire(GRID_W, GRID_H, heterogeneous=heterogeneous), rate=SIM_RATE)
+    runner.start()
+    recorder = None
+    tracker = None
+    cluster_text = ""
+    next_cluster_update = 0.0
     running = True
-    paused = False
 
     ui_x = SIM_WIDTH + 25
     
@@ -115,8 +128,9 @@ def main():
         Slider(ui_x, 395, 330, 8, 0.0, 0.5, 0.03, "Остывание пепла", "{:.3f}")
     ]
     
-    btn_pause = Button(ui_x, 445, 155, 45, "ПАУЗА / ПУСК")
-    btn_reset = Button(ui_x + 175, 445, 155, 45, "НОВЫЙ МИР", color=(180, 60, 60))
+    btn_pause = Button(ui_x, 445, 100, 45, "ПАУЗА / ПУСК")
+    btn_ff = Button(ui_x + 115, 445, 100, 45, f"+{FAST_FORWARD_GENS}")
+    btn_reset = Button(ui_x + 230, 445, 100, 45, "НОВЫЙ МИР", color=(180, 60, 60))
 
     while running:
         for event in pygame.event.get():
@@ -127,17 +141,58 @@ def main():
                 slider.handle_event(event)
             
             if btn_pause.handle_event(event):
-                paused = not paused
-            if btn_reset.handle_event(event):
-                sim = ForestFire(GRID_W, GRID_H)
+                runner.paused = not runner.paused
+            if btn_ff.handle_event(event):
+                runner.fast_forward(FAST_FORWARD_GENS)
+            switch_terrain = event.type == pygame.KEYDOWN and event.key == pygame.K_t
+            if switch_terrain:
+                heterogeneous = not heterogeneous
+            if btn_reset.handle_event(event) or switch_terrain:
+                if recorder:
+                    runner.remove_observer(recorder)
+                    recorder.close()
+                    recorder = None
+                if tracker:
+                    runner.remove_observer(tracker)
+                    tracker = None
+                runner.request_reset(lambda h=heterogeneous: ForestFire(GRID_W, GRID_H, heterogeneous=h))
 
-            if pygame.mouse.get_pressed()[0]:
+            # Скорость: сколько поколений за такт симуляции
+            if event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    runner.gens_per_tick = min(MAX_GENS_PER_TICK, runner.gens_per_tick + 1)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    runner.gens_per_tick = max(1, runner.gens_per_tick - 1)
+                # Запись прогона в файл для последующего анализа (replay.RunPlayer)
+                elif event.key == pygame.K_r:
+                    if recorder:
+                        runner.remove_observer(recorder)
+                        recorder.close()
+                        recorder = None
+                    else:
+                        # Первый кадр записи (ключевой) будет снят после ближайшего поколения
+                        recorder = RunRecorder.for_sim(f"fire_{time.strftime('%Y%m%d_%H%M%S')}.ffr", runner.sim)
+                        runner.add_observer(recorder)
+                # Учет пожаров и лесных кластеров (clusters.ClusterTracker)
+                elif event.key == pygame.K_c:
+                    if tracker:
+                        runner.remove_observer(tracker)
+                        tracker = None
+                    elif not runner.resetting:
+                        tracker = runner.inspect(lambda: ClusterTracker(runner.sim))
+                        runner.add_observer(tracker)
+
+            buttons = pygame.mouse.get_pressed()
+            if buttons[0] or buttons[2]:
                 mx, my = pygame.mouse.get_pos()
                 if mx < SIM_WIDTH:
-                    sim.ignite_at(mx // CELL_SIZE, my // CELL_SIZE)
+                    if buttons[0]:
+                        runner.ignite_at(mx // CELL_SIZE, my // CELL_SIZE)
+                    else:
+                        runner.cut_firebreak(mx // CELL_SIZE, my // CELL_SIZE)
 
-        if not paused:
-            sim.update(sliders[0].val, sliders[1].val, sliders[2].val, sliders[3].val)
+        runner.set_params(sliders[0].val, sliders[1].val, sliders[2].val, sliders[3].val)
+        sim = runner.sim
 
         screen.fill(BG_COLOR)
         
@@ -196,34 +251,60 @@ def main():
         screen.blit(radar_text, (ui_x, 245))
 
         btn_pause.draw(screen, font_main)
+        btn_ff.draw(screen, font_main)
         btn_reset.draw(screen, font_main)
 
-        trees = np.count_nonzero(sim.grid == TREE)
-        fires = np.count_nonzero(sim.grid == FIRE)
+        if runner.resetting:
+            status = "ГЕНЕРАЦИЯ МИРА"
+        elif runner.fast_forward_left > 0:
+            status = f"ПЕРЕМОТКА ({runner.fast_forward_left})"
+        elif runner.paused:
+            status = "ПАУЗА"
+        else:
+            status = "СИМУЛЯЦИЯ"
+        if sim.heterogeneous:
+            status += " [РЕЛЬЕФ]"
+        if recorder:
+            status += " [REC]"
         
-        stats_bg = pygame.Rect(ui_x, 520, 330, 130)
+        # Идущие пожары и крупнейший лесной кластер: читаются между поколениями, не чаще раза в 0.5 с
+        if not tracker:
+            cluster_text = ""
+        elif time.perf_counter() >= next_cluster_update:
+            active, largest = runner.inspect(
+                lambda: (len(tracker.fires(active_only=True)), int(tracker.forest_cluster_sizes()[:1].sum())))
+            cluster_text = f"ПОЖАРЫ/ЛЕС:   {active} / {largest}"
+            next_cluster_update = time.perf_counter() + 0.5
+
+        stats_bg = pygame.Rect(ui_x, 500, 330, 165)
         pygame.draw.rect(screen, (20, 20, 28), stats_bg, border_radius=10)
         pygame.draw.rect(screen, (40, 40, 50), stats_bg, border_radius=10, width=1)
         
         stats =[
             f"FPS:          {int(clock.get_fps())}",
             f"ПОКОЛЕНИЕ:    {sim.generation}",
-            f"ЖИВЫЕ ДЕРЕВЬЯ:{trees}",
-            f"ОЧАГИ ПОЖАРА: {fires}",
-            f"СТАТУС:       {'ПАУЗА' if paused else 'СИМУЛЯЦИЯ'}"
+            f"ПОК./ТАКТ:    {runner.gens_per_tick}",
+            f"ЖИВЫЕ ДЕРЕВЬЯ:{sim.tree_count}",
+            f"ОЧАГИ ПОЖАРА: {sim.fire_count}",
+            f"СТАТУС:       {status}"
         ]
+        if cluster_text:
+            stats.insert(5, cluster_text)
         
         for i, text in enumerate(stats):
-            color = FIRE_ACCENT if "ПАУЗА" in text else TEXT_COLOR
+            color = FIRE_ACCENT if "ПАУЗА" in text or "ПЕРЕМОТКА" in text else TEXT_COLOR
             stat_surf = font_stats.render(text, True, color)
-            screen.blit(stat_surf, (ui_x + 15, 535 + i * 22))
+            screen.blit(stat_surf, (ui_x + 15, 510 + i * 22))
 
-        hint = font_main.render("ЛКМ по лесу - поджечь область", True, (100, 100, 120))
-        screen.blit(hint, (ui_x + 40, WINDOW_HEIGHT - 30))
+        hint = font_main.render("ЛКМ огонь, ПКМ просека, R запись, C кластеры", True, (100, 100, 120))
+        screen.blit(hint, (ui_x, WINDOW_HEIGHT - 30))
 
         pygame.display.flip()
         clock.tick(FPS)
 
+    runner.stop()
+    if recorder:
+        recorder.close()
     pygame.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+import json
+import struct
+import zlib
+
+import numpy as np
+from lab03.simulation import EMPTY, TREE, FIRE, WATER, ASH
+
+# Формат файла записи (.ffr):
+#   заголовок:  b"FFRP", версия (u8), длина метаданных (u32), метаданные JSON
+#   записи:     тип (u8), поколение (u32), длина данных (u32), данные
+#   индекс:     пары (поколение u32, смещение u64) для всех ключевых кадров
+#   хвост:      смещение индекса (u64), число ключевых кадров (u32), b"FFRX"
+#
+# Ключевой кадр хранит сетку целиком (zlib). Дельта-кадр хранит только клетки,
+# отличающиеся от предсказания predict (все очаги -> ПЕПЕЛ, остальное без изменений),
+# поэтому точен и для несоседних поколений (например, ОГОНЬ -> ОГОНЬ):
+#   - позиции — разности соседних индексов (gap) в коде Райса, причем унарные
+#     части и остатки лежат в двух отдельных битовых потоках, чтобы оба
+#     кодировались и декодировались векторно;
+#   - значения — как отклонение от "естественного" перехода клетки
+#     (ПУСТО -> ДЕРЕВО, ДЕРЕВО -> ОГОНЬ, ПЕПЕЛ -> ПУСТО), почти всегда нулевое, + zlib.
+MAGIC = b"FFRP"
+INDEX_MAGIC = b"FFRX"
+VERSION = 1
+
+KEYFRAME = 0
+DELTA = 1
+
+_HEADER = struct.Struct("<4sBI")
+_RECORD = struct.Struct("<BII")
+_INDEX_ENTRY = struct.Struct("<IQ")
+_TRAILER = struct.Struct("<QI4s")
+_DELTA_HEADER = struct.Struct("<IBI")
+
+# Быстрое сжатие: запись идет в такте симуляции
+COMPRESS_LEVEL = 1
+
+# Естественный следующий шаг для каждого состояния
+SUCCESSOR = np.array([TREE, FIRE, ASH, WATER, EMPTY], dtype=np.uint8)
+
+
+def predict(grid):
+    """Детерминированная часть перехода: все очаги становятся пеплом"""
+    predicted = grid.copy()
+    predicted[grid == FIRE] = ASH
+    return predicted
+
+
+def rice_encode(values):
+    """Код Райса: (k, унарные части, остатки) для неотрицательных целых"""
+    mean = float(values.mean()) if values.size else 1.0
+    k = max(0, int(np.log2(max(mean * 0.69, 1.0))))
+    q = values >> k
+    unary = np.ones(int(q.sum()) + q.size, dtype=np.uint8)
+    unary[np.cumsum(q + 1) - 1] = 0
+    rem = ((values[:, None] >> np.arange(k - 1, -1, -1)) & 1).astype(np.uint8)
+    return k, np.packbits(unary).tobytes(), np.packbits(rem).tobytes()
+
+
+def rice_decode(n, k, unary, rem):
+    # Хвостовые нули упаковки отбрасываются: берем ровно n терминаторов
+    ends = np.flatnonzero(np.unpackbits(np.frombuffer(unary, dtype=np.uint8)) == 0)[:n]
+    q = np.diff(ends, prepend=-1) - 1
+    bits = np.unpackbits(np.frombuffer(rem, dtype=np.uint8))[:n * k].reshape(n, k)
+    r = bits.astype(np.int64) @ (1 << np.arange(k - 1, -1, -1, dtype=np.int64))
+    return (q << k) + r
+
+
+def encode_delta(prev, grid):
+    flat_prev = prev.ravel()
+    flat = grid.ravel()
+    changed = np.flatnonzero(flat != predict(prev).ravel())
+
+    k, unary, rem = rice_encode(np.diff(changed, prepend=-1))
+    residual = flat[changed] - SUCCESSOR[flat_prev[changed]]
+    return (_DELTA_HEADER.pack(changed.size, k, len(unary))
+            + unary + rem + zlib.compress(residual.tobytes(), COMPRESS_LEVEL))
+
+
+def apply_delta(grid, data):
+    n, k, unary_len = _DELTA_HEADER.unpack_from(data)
+    pos = _DELTA_HEADER.size
+    unary = data[pos:pos + unary_len]
+    pos += unary_len
+    rem_len = (n * k + 7) // 8
+    rem = data[pos:pos + rem_len]
+    residual = np.frombuffer(zlib.decompress(data[pos + rem_len:]), dtype=np.uint8)
+
+    flat_prev = grid.ravel()
+    changed = np.cumsum(rice_decode(n, k, unary, rem)) - 1
+    new_grid = predict(grid)
+    new_grid.ravel()[changed] = SUCCESSOR[flat_prev[changed]] + residual
+    return new_grid
+
+
+class RunRecorder:
+    """Запись прогона ForestFire: ключевые кадры + дельты по поколениям.
+
+    Подключается к SimulationRunner как наблюдатель (`observe(sim)` после
+    каждого поколения) или вызывается напрямую через `record`.
+    """
+
+    def __init__(self, path, width, height, keyframe_interval=500, meta=None):
+        self.width = width
+        self.height = height
+        self.keyframe_interval = keyframe_interval
+        self._file = open(path, "wb")
+        self._prev = None
+        self._last_key = None
+        self._index = []
+
+        meta = dict(meta or {}, width=width, height=height, keyframe_interval=keyframe_interval)
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, len(meta_bytes)))
+        self._file.write(meta_bytes)
+
+    @classmethod
+    def for_sim(cls, path, sim, keyframe_interval=500):
+        return cls(path, sim.width, sim.height, keyframe_interval, meta={"seed": str(sim.seed)})
+
+    def observe(self, sim):
+        self.record(sim.generation, sim.grid)
+
+    def record(self, generation, grid):
+        if self._prev is None or generation - self._last_key >= self.keyframe_interval:
+            self._index.append((generation, self._file.tell()))
+            self._write(KEYFRAME, generation, zlib.compress(grid.tobytes(), COMPRESS_LEVEL))
+            self._last_key = generation
+        else:
+            self._write(DELTA, generation, encode_delta(self._prev, grid))
+        self._prev = grid.copy()
+
+    def _write(self, kind, generation, data):
+        self._file.write(_RECORD.pack(kind, generation, len(data)))
+        self._file.write(data)
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(_INDEX_ENTRY.pack(*entry))
+        self._file.write(_TRAILER.pack(index_offset, len(self._index), INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RunPlayer:
+    """Проигрыватель записи: восстанавливает любое поколение без пересчета модели.
+
+    Поиск идет до ближайшего ключевого кадра, затем применяются дельты,
+    поэтому стоимость перехода ограничена интервалом ключевых кадров.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        magic, version, meta_len = _HEADER.unpack(self._file.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: не файл записи ForestFire")
+        self.meta = json.loads(self._file.read(meta_len).decode("utf-8"))
+        self.width = self.meta["width"]
+        self.height = self.meta["height"]
+        self._data_start = self._file.tell()
+        self._keyframes = self._read_index()
+        self.generations = self._scan_generations()
+
+    def _read_index(self):
+        self._file.seek(0, 2)
+        end = self._file.tell()
+        if end - self._data_start >= _TRAILER.size:
+            self._file.seek(end - _TRAILER.size)
+            index_offset, n, magic = _TRAILER.unpack(self._file.read(_TRAILER.size))
+            if magic == INDEX_MAGIC:
+                self._file.seek(index_offset)
+                self._data_end = index_offset
+                raw = self._file.read(n * _INDEX_ENTRY.size)
+                return [_INDEX_ENTRY.unpack_from(raw, i * _INDEX_ENTRY.size) for i in range(n)]
+
+        # Запись не была закрыта: восстанавливаем индекс проходом по записям
+        self._data_end = end
+        return [(gen, offset) for kind, gen, offset, _ in self._records(self._data_start) if kind == KEYFRAME]
+
+    def _records(self, offset):
+        """Заголовки записей начиная со смещения: (тип, поколение, смещение, длина)"""
+        while offset + _RECORD.size <= self._data_end:
+            self._file.seek(offset)
+            kind, gen, length = _RECORD.unpack(self._file.read(_RECORD.size))
+            if offset + _RECORD.size + length > self._data_end:
+                return
+            yield kind, gen, offset, length
+            offset += _RECORD.size + length
+
+    def _scan_generations(self):
+        if not self._keyframes:
+            return []
+        return [gen for _, gen, _, _ in self._records(self._keyframes[0][1])]
+
+    def _read_payload(self, offset):
+        self._file.seek(offset)
+        _, _, length = _RECORD.unpack(self._file.read(_RECORD.size))
+        return self._file.read(length)
+
+    def frame(self, generation):
+        """Сетка в указанном поколении (последнее записанное поколение <= generation)"""
+        keys = [k for k in self._keyframes if k[0] <= generation]
+        if not keys:
+            raise IndexError(f"поколение {generation} раньше начала записи")
+        grid = None
+        for kind, gen, offset, _ in self._records(keys[-1][1]):
+            if gen > generation:
+                break
+            data = self._read_payload(offset)
+            if kind == KEYFRAME:
+                grid = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(self.height, self.width).copy()
+            else:
+                grid = apply_delta(grid, data)
+        return grid
+
+    def __iter__(self):
+        """Последовательный проход: (поколение, сетка)"""
+        grid = None
+        for kind, gen, offset, _ in self._records(self._data_start):
+            data = self._read_payload(offset)
+            if kind == KEYFRAME:
+                grid = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(self.height, self.width).copy()
+            else:
+                grid = apply_delta(grid, data)
+            yield gen, grid
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # Проверка кодека: дельта восстанавливает сетку точно, в том числе клетки,
+    # горящие в обоих кадрах (несоседние поколения)
+    rng = np.random.default_rng(0)
+    states = np.array([EMPTY, TREE, FIRE, WATER, ASH], dtype=np.uint8)
+    prev = rng.choice(states, (140, 180))
+    cases = {
+        "случайная": rng.choice(states, prev.shape),
+        "ОГОНЬ -> ОГОНЬ": prev.copy(),
+        "следующее поколение": predict(prev),
+    }
+    for name, grid in cases.items():
+        ok = np.array_equal(apply_delta(prev, encode_delta(prev, grid)), grid)
+        print(f"{name}: {'ok' if ok else 'ОШИБКА'}")
+        assert ok
@@ -0,0 +1,151 @@
+import threading
+import time
+
+# Сколько поколений перемотки выполнять между проверками флагов остановки/сброса
+FAST_FORWARD_BATCH = 50
+# Если поток отстал больше чем на это время, отставание не догоняется
+MAX_LAG = 0.25
+
+
+class SimulationRunner:
+    """Фоновый поток симуляции с фиксированным шагом по времени.
+
+    Поток выполняет `gens_per_tick` поколений каждые 1/rate секунд независимо
+    от частоты отрисовки. Перемотка (`fast_forward`) прогоняет поколения без
+    пауз и без рендера. Интерфейс читает `sim.grid` и счетчики популяций
+    напрямую: `update` подменяет сетку целиком, поэтому ссылка всегда согласована.
+    Правки мышью (поджог, просеки) не ждут конца поколения: они ставятся в
+    очередь и применяются потоком симуляции между поколениями.
+    """
+
+    def __init__(self, sim, rate=60, gens_per_tick=1):
+        self.sim = sim
+        self.rate = rate
+        self.gens_per_tick = gens_per_tick
+        self.paused = False
+
+        self._params = (0.0, 0.0, 0.0, 0.0)
+        # Наблюдатели с методом observe(sim), вызываются после каждого поколения
+        self.observers = []
+        self._ff_left = 0
+        # Очередь правок сетки: интерфейс только дописывает, поток симуляции забирает целиком
+        self._edits = []
+        self._edits_lock = threading.Lock()
+        self._reset_factory = None
+        self._building = False
+        # Отдельная блокировка запроса сброса: _lock держится на время поколения
+        self._reset_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sim.close()
+
+    def set_params(self, p_grow, p_lightning, wind_strength, p_ash_clear):
+        self._params = (p_grow, p_lightning, wind_strength, p_ash_clear)
+
+    def fast_forward(self, generations):
+        with self._edits_lock:
+            self._ff_left += generations
+
+    @property
+    def fast_forward_left(self):
+        return self._ff_left
+
+    def ignite_at(self, x, y):
+        with self._edits_lock:
+            self._edits.append(('ignite_at', x, y))
+
+    def reset(self, sim):
+        with self._lock:
+            old, self.sim = self.sim, sim
+            with self._edits_lock:
+                self._ff_left = 0
+                self._edits = []
+        old.close()
+
+    def request_reset(self, factory):
+        """Создать новый мир в потоке симуляции; до готовности показывается старый"""
+        with self._reset_lock:
+            self._reset_factory = factory
+
+    @property
+    def resetting(self):
+        return self._reset_factory is not None or self._building
+
+    def cut_firebreak(self, x, y):
+        with self._edits_lock:
+            self._edits.append(('cut_firebreak', x, y))
+
+    def add_observer(self, observer):
+        with self._lock:
+            self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        with self._lock:
+            self.observers.remove(observer)
+
+    def inspect(self, func):
+        """Вызвать func() между поколениями: наблюдатели и сетка в это время не меняются"""
+        with self._lock:
+            return func()
+
+    def _apply_edits(self):
+        with self._edits_lock:
+            edits, self._edits = self._edits, []
+        for method, x, y in edits:
+            getattr(self.sim, method)(x, y)
+
+    def _step(self, generations):
+        # Блокировка берется на одно поколение, чтобы add/remove_observer не ждали всю перемотку
+        for _ in range(generations):
+            with self._lock:
+                self._apply_edits()
+                self.sim.update(*self._params)
+                for observer in self.observers:
+                    observer.observe(self.sim)
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            if self._reset_factory is not None:
+                # Фабрика забирается до построения мира: запрос, пришедший во время
+                # построения, не теряется, а выполняется на следующем проходе
+                with self._reset_lock:
+                    factory, self._reset_factory = self._reset_factory, None
+                    self._building = True
+                try:
+                    self.reset(factory())
+                finally:
+                    self._building = False
+                next_tick = time.perf_counter()
+                continue
+
+            if self._ff_left > 0:
+                with self._edits_lock:
+                    batch = min(self._ff_left, FAST_FORWARD_BATCH)
+                    self._ff_left -= batch
+                self._step(batch)
+                next_tick = time.perf_counter()
+                continue
+
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                continue
+
+            if not self.paused:
+                self._step(self.gens_per_tick)
+            else:
+                with self._lock:
+                    self._apply_edits()
+
+            next_tick += 1.0 / self.rate
+            if time.perf_counter() - next_tick > MAX_LAG:
+                next_tick = time.perf_counter()
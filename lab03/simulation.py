@@ -1,6 +1,10 @@
 import numpy as np
 import math
-import random
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lab03 import terrain
 
 EMPTY = 0  
 TREE = 1   
@@ -8,119 +12,313 @@ FIRE = 2
 WATER = 3  
 ASH = 4    
 
+# Базовые цвета состояний для отрисовки (огонь рисуется отдельно)
+STATE_COLORS = np.array([
+    [60, 45, 35],    # EMPTY - почва
+    [34, 120, 50],   # TREE
+    [60, 45, 35],    # FIRE
+    [25, 100, 180],  # WATER
+    [80, 80, 85],    # ASH
+], dtype=np.int16)
+# Палитра сдвинута на амплитуду шума, чтобы текстура считалась в uint8 без обрезки;
+# у деревьев шум в 1.5 раза сильнее
+_NOISE_SHIFT = np.array([1, 1.5, 1, 1, 1])[:, None] * terrain.TEXTURE_NOISE
+PALETTE = (STATE_COLORS - _NOISE_SHIFT).astype(np.uint8)
+
+# Строк в полосе: единица независимого потока случайных чисел.
+# Раскладка потоков зависит только от этой константы, а не от числа потоков/тайлов.
+STRIP_ROWS = 64
+# Полоса 0 зарезервирована под глобальные величины поколения (дрейф ветра)
+WIND_LANE = 0
+
+# Базовая вероятность перехода огня на соседа и влияние уклона (огонь быстрее идет в гору)
+P_BASE = 0.15
+SLOPE_COEF = 4.0
+# Шаг квантования вероятностей ветра: массивы вероятностей по направлениям
+# пересчитываются, только когда квантованная вероятность изменилась
+WIND_QUANT = 1 / 128
+
+
 class ForestFire:
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None, workers=None, world_cache=None, heterogeneous=False):
         self.width = width
         self.height = height
+        self.workers = workers or os.cpu_count() or 1
+        self.heterogeneous = heterogeneous
+        # Пул потоков для тайлов создается при первом обновлении и закрывается в close():
+        # NumPy отпускает GIL на операциях с большими массивами
+        self._pool = None
+        # Поджог и просеки меняют сетку на месте; отрисовка копирует ее под этой блокировкой
+        self._grid_lock = threading.Lock()
+        # Поля местности (None в однородной модели)
+        self.fuel = self.moisture = self.elevation = None
         self.grid = np.full((height, width), EMPTY, dtype=np.uint8)
         self.generation = 0
+
+        # Все случайности модели выводятся из одного зерна: при том же seed
+        # и тех же параметрах прогон воспроизводится бит в бит
+        self.seed_seq = np.random.SeedSequence(seed)
+        self.seed = self.seed_seq.entropy
+        world_seq, stream_seq = self.seed_seq.spawn(2)
+        self.rng = np.random.Generator(np.random.PCG64(world_seq))
+        self._stream_key = stream_seq.generate_state(2, dtype=np.uint64)
+        # Мерцание огня при отрисовке на модель не влияет
+        self._fx_rng = np.random.default_rng()
         
-        self.wind_angle = random.uniform(0, 2 * math.pi)
+        self.wind_angle = self.rng.uniform(0, 2 * math.pi)
         
-        self.generate_water()
-        self.generate_textures()
-        self.generate_forest()
-
-    def generate_water(self):
-        noise = np.random.rand(self.height, self.width)
-        for _ in range(8):
-            N = np.roll(noise, 1, axis=0)
-            S = np.roll(noise, -1, axis=0)
-            E = np.roll(noise, 1, axis=1)
-            W = np.roll(noise, -1, axis=1)
-            noise = (noise + N + S + E + W) / 5.0
-        self.grid[noise < 0.46] = WATER
-
-    def generate_textures(self):
+        # Кэшировать имеет смысл только миры с явно заданным зерном
+        self.generate_world(world_cache if seed is not None else None)
+        self._init_spread()
+
+        # Счетчики популяций ведутся инкрементально в update / ignite_at
+        self.tree_count = int(np.count_nonzero(self.grid == TREE))
+        self.fire_count = 0
+
+    def generate_world(self, cache_dir=None):
+        """Озера, начальный лес, шум текстур и (в неоднородной модели) поля местности.
+
+        С заданным cache_dir мир сохраняется на диск и при повторном создании
+        с тем же зерном загружается оттуда (все, кроме сетки, — через mmap).
+        """
+        names = ("grid", "tex") + (("fuel", "moisture", "elevation") if self.heterogeneous else ())
+        cached = cache_dir is not None
+        world = terrain.load_world(cache_dir, self.width, self.height, self.seed, names) if cached else None
+        if world is not None:
+            self.grid, self.tex_noise = world["grid"], world["tex"]
+            if self.heterogeneous:
+                self.fuel, self.moisture, self.elevation = world["fuel"], world["moisture"], world["elevation"]
+            return
+
         h, w = self.height, self.width
-        noise = np.random.randint(-15, 15, (h, w, 3), dtype=np.int16)
-        
-        base_soil = np.full((h, w, 3),[60, 45, 35], dtype=np.int16)
-        self.tex_soil = np.clip(base_soil + noise, 0, 255).astype(np.uint8)
-        
-        base_water = np.full((h, w, 3),[25, 100, 180], dtype=np.int16)
-        self.tex_water = np.clip(base_water + noise, 0, 255).astype(np.uint8)
-        
-        base_tree = np.full((h, w, 3),[34, 120, 50], dtype=np.int16)
-        self.tex_tree = np.clip(base_tree + noise * 1.5, 0, 255).astype(np.uint8)
-        
-        base_ash = np.full((h, w, 3),[80, 80, 85], dtype=np.int16)
-        self.tex_ash = np.clip(base_ash + noise, 0, 255).astype(np.uint8)
+        lake_noise = terrain.smooth_noise(self.rng, h, w)
+        forest = terrain.random_mask(self.rng, h, w, terrain.FOREST_DENSITY)
+        # Состояние по двум битам (лес, вода) одной выборкой из таблицы: вода важнее леса
+        code = forest.view(np.uint8) | ((lake_noise < terrain.WATER_LEVEL).view(np.uint8) << 1)
+        self.grid = np.array([EMPTY, TREE, WATER, WATER], dtype=np.uint8)[code]
+        self.tex_noise = terrain.generate_texture_noise(self.rng, h, w)
+        # Поля тянутся из генератора последними: озера и лес при том же зерне не меняются
+        if self.heterogeneous:
+            self.fuel, self.moisture, self.elevation = terrain.generate_fields(self.rng, h, w, lake_noise)
+
+        if cached:
+            fields = dict(fuel=self.fuel, moisture=self.moisture, elevation=self.elevation) if self.heterogeneous else {}
+            terrain.save_world(cache_dir, w, h, self.seed, grid=self.grid, tex=self.tex_noise, **fields)
+
+    def set_fields(self, fuel=None, moisture=None, elevation=None):
+        """Задать поля местности вручную (скаляр или массив (h, w)); неуказанные остаются прежними"""
+        given = {"fuel": fuel, "moisture": moisture, "elevation": elevation}
+        for name, default in (("fuel", 1.0), ("moisture", 0.0), ("elevation", 0.0)):
+            value = given[name]
+            if value is None:
+                value = default if getattr(self, name) is None else getattr(self, name)
+            setattr(self, name, np.broadcast_to(np.asarray(value, dtype=np.float32), (self.height, self.width)))
+        self.heterogeneous = True
+        self._init_spread()
+
+    def _init_spread(self):
+        """Статические множители распространения для четырех направлений.
+
+        Порядок направлений — по горящему соседу: сверху, снизу, слева, справа.
+        Множитель клетки: топливо * (1 - влажность) * exp(SLOPE_COEF * подъем от соседа).
+        """
+        # Кэш массивов вероятностей: направление -> (квантованная вероятность, массив)
+        self._spread_q = [None] * 4
+        if not self.heterogeneous:
+            self._spread = None
+            return
+        dryness = self.fuel * (1 - self.moisture)
+        elev = self.elevation
+        sources = (np.roll(elev, 1, axis=0), np.roll(elev, -1, axis=0),
+                   np.roll(elev, 1, axis=1), np.roll(elev, -1, axis=1))
+        self._spread = [(dryness * np.exp(SLOPE_COEF * (elev - src))).astype(np.float32) for src in sources]
+
+    def spread_q(self, p_dir):
+        """Вероятности НЕ загореться от соседа по направлениям при вероятностях ветра p_dir.
+
+        В однородной модели — скаляры. В неоднородной — массивы (h, w), которые
+        пересчитываются только при смене квантованной вероятности направления,
+        а не каждое поколение.
+        """
+        if self._spread is None:
+            return [1.0 - p for p in p_dir]
+        for d, p in enumerate(p_dir):
+            p = round(p / WIND_QUANT) * WIND_QUANT
+            cached = self._spread_q[d]
+            if cached is None or cached[0] != p:
+                q = 1 - np.minimum(p * self._spread[d], 1)
+                self._spread_q[d] = (p, q)
+        return [q for _, q in self._spread_q]
+
+    def stream(self, generation, lane):
+        """Счетный поток случайных чисел для пары (поколение, полоса).
+
+        Philox адресуется ключом экземпляра и счетчиком [0, 0, lane, generation],
+        поэтому любой поток можно получить независимо, в любом порядке и в любом
+        процессе, без передачи состояния генератора.
+        """
+        counter = np.array([0, 0, lane, generation], dtype=np.uint64)
+        return np.random.Generator(np.random.Philox(key=self._stream_key, counter=counter))
+
+    def strips(self):
+        """Границы полос (r0, r1) и номера их потоков"""
+        for k, r0 in enumerate(range(0, self.height, STRIP_ROWS)):
+            yield WIND_LANE + 1 + k, r0, min(r0 + STRIP_ROWS, self.height)
+
+    def random_field(self, generation, r0=0, r1=None):
+        """Случайное поле поколения для строк [r0, r1), форма (строки, ширина).
 
-    def generate_forest(self):
-        mask = (self.grid == EMPTY) & (np.random.rand(self.height, self.width) < 0.6)
-        self.grid[mask] = TREE
+        Состояния клетки не пересекаются, поэтому одного числа на клетку хватает
+        на любой ее переход. Границы должны совпадать с границами полос: каждая
+        полоса заполняется из собственного потока, поэтому результат не зависит
+        от разбиения работы.
+        """
+        r1 = self.height if r1 is None else r1
+        if r0 % STRIP_ROWS or (r1 % STRIP_ROWS and r1 != self.height) or not 0 <= r0 <= r1 <= self.height:
+            raise ValueError(f"границы [{r0}, {r1}) не совпадают с границами полос по {STRIP_ROWS} строк")
+        field = np.empty((r1 - r0, self.width), dtype=np.float32)
+        for lane, s0, s1 in self.strips():
+            if s0 >= r0 and s1 <= r1:
+                self.stream(generation, lane).random(out=field[s0 - r0:s1 - r0], dtype=np.float32)
+        return field
+
+    def tiles(self):
+        """Разбиение сетки на тайлы из целых полос, по одному на рабочий поток"""
+        strips = list(self.strips())
+        n_tiles = max(1, min(self.workers, len(strips)))
+        bounds = np.linspace(0, len(strips), n_tiles + 1).astype(int)
+        return [(strips[b0][1], strips[b1 - 1][2]) for b0, b1 in zip(bounds[:-1], bounds[1:])]
 
     def update(self, p_grow, p_lightning, wind_strength, p_ash_clear):
         """Обновление поколений (Математика)"""
         # Плавающая погода: ветер плавно меняет направление
-        self.wind_angle += random.uniform(-0.05, 0.05)
+        self.wind_angle += self.stream(self.generation, WIND_LANE).uniform(-0.05, 0.05)
         
         # Векторы ветра
         wind_x = math.cos(self.wind_angle) * wind_strength
         wind_y = math.sin(self.wind_angle) * wind_strength
 
-        # Маски текущих состояний
-        is_tree = (self.grid == TREE)
-        is_fire = (self.grid == FIRE)
-        is_empty = (self.grid == EMPTY)
-        is_ash = (self.grid == ASH)
-
-        # Сдвиги матриц
-        fire_N = np.roll(is_fire, 1, axis=0)  # Сосед СВЕРХУ
-        fire_S = np.roll(is_fire, -1, axis=0) # Сосед СНИЗУ
-        fire_E = np.roll(is_fire, 1, axis=1)  # Сосед СЛЕВА (Запад)
-        fire_W = np.roll(is_fire, -1, axis=1) # Сосед СПРАВА (Восток)
-
         # Расчет вероятностей на основе векторов ветра
-        p_base = 0.15 
+        p_base = P_BASE
         p_E = max(p_base, wind_x) if wind_x > 0 else p_base   # Шанс пойти на Восток
         p_W = max(p_base, -wind_x) if wind_x < 0 else p_base  # Шанс пойти на Запад
         p_S = max(p_base, wind_y) if wind_y > 0 else p_base   # Шанс пойти на Юг
         p_N = max(p_base, -wind_y) if wind_y < 0 else p_base  # Шанс пойти на Север
 
-        # Если горит сосед СВЕРХУ (fire_N), огонь ползет ВНИЗ (на Юг) -> используем p_S
-        rand_N = np.random.rand(self.height, self.width) < p_S 
-        # Если горит сосед СНИЗУ (fire_S), огонь ползет ВВЕРХ (на Север) -> используем p_N
-        rand_S = np.random.rand(self.height, self.width) < p_N 
-        # Если горит сосед СЛЕВА (fire_E), огонь ползет ВПРАВО (на Восток) -> используем p_E
-        rand_E = np.random.rand(self.height, self.width) < p_E 
-        # Если горит сосед СПРАВА (fire_W), огонь ползет ВЛЕВО (на Запад) -> используем p_W
-        rand_W = np.random.rand(self.height, self.width) < p_W 
-
-        # Правила автомата
-        ignite = (fire_N & rand_N) | (fire_S & rand_S) | (fire_E & rand_E) | (fire_W & rand_W)
-        lightning = np.random.rand(self.height, self.width) < p_lightning
-        grow = np.random.rand(self.height, self.width) < p_grow
-        ash_clear = np.random.rand(self.height, self.width) < p_ash_clear
-
-        # Применяем изменения
-        new_grid = self.grid.copy()
-        new_grid[is_fire] = ASH
-        new_grid[is_ash & ash_clear] = EMPTY
-        new_grid[is_tree & (ignite | lightning)] = FIRE
-        new_grid[is_empty & grow] = TREE
+        # Горящий сосед СВЕРХУ гонит огонь на Юг (p_S), СНИЗУ — на Север (p_N),
+        # СЛЕВА — на Восток (p_E), СПРАВА — на Запад (p_W)
+        spread_q = self.spread_q((p_S, p_N, p_E, p_W))
+        probs = (spread_q, p_lightning, p_grow, p_ash_clear)
+
+        # Тайлы пишут в непересекающиеся строки new_grid и читают только старую сетку
+        grid = self.grid
+        new_grid = np.empty_like(grid)
+        tiles = self.tiles()
+        if len(tiles) == 1:
+            counts = [self._update_tile(grid, new_grid, 0, self.height, probs)]
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers)
+            counts = list(self._pool.map(lambda t: self._update_tile(grid, new_grid, t[0], t[1], probs), tiles))
+
+        # Все горевшие клетки стали пеплом, поэтому очаги = только что вспыхнувшие
+        sprouted = sum(c[0] for c in counts)
+        burned = sum(c[1] for c in counts)
+        self.tree_count += sprouted - burned
+        self.fire_count = burned
 
         self.grid = new_grid
         self.generation += 1
 
+    def close(self):
+        """Останавливает пул потоков тайлов"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _update_tile(self, grid, new_grid, r0, r1, probs):
+        """Обновляет строки [r0, r1) и возвращает (выросло, вспыхнуло)"""
+        spread_q, p_lightning, p_grow, p_ash_clear = probs
+        h = self.height
+
+        # Гало: по одной соседней строке сверху и снизу (сетка замкнута в тор)
+        block = np.concatenate((grid[(r0 - 1) % h][None], grid[r0:r1], grid[r1 % h][None]))
+        cells = block[1:-1]
+
+        # Маски текущих состояний
+        is_tree = (cells == TREE)
+        is_empty = (cells == EMPTY)
+        is_ash = (cells == ASH)
+        is_fire_block = (block == FIRE)
+        is_fire = is_fire_block[1:-1]
+
+        # Сдвиги матриц
+        fire_N = is_fire_block[:-2]              # Сосед СВЕРХУ
+        fire_S = is_fire_block[2:]               # Сосед СНИЗУ
+        fire_E = np.roll(is_fire, 1, axis=1)     # Сосед СЛЕВА (Запад)
+        fire_W = np.roll(is_fire, -1, axis=1)    # Сосед СПРАВА (Восток)
+
+        u = self.random_field(self.generation, r0, r1)
+
+        # Правила автомата: пустая клетка и пепел сравнивают u со своими порогами
+        sprout = is_empty & (u < p_grow)
+        ash_clear = is_ash & (u < p_ash_clear)
+
+        # Дерево без горящих соседей загорается только от молнии
+        burn = is_tree & (u < p_lightning)
+
+        # Дерево у огня уцелеет с вероятностью q = (1 - f) * П(1 - p_d) по горящим соседям.
+        # Таких клеток мало, поэтому q считается только для них
+        exposed = np.flatnonzero(is_tree & (fire_N | fire_S | fire_E | fire_W))
+        if exposed.size:
+            q = np.full(exposed.size, 1 - p_lightning, dtype=np.float32)
+            for fire_d, q_d in zip((fire_N, fire_S, fire_E, fire_W), spread_q):
+                hit = fire_d.ravel()[exposed]
+                if np.ndim(q_d):
+                    q[hit] *= q_d[r0:r1].ravel()[exposed[hit]]
+                else:
+                    q[hit] *= q_d
+            burn.ravel()[exposed] = u.ravel()[exposed] < 1 - q
+
+        out = new_grid[r0:r1]
+        out[...] = cells
+        out[is_fire] = ASH
+        out[ash_clear] = EMPTY
+        out[burn] = FIRE
+        out[sprout] = TREE
+
+        return int(np.count_nonzero(sprout)), int(np.count_nonzero(burn))
+
     def ignite_at(self, x, y, radius=4):
-        for iy in range(y - radius, y + radius):
-            for ix in range(x - radius, x + radius):
-                if 0 <= ix < self.width and 0 <= iy < self.height:
-                    if (ix - x)**2 + (iy - y)**2 <= radius**2:
-                        if self.grid[iy, ix] == TREE:
-                            self.grid[iy, ix] = FIRE
+        with self._grid_lock:
+            burned = terrain.stamp_disk(self.grid, x, y, radius, FIRE, where=TREE)
+        self.tree_count -= burned
+        self.fire_count += burned
+
+    def cut_firebreak(self, x, y, radius=3):
+        """Просека: вырубка деревьев в круге"""
+        with self._grid_lock:
+            self.tree_count -= terrain.stamp_disk(self.grid, x, y, radius, EMPTY, where=TREE)
 
     def get_render_image(self):
-        img = self.tex_soil.copy()
-        img[self.grid == WATER] = self.tex_water[self.grid == WATER]
-        img[self.grid == TREE] = self.tex_tree[self.grid == TREE]
-        img[self.grid == ASH] = self.tex_ash[self.grid == ASH]
+        # update из фонового потока подменяет self.grid целиком, а ignite_at и
+        # cut_firebreak меняют его на месте: берем согласованную копию
+        with self._grid_lock:
+            grid = self.grid.copy()
+        img = PALETTE[grid]
+        img += self.tex_noise
+        tree_mask = (grid == TREE)
+        img[tree_mask] += self.tex_noise[tree_mask] >> 1
         
-        fire_mask = (self.grid == FIRE)
+        fire_mask = (grid == FIRE)
         if fire_mask.any():
-            flicker = np.random.randint(-40, 40, (self.height, self.width, 3), dtype=np.int16)
+            flicker = self._fx_rng.integers(-40, 40, (self.height, self.width, 3), dtype=np.int16)
             base_fire = np.full((self.height, self.width, 3),[255, 90, 20], dtype=np.int16)
             fire_colors = np.clip(base_fire + flicker, 0, 255).astype(np.uint8)
             img[fire_mask] = fire_colors[fire_mask]
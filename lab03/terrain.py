@@ -0,0 +1,160 @@
+import os
+import zlib
+
+import numpy as np
+
+SMOOTH_PASSES = 8
+WATER_LEVEL = 0.46
+FOREST_DENSITY = 0.6
+
+# Шум текстуры равномерен на [-TEXTURE_NOISE, TEXTURE_NOISE)
+TEXTURE_NOISE = 16
+
+# Неоднородная местность: рельеф сглаживается сильнее озер, влажность спадает
+# от уровня воды до WATER_LEVEL + MOISTURE_RANGE, запас топлива — 1 ± FUEL_SPREAD
+ELEVATION_PASSES = 64
+FUEL_PASSES = 4
+MOISTURE_RANGE = 0.06
+MOISTURE_MAX = 0.8
+FUEL_SPREAD = 0.3
+
+# Версия алгоритма генерации мира: увеличивается при любом изменении, после
+# которого тот же seed дает другой мир (вместе с константами выше входит в ключ кэша)
+WORLD_FORMAT = 2
+
+
+def _power(base, exponent):
+    """base ** exponent для целого exponent >= 1 возведением в квадрат на месте (base портится).
+
+    np.power с показателем 8 вызывает powf на каждый элемент и на сетке
+    4096 x 4096 стоит ~0.4 с; три умножения на месте — ~0.03 с.
+    """
+    result = None
+    while True:
+        if exponent & 1:
+            result = base.copy() if result is None else np.multiply(result, base, out=result)
+        exponent >>= 1
+        if not exponent:
+            return result
+        base *= base
+
+
+def smooth_noise(rng, height, width, passes=SMOOTH_PASSES):
+    """Шум со средним 1/2 и дисперсией 1/12 (как у U(0, 1)), сглаженный `passes` раз
+    5-точечным усреднением на торе; float32 формы (height, width).
+
+    Многократное усреднение с соседями — это свертка, поэтому все проходы
+    сводятся к умножению спектра на передаточную функцию шаблона в степени
+    `passes`. Спектр белого шума генерируется сразу в частотной области:
+    независимые коэффициенты с той же дисперсией, среднее — в нулевой
+    гармонике. Коэффициенты равномерные (их разыгрывать в разы быстрее
+    гауссовых), но каждое значение результата — взвешенная сумма всех
+    коэффициентов, поэтому распределено нормально (ЦПТ), а не равномерно.
+    При passes <= 0 сглаживать нечего, и возвращается равномерный шум
+    rng.random. Нужно лишь одно обратное БПФ в float32.
+    """
+    if passes <= 0:
+        return rng.random((height, width), dtype=np.float32)
+    cos_y = np.cos(2 * np.pi * np.fft.fftfreq(height)).astype(np.float32)[:, None]
+    cos_x = np.cos(2 * np.pi * np.fft.rfftfreq(width)).astype(np.float32)[None, :]
+    transfer = 2 * cos_x + (1 + 2 * cos_y)
+    transfer *= np.float32(0.2)
+    transfer = _power(transfer, passes)
+
+    # Дисперсия U(0, 1) равна 1/12, на вещественную и мнимую части — поровну: n / 24.
+    # Части спектра — U(-1/2, 1/2) с дисперсией 1/12, множитель sqrt(12 n / 24)
+    n = height * width
+    spectrum = rng.random((height, width // 2 + 1, 2), dtype=np.float32)
+    spectrum -= np.float32(0.5)
+    spectrum = spectrum.view(np.complex64)[..., 0]
+    transfer *= np.float32(np.sqrt(n / 2.0))
+    spectrum *= transfer
+    spectrum[0, 0] = 0.5 * n
+    return np.fft.irfft2(spectrum, s=(height, width))
+
+
+def random_mask(rng, height, width, p):
+    """Маска клеток, отобранных независимо с вероятностью p"""
+    return rng.random((height, width), dtype=np.float32) < p
+
+
+def generate_texture_noise(rng, height, width):
+    """Шум текстур (h, w, 3) на [0, 2 * TEXTURE_NOISE): старшие 5 бит случайных байт"""
+    raw = np.frombuffer(rng.bytes(height * width * 3), dtype=np.uint8).reshape(height, width, 3)
+    return raw >> 3
+
+
+def _normalized(values):
+    low, high = values.min(), values.max()
+    return (values - low) / max(high - low, 1e-12)
+
+
+def generate_fields(rng, height, width, lake_noise):
+    """Поля местности (топливо, влажность, высота), float32 формы (h, w).
+
+    Высота — сильно сглаженный шум, нормированный на [0, 1]. Влажность выше
+    у берегов: она убывает по мере подъема шума озер над уровнем воды.
+    """
+    elevation = _normalized(smooth_noise(rng, height, width, ELEVATION_PASSES))
+    shore = (lake_noise - WATER_LEVEL) / MOISTURE_RANGE
+    moisture = MOISTURE_MAX * np.clip(1 - shore, 0, 1)
+    fuel = 1 + FUEL_SPREAD * (2 * _normalized(smooth_noise(rng, height, width, FUEL_PASSES)) - 1)
+    return fuel.astype(np.float32), moisture.astype(np.float32), elevation.astype(np.float32)
+
+
+def world_key():
+    """Отпечаток параметров генерации: мир, записанный с другими параметрами, не подхватывается"""
+    params = (WORLD_FORMAT, SMOOTH_PASSES, WATER_LEVEL, FOREST_DENSITY, TEXTURE_NOISE,
+              ELEVATION_PASSES, FUEL_PASSES, MOISTURE_RANGE, MOISTURE_MAX, FUEL_SPREAD)
+    return f"{zlib.crc32(repr(params).encode()):08x}"
+
+
+def world_paths(cache_dir, width, height, seed, names):
+    base = os.path.join(cache_dir, f"world_{width}x{height}_{seed}_{world_key()}")
+    return {name: f"{base}.{name}.npy" for name in names}
+
+
+def load_world(cache_dir, width, height, seed, names=("grid", "tex")):
+    """Массивы мира {имя: массив} из кэша или None, если какого-то нет.
+
+    Сетка читается в память (она изменяется), остальные массивы отображаются
+    в память (mmap) только на чтение.
+    """
+    paths = world_paths(cache_dir, width, height, seed, names)
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    return {name: np.load(path, mmap_mode=None if name == "grid" else "r")
+            for name, path in paths.items()}
+
+
+def save_world(cache_dir, width, height, seed, **arrays):
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, path in world_paths(cache_dir, width, height, seed, arrays).items():
+        np.save(path, arrays[name])
+
+
+def disk_window(shape, x, y, radius):
+    """Окно сетки вокруг (x, y) и маска круга в нем; None, если круг вне сетки"""
+    height, width = shape
+    y0, y1 = max(y - radius, 0), min(y + radius + 1, height)
+    x0, x1 = max(x - radius, 0), min(x + radius + 1, width)
+    if y0 >= y1 or x0 >= x1:
+        return None
+    yy, xx = np.ogrid[y0 - y:y1 - y, x0 - x:x1 - x]
+    return (slice(y0, y1), slice(x0, x1)), yy * yy + xx * xx <= radius * radius
+
+
+def stamp_disk(grid, x, y, radius, value, where=None):
+    """Записывает value в круг радиуса radius (только поверх состояния where, если задано).
+
+    Возвращает число измененных клеток.
+    """
+    window = disk_window(grid.shape, x, y, radius)
+    if window is None:
+        return 0
+    region, mask = window
+    view = grid[region]
+    if where is not None:
+        mask = mask & (view == where)
+    view[mask] = value
+    return int(np.count_nonzero(mask))
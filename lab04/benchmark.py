@@ -0,0 +1,193 @@
+"""Замер скорости и качества генераторов из generators.GENERATORS.
+
+Пример:
+    python -m lab04.benchmark --generators custom pcg32 pcg64 --block-sizes 4096 1048576 \
+        --workers 1 4 --total 20000000 --quality-n 10000000 --json report.json --markdown report.md
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from lab04 import engine, generators, quality
+
+DEFAULT_BLOCK_SIZES = (1 << 12, 1 << 16, 1 << 20)
+# Провал теста: p-значение вне [P_FAIL, 1 - P_FAIL]
+P_FAIL = 0.001
+
+
+def environment():
+    return {
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+
+
+def _fill_loop(generator, method, block_size, total):
+    """Заполняет буфер block_size, пока не наберется total значений; возвращает число значений"""
+    buffer = np.empty(block_size, dtype=np.uint64 if method == 'fill_uint64' else np.float64)
+    fill = getattr(generator, method)
+    for _ in range(max(1, total // block_size)):
+        fill(buffer)
+    return max(1, total // block_size) * block_size
+
+
+def time_fill(name, method, block_size, total, workers=1, warmup=1, repeat=3, seed=generators.DEFAULT_SEED):
+    """Лучшее и медианное время на значение (с) для заполнения блоками block_size.
+
+    При workers > 1 каждый поток заполняет свои буферы своим экземпляром
+    генератора (зерна seed, seed + 1, ...); скорость — суммарная.
+    """
+    instances = [generators.create(name, seed + i) for i in range(workers)]
+    per_worker = total // workers
+
+    def run():
+        start = time.perf_counter()
+        if workers == 1:
+            count = _fill_loop(instances[0], method, block_size, total)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                count = sum(pool.map(lambda g: _fill_loop(g, method, block_size, per_worker), instances))
+        return (time.perf_counter() - start) / count
+
+    for _ in range(warmup):
+        run()
+    times = [run() for _ in range(repeat)]
+    return min(times), statistics.median(times)
+
+
+def check_quality(name, n, seed=generators.DEFAULT_SEED):
+    """p-значения батареи тестов по n значениям и спектральный тест для LCG"""
+    generator = generators.create(name, seed)
+    summary = engine.analyze_generator(generator, n, tests=True).summary()
+    p_values = {test: result['p_value'] for test, result in summary['quality'].items()}
+    report = {
+        'n': n,
+        'p_values': p_values,
+        'failures': sorted(test for test, p in p_values.items()
+                           if p is not None and not P_FAIL <= p <= 1 - P_FAIL),
+    }
+    if isinstance(generator, generators.LCG):
+        spectral = quality.spectral_test(generator.a, generator.m)
+        report['spectral_min_merit'] = min(row['merit'] for row in spectral)
+    return report
+
+
+def run_benchmark(names, block_sizes, workers_list, total, warmup, repeat, quality_n, seed):
+    report = {
+        'environment': environment(),
+        'settings': {
+            'block_sizes': list(block_sizes),
+            'workers': list(workers_list),
+            'total': total,
+            'warmup': warmup,
+            'repeat': repeat,
+            'quality_n': quality_n,
+            'seed': seed,
+        },
+        'generators': {},
+    }
+    for name in names:
+        entry = {'title': generators.title(name), 'throughput': []}
+        bits = generators.create(name, seed).bits
+        for workers in workers_list:
+            # Встроенный random хранит состояние в модуле: параллельно его не меряем
+            if workers > 1 and name == 'builtin':
+                continue
+            for block_size in block_sizes:
+                best_f, median_f = time_fill(name, 'fill_float64', block_size, total, workers, warmup, repeat, seed)
+                best_u, median_u = time_fill(name, 'fill_uint64', block_size, total, workers, warmup, repeat, seed)
+                entry['throughput'].append({
+                    'workers': workers,
+                    'block_size': block_size,
+                    'floats_per_s': 1 / best_f,
+                    'floats_per_s_median': 1 / median_f,
+                    # Полезные случайные байты: значимые биты слова
+                    'bytes_per_s': bits / 8 / best_u,
+                    'bytes_per_s_median': bits / 8 / median_u,
+                })
+        if quality_n:
+            entry['quality'] = check_quality(name, quality_n, seed)
+        report['generators'][name] = entry
+        print(f"{name}: готово", file=sys.stderr, flush=True)
+    return report
+
+
+def _rate(value):
+    for unit, scale in (('G', 1e9), ('M', 1e6), ('K', 1e3)):
+        if value >= scale:
+            return f"{value / scale:.2f}{unit}"
+    return f"{value:.0f}"
+
+
+def markdown_report(report):
+    settings = report['settings']
+    env = report['environment']
+    lines = [
+        "# Скорость и качество генераторов",
+        "",
+        f"Платформа: {env['platform']}, {env['processor'] or env['machine']}, ядер: {env['cpu_count']}, "
+        f"Python {env['python']}, NumPy {env['numpy']}.",
+        f"Значений на замер: {settings['total']}, прогревов: {settings['warmup']}, "
+        f"повторов: {settings['repeat']} (лучший результат).",
+        "",
+    ]
+    columns = [(w, b) for w in settings['workers'] for b in settings['block_sizes']]
+    header = ["Генератор"] + [f"float/с (потоков {w}, блок {b})" for w, b in columns] + ["байт/с (макс.)"]
+    if settings['quality_n']:
+        header += ["Провалы тестов", "Спектр. тест (мин.)"]
+    lines.append("| " + " | ".join(header) + " |")
+    lines.append("|" + "|".join([":----"] + [":----:"] * (len(header) - 1)) + "|")
+
+    for name, entry in report['generators'].items():
+        rows = {(r['workers'], r['block_size']): r for r in entry['throughput']}
+        cells = [f"`{name}`"]
+        cells += [_rate(rows[c]['floats_per_s']) if c in rows else "—" for c in columns]
+        cells.append(_rate(max(r['bytes_per_s'] for r in entry['throughput'])))
+        if 'quality' in entry:
+            failures = entry['quality']['failures']
+            cells.append(", ".join(failures) if failures else "нет")
+            merit = entry['quality'].get('spectral_min_merit')
+            cells.append(f"{merit:.3f}" if merit is not None else "—")
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Скорость (float/с, байт/с) и качество генераторов lab04")
+    parser.add_argument('--generators', nargs='+', default=list(generators.GENERATORS),
+                        choices=list(generators.GENERATORS), metavar='NAME')
+    parser.add_argument('--block-sizes', nargs='+', type=int, default=list(DEFAULT_BLOCK_SIZES))
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, os.cpu_count() or 1])
+    parser.add_argument('--total', type=int, default=10_000_000, help="значений на один замер")
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quality-n', type=int, default=1_000_000, help="значений для тестов качества (0 — без них)")
+    parser.add_argument('--seed', type=int, default=generators.DEFAULT_SEED)
+    parser.add_argument('--json', help="путь для отчета JSON")
+    parser.add_argument('--markdown', help="путь для отчета Markdown (иначе — в stdout)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.generators, args.block_sizes, sorted(set(args.workers)), args.total,
+                           args.warmup, args.repeat, args.quality_n, args.seed)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    text = markdown_report(report)
+    if args.markdown:
+        with open(args.markdown, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
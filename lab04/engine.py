@@ -1,58 +1,150 @@
-import random
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from lab04 import generators, quality, streaming
 
-class CustomRNG:
-    def __init__(self, seed=52):
-        self.m = 2**31
-        self.a = 1103515245
-        self.c = 12345
-        self.state = seed
-
-    def next(self):
-        self.state = (self.a * self.state + self.c) % self.m
-        return self.state / self.m
+class CustomRNG(generators.LCG):
+    """Базовый датчик: LCG с параметрами ANSI C"""
 
-    def generate(self, n):
-        return np.array([self.next() for _ in range(n)])
+    def __init__(self, seed=52):
+        super().__init__(a=1103515245, c=12345, m=2**31, seed=seed)
 
 def get_builtin_rng(n):
-    return np.array([random.random() for _ in range(n)])
+    return generators.PythonRandom().random(n)
 
 def calculate_stats(data):
-    mean = np.mean(data)
-    variance = np.var(data, ddof=1) 
-    return mean, variance
+    moments = streaming.Moments()
+    moments.update(np.asarray(data, dtype=np.float64))
+    return moments.mean, moments.variance()
 
 THEORETICAL_MEAN = 0.5
 THEORETICAL_VARIANCE = 1.0 / 12.0
+# Для U(0, 1): асимметрия 0, эксцесс -6/5
+THEORETICAL_SKEWNESS = 0.0
+THEORETICAL_KURTOSIS = -1.2
+
+HIST_BINS = 50
+
+class StreamAnalysis:
+    """Все накопители по одному потоку: моменты, гистограмма и (по желанию) тесты качества.
 
-def get_analysis_results(n=100000):
-    custom_rng = CustomRNG()
-    data_custom = custom_rng.generate(n)
-    data_builtin = get_builtin_rng(n)
+    Память не зависит от длины потока; накопители разных участков сливаются через merge.
+    """
+
+    def __init__(self, tests=True, bins=HIST_BINS):
+        self.moments = streaming.Moments()
+        self.histogram = streaming.Histogram(bins)
+        self.battery = quality.Battery() if tests else None
+
+    def update(self, chunk):
+        self.moments.update(chunk)
+        self.histogram.update(chunk)
+        if self.battery is not None:
+            self.battery.update(chunk)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.histogram.merge(other.histogram)
+        if self.battery is not None:
+            self.battery.merge(other.battery)
+
+    def summary(self):
+        moments = self.moments
+        mean, var = moments.mean, moments.variance()
+        result = {
+            'n': moments.n,
+            'mean': mean,
+            'variance': var,
+            'skewness': moments.skewness(),
+            'kurtosis': moments.kurtosis(),
+            'err_mean': abs(mean - THEORETICAL_MEAN),
+            'err_var': abs(var - THEORETICAL_VARIANCE),
+            'histogram': {
+                'edges': self.histogram.edges,
+                'counts': self.histogram.counts.copy(),
+            },
+        }
+        if self.battery is not None:
+            result['quality'] = self.battery.results()
+        return result
 
-    mean_cust, var_cust = calculate_stats(data_custom)
-    mean_built, var_built = calculate_stats(data_builtin)
+def analyze_stream(generator, n, analysis, chunk_size=quality.CHUNK_SIZE):
+    """Пропускает n значений генератора через analysis кусками по chunk_size"""
+    buffer = np.empty(min(n, chunk_size))
+    for start in range(0, n, chunk_size):
+        chunk = buffer[:min(chunk_size, n - start)]
+        generator.fill_float64(chunk)
+        analysis.update(chunk)
+    return analysis
 
-    results = {
+def analyze_generator(generator, n, tests=True, workers=1, chunk_size=quality.CHUNK_SIZE):
+    """Анализ n значений генератора в постоянной памяти.
+
+    Если генератор умеет перескакивать, поток делится на workers участков,
+    которые обрабатываются параллельно и сливаются: моменты и гистограмма те
+    же, что при последовательном проходе. Иначе — один последовательный проход.
+    """
+    sizes = np.diff(np.linspace(0, n, workers + 1).astype(np.int64)).tolist() if workers > 1 else [n]
+    parts = generators.substreams(generator, sizes) if len(sizes) > 1 else None
+    if parts is None:
+        return analyze_stream(generator, n, StreamAnalysis(tests), chunk_size)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        analyses = list(pool.map(lambda part: analyze_stream(part[0], part[1], StreamAnalysis(tests), chunk_size),
+                                 zip(parts, sizes)))
+    total = analyses[0]
+    for analysis in analyses[1:]:
+        total.merge(analysis)
+    return total
+
+def _base_results(n, names):
+    return {
         'n': n,
+        'generators': list(names),
         'theoretical': {
             'mean': THEORETICAL_MEAN,
-            'variance': THEORETICAL_VARIANCE
+            'variance': THEORETICAL_VARIANCE,
+            'skewness': THEORETICAL_SKEWNESS,
+            'kurtosis': THEORETICAL_KURTOSIS
         },
-        'custom': {
-            'data': data_custom,
-            'mean': mean_cust,
-            'variance': var_cust,
-            'err_mean': abs(mean_cust - THEORETICAL_MEAN),
-            'err_var': abs(var_cust - THEORETICAL_VARIANCE)
-        },
-        'builtin': {
-            'data': data_builtin,
-            'mean': mean_built,
-            'variance': var_built,
-            'err_mean': abs(mean_built - THEORETICAL_MEAN),
-            'err_var': abs(var_built - THEORETICAL_VARIANCE)
-        }
     }
-    return results
\ No newline at end of file
+
+def get_analysis_results(n=100000, names=('custom', 'builtin'), seed=generators.DEFAULT_SEED, tests=True, workers=1):
+    """Статистика по выборке из n значений для каждого генератора из names (см. generators.GENERATORS).
+
+    Сырые выборки не хранятся: вместо них возвращаются моменты и гистограмма.
+    С tests=True добавляются результаты батареи тестов (quality) и, для LCG, спектральный тест.
+    """
+    results = _base_results(n, names)
+    for name in dict.fromkeys(names):
+        generator = generators.create(name, seed)
+        analysis = analyze_generator(generator, n, tests, workers)
+        results[name] = dict(analysis.summary(), title=generators.title(name))
+        if tests and isinstance(generator, generators.LCG):
+            results[name]['spectral'] = quality.spectral_test(generator.a, generator.m)
+    return results
+
+def iter_analysis_results(n=100000, names=('custom', 'builtin'), seed=generators.DEFAULT_SEED, tests=True,
+                          chunk_size=quality.CHUNK_SIZE):
+    """То же, что get_analysis_results, но по частям: после каждого куска выдает
+    промежуточные результаты (доля выполненного — в 'progress').
+
+    Словари генераторов при каждом шаге заменяются новыми, поэтому поверхностной
+    копии выданного словаря достаточно, чтобы передать его в другой поток.
+    """
+    results = dict(_base_results(n, names), progress=0.0)
+    unique = list(dict.fromkeys(names))
+    total = max(n * len(unique), 1)
+    for k, name in enumerate(unique):
+        generator = generators.create(name, seed)
+        analysis = StreamAnalysis(tests)
+        buffer = np.empty(min(n, chunk_size))
+        for start in range(0, n, chunk_size):
+            chunk = buffer[:min(chunk_size, n - start)]
+            generator.fill_float64(chunk)
+            analysis.update(chunk)
+            results[name] = dict(analysis.summary(), title=generators.title(name))
+            done = start + chunk.size
+            if done == n and tests and isinstance(generator, generators.LCG):
+                results[name]['spectral'] = quality.spectral_test(generator.a, generator.m)
+            results['progress'] = (k * n + done) / total
+            yield results
@@ -0,0 +1,366 @@
+import copy
+import random
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Зерно по умолчанию для всех генераторов, кроме встроенного random
+DEFAULT_SEED = 52
+
+# Длина блока векторной генерации LCG
+BLOCK_SIZE = 1 << 16
+# Минимальная длина куска для параллельной генерации
+MIN_CHUNK = 1 << 20
+# Число независимых потоков (дорожек) у генераторов с векторизацией по дорожкам
+LANES = 8192
+
+_DOUBLE_UNIT = 2.0 ** -53
+
+
+class BlockGenerator:
+    """Общий интерфейс: генератор заполняет готовый буфер целиком.
+
+    fill_uint64 пишет сырые слова (значимы младшие `bits` бит), fill_float64 —
+    числа из [0, 1). По умолчанию float64 строится из старших 53 бит слова.
+    Генераторы с can_advance умеют перескакивать на k значений вперед
+    (advance), что позволяет обрабатывать участки потока параллельно.
+    """
+    bits = 64
+    can_advance = False
+
+    def advance(self, k):
+        raise NotImplementedError
+
+    def fill_uint64(self, out):
+        raise NotImplementedError
+
+    def fill_float64(self, out):
+        raw = np.empty(out.size, dtype=np.uint64)
+        self.fill_uint64(raw)
+        np.multiply(raw >> np.uint64(11), _DOUBLE_UNIT, out=out)
+
+    def random(self, n):
+        out = np.empty(n, dtype=np.float64)
+        self.fill_float64(out)
+        return out
+
+
+# --- Линейные конгруэнтные генераторы ---
+
+def affine_compose(f, g, m):
+    """Композиция аффинных отображений x -> a*x + c по модулю m: сначала f, затем g"""
+    return (g[0] * f[0]) % m, (g[0] * f[1] + g[1]) % m
+
+
+def affine_power(a, c, k, m):
+    """Коэффициенты (A, C) отображения x -> A*x + C, равного k шагам LCG. O(log k)."""
+    result, step = (1, 0), (a % m, c % m)
+    while k:
+        if k & 1:
+            result = affine_compose(result, step, m)
+        step = affine_compose(step, step, m)
+        k >>= 1
+    return result
+
+
+def affine_block(a, c, m, size):
+    """Массивы A[i], C[i] для шагов 1..size: x_{n+i+1} = (A[i]*x_n + C[i]) mod m.
+
+    Считаются удвоением: вторая половина — первая, продолженная на половину длины.
+    Требуется m <= 2**32, чтобы A*x + C помещалось в uint64.
+    """
+    A = np.empty(size, dtype=np.uint64)
+    C = np.empty(size, dtype=np.uint64)
+    A[0], C[0] = a % m, c % m
+    filled = 1
+    while filled < size:
+        take = min(filled, size - filled)
+        shift_a, shift_c = int(A[filled - 1]), int(C[filled - 1])
+        A[filled:filled + take] = (A[:take] * np.uint64(shift_a)) % np.uint64(m)
+        C[filled:filled + take] = (C[:take] * np.uint64(shift_a) + np.uint64(shift_c)) % np.uint64(m)
+        filled += take
+    return A, C
+
+
+class LCG(BlockGenerator):
+    """X_{n+1} = (a * X_n + c) mod m, U_n = X_n / m (m <= 2**32)"""
+    can_advance = True
+
+    def __init__(self, a, c, m, seed=DEFAULT_SEED):
+        self.a = a
+        self.c = c
+        self.m = m
+        self.state = seed % m
+        self.bits = (m - 1).bit_length()
+        self._block = None
+
+    def next(self):
+        self.state = (self.a * self.state + self.c) % self.m
+        return self.state / self.m
+
+    def advance(self, k):
+        """Перескок на k шагов вперед без генерации промежуточных значений"""
+        A, C = affine_power(self.a, self.c, k, self.m)
+        self.state = (A * self.state + C) % self.m
+
+    def jumped(self, k):
+        """Независимая копия генератора, смещенная на k шагов"""
+        rng = copy.copy(self)
+        rng.advance(k)
+        return rng
+
+    def _fill_states(self, out, state):
+        """Заполняет out состояниями x_1..x_len(out) после state, возвращает последнее"""
+        A, C = self._block
+        m = np.uint64(self.m)
+        for start in range(0, out.size, BLOCK_SIZE):
+            size = min(BLOCK_SIZE, out.size - start)
+            chunk = out[start:start + size]
+            np.multiply(A[:size], np.uint64(state), out=chunk)
+            chunk += C[:size]
+            chunk %= m
+            state = int(chunk[-1])
+        return state
+
+    def fill_uint64(self, out, workers=1):
+        """Состояния X_1..X_n, совпадающие бит в бит с n вызовами next().
+
+        Последовательность считается блоками: каждое состояние блока — аффинная
+        функция последнего состояния предыдущего блока. При workers > 1 буфер
+        делится на куски, начало каждого находится перескоком, и куски
+        заполняются параллельно.
+        """
+        if self._block is None:
+            self._block = affine_block(self.a, self.c, self.m, BLOCK_SIZE)
+        n = out.size
+        chunks = max(1, min(workers, n // MIN_CHUNK))
+        if chunks == 1:
+            final = self._fill_states(out, self.state)
+        else:
+            bounds = np.linspace(0, n, chunks + 1).astype(int)
+            starts = [self.jumped(int(b0)).state for b0 in bounds[:-1]]
+            with ThreadPoolExecutor(max_workers=chunks) as pool:
+                list(pool.map(lambda i: self._fill_states(out[bounds[i]:bounds[i + 1]], starts[i]),
+                              range(chunks)))
+            final = int(out[-1])
+        if n:
+            self.state = final
+
+    def fill_float64(self, out, workers=1):
+        states = np.empty(out.size, dtype=np.uint64)
+        self.fill_uint64(states, workers)
+        # Для m = 2^k деление точно и совпадает с state / m в Python
+        np.divide(states, self.m, out=out)
+
+    def generate(self, n, workers=1):
+        out = np.empty(n, dtype=np.float64)
+        self.fill_float64(out, workers)
+        return out
+
+
+# --- Генераторы с векторизацией по дорожкам ---
+
+class LaneGenerator(BlockGenerator):
+    """LANES независимых экземпляров генератора, шагающих одновременно.
+
+    Выход — чередование дорожек: значение t-го шага дорожки j стоит на месте
+    t * LANES + j. Дорожки засеваются из SeedSequence, поэтому их начальные
+    состояния независимы. Каждый шаг — несколько операций над массивом из
+    LANES слов, так что накладные расходы Python делятся на LANES значений.
+    """
+    state_words = 2
+
+    def __init__(self, seed=DEFAULT_SEED):
+        words = np.random.SeedSequence(seed).generate_state(self.state_words * LANES, dtype=np.uint64)
+        self.s = list(words.reshape(self.state_words, LANES))
+        self._pending = np.empty(0, dtype=np.uint64)
+
+    def _step(self, out):
+        """Один шаг всех дорожек: пишет LANES слов в out"""
+        raise NotImplementedError
+
+    def fill_uint64(self, out):
+        n = out.size
+        # Остаток предыдущего вызова
+        done = min(n, self._pending.size)
+        out[:done] = self._pending[:done]
+        self._pending = self._pending[done:]
+
+        rows = (n - done) // LANES
+        body = out[done:done + rows * LANES].reshape(rows, LANES)
+        for row in body:
+            self._step(row)
+        done += rows * LANES
+
+        if done < n:
+            extra = np.empty(LANES, dtype=np.uint64)
+            self._step(extra)
+            out[done:] = extra[:n - done]
+            self._pending = extra[n - done:]
+
+
+def _rotl(x, k):
+    return (x << np.uint64(k)) | (x >> np.uint64(64 - k))
+
+
+class Xorshift128Plus(LaneGenerator):
+    """xorshift128+ (Vigna), сдвиги 23/18/5"""
+    state_words = 2
+
+    def _step(self, out):
+        s1, s0 = self.s
+        np.add(s0, s1, out=out)
+        s1 = s1 ^ (s1 << np.uint64(23))
+        self.s = [s0, s1 ^ s0 ^ (s1 >> np.uint64(18)) ^ (s0 >> np.uint64(5))]
+
+
+class Xoshiro256StarStar(LaneGenerator):
+    """xoshiro256** (Blackman, Vigna)"""
+    state_words = 4
+
+    def _step(self, out):
+        s0, s1, s2, s3 = self.s
+        out[...] = _rotl(s1 * np.uint64(5), 7) * np.uint64(9)
+        t = s1 << np.uint64(17)
+        s2 ^= s0
+        s3 ^= s1
+        s1 ^= s2
+        s0 ^= s3
+        s2 ^= t
+        self.s = [s0, s1, s2, _rotl(s3, 45)]
+
+
+PCG_MULT = np.uint64(6364136223846793005)
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+class PCG32(LaneGenerator):
+    """PCG32 (XSH RR 64/32, O'Neill). Дорожка j — поток с номером seq = j.
+
+    Слово uint64 собирается из двух 32-битных выходов (старшее — первый).
+    """
+    bits = 64
+
+    def __init__(self, seed=DEFAULT_SEED):
+        init_state = np.random.SeedSequence(seed).generate_state(LANES, dtype=np.uint64)
+        self.seed_lanes(init_state, np.arange(LANES, dtype=np.uint64))
+
+    def seed_lanes(self, init_state, seq):
+        """Засев как pcg32_srandom_r(initstate, initseq) для каждой дорожки"""
+        self.inc = (seq << np.uint64(1)) | np.uint64(1)
+        self.state = np.zeros_like(self.inc)
+        self._next32()
+        self.state += init_state
+        self._next32()
+        self._pending = np.empty(0, dtype=np.uint64)
+
+    def _next32(self):
+        old = self.state
+        self.state = old * PCG_MULT + self.inc
+        xorshifted = (((old >> np.uint64(18)) ^ old) >> np.uint64(27)) & _MASK32
+        rot = old >> np.uint64(59)
+        return ((xorshifted >> rot) | (xorshifted << ((np.uint64(32) - rot) & np.uint64(31)))) & _MASK32
+
+    def _step(self, out):
+        hi = self._next32()
+        np.bitwise_or(hi << np.uint64(32), self._next32(), out=out)
+
+
+# --- Готовые генераторы ---
+
+class NumpyBitGenerator(BlockGenerator):
+    """Битовые генераторы NumPy (MT19937, PCG64, Philox, SFC64, ...)"""
+
+    def __init__(self, bit_generator, seed=DEFAULT_SEED):
+        self.rng = np.random.Generator(bit_generator(seed))
+        # У семейства PCG64 одно число float64 — ровно одно 64-битное слово
+        self.can_advance = bit_generator in (np.random.PCG64, np.random.PCG64DXSM)
+
+    def advance(self, k):
+        self.rng.bit_generator.advance(k)
+
+    def fill_uint64(self, out):
+        out[...] = self.rng.integers(0, 2**64, size=out.size, dtype=np.uint64)
+
+    def fill_float64(self, out):
+        self.rng.random(out=out)
+
+
+class PythonRandom(BlockGenerator):
+    """Встроенный random.random(), векторно и бит в бит.
+
+    Состояние Mersenne Twister модуля random переносится в MT19937 NumPy:
+    оба считают double из двух 32-битных слов одинаково (53 бита). После
+    генерации состояние возвращается в random, как если бы random.random()
+    вызывался n раз.
+    """
+
+    def _run(self, draw):
+        version, internal, gauss_next = random.getstate()
+        bitgen = np.random.MT19937()
+        bitgen.state = {'bit_generator': 'MT19937',
+                        'state': {'key': np.array(internal[:-1], dtype=np.uint32), 'pos': internal[-1]}}
+        draw(np.random.Generator(bitgen))
+        state = bitgen.state['state']
+        random.setstate((version, tuple(int(k) for k in state['key']) + (int(state['pos']),), gauss_next))
+
+    def fill_uint64(self, out):
+        # Как random.getrandbits(64): младшее слово — первое
+        def draw(rng):
+            words = rng.bit_generator.random_raw(2 * out.size).reshape(-1, 2)
+            np.bitwise_or(words[:, 1] << np.uint64(32), words[:, 0], out=out)
+        self._run(draw)
+
+    def fill_float64(self, out):
+        self._run(lambda rng: rng.random(out=out))
+
+
+def substreams(generator, sizes):
+    """Копии генератора, стоящие в начале последовательных участков длины sizes.
+
+    Участки вместе дают ту же последовательность, что и сам генератор.
+    Возвращает None, если генератор не умеет перескакивать.
+    """
+    if not generator.can_advance:
+        return None
+    parts, offset = [], 0
+    for size in sizes:
+        part = copy.deepcopy(generator)
+        part.advance(offset)
+        parts.append(part)
+        offset += size
+    return parts
+
+
+# Реестр: имя -> (название, фабрика(seed))
+GENERATORS = {
+    'custom': ("LCG ANSI C (a=1103515245, c=12345, m=2^31)",
+               lambda seed: LCG(1103515245, 12345, 2**31, seed)),
+    'randu': ("RANDU (a=65539, m=2^31)",
+              lambda seed: LCG(65539, 0, 2**31, seed | 1)),
+    'minstd': ("MINSTD (a=16807, m=2^31-1)",
+               lambda seed: LCG(16807, 0, 2**31 - 1, seed)),
+    'minstd2': ("MINSTD (a=48271, m=2^31-1)",
+                lambda seed: LCG(48271, 0, 2**31 - 1, seed)),
+    'nr': ("LCG Numerical Recipes (a=1664525, m=2^32)",
+           lambda seed: LCG(1664525, 1013904223, 2**32, seed)),
+    'xorshift128+': ("xorshift128+", Xorshift128Plus),
+    'xoshiro256**': ("xoshiro256**", Xoshiro256StarStar),
+    'pcg32': ("PCG32", PCG32),
+    'philox': ("Philox 4x64 (NumPy)", lambda seed: NumpyBitGenerator(np.random.Philox, seed)),
+    'mt19937': ("MT19937 (NumPy)", lambda seed: NumpyBitGenerator(np.random.MT19937, seed)),
+    'pcg64': ("PCG64 (NumPy)", lambda seed: NumpyBitGenerator(np.random.PCG64, seed)),
+    'pcg64dxsm': ("PCG64DXSM (NumPy)", lambda seed: NumpyBitGenerator(np.random.PCG64DXSM, seed)),
+    'sfc64': ("SFC64 (NumPy)", lambda seed: NumpyBitGenerator(np.random.SFC64, seed)),
+    'builtin': ("Встроенный random (MT)", lambda seed: PythonRandom()),
+}
+
+
+def create(name, seed=DEFAULT_SEED):
+    """Генератор из реестра по имени (встроенный random зерно не принимает)"""
+    if name not in GENERATORS:
+        raise KeyError(f"неизвестный генератор: {name}")
+    return GENERATORS[name][1](seed)
+
+
+def title(name):
+    return GENERATORS[name][0]
@@ -1,13 +1,38 @@
+import queue
+import threading
+from tkinter import messagebox
 import customtkinter as ctk
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-import engine  # Подключаем ваш файл с логикой
+from lab04 import engine  # Подключаем ваш файл с логикой
+from lab04 import generators, quality
 
 # Настройка внешнего вида CustomTkinter
 ctk.set_appearance_mode("Dark")  # Тёмная тема
 ctk.set_default_color_theme("blue")  # Синие акценты
 
+# Подписи полей карточек: моменты, p-значения тестов качества, спектральный тест
+FIELD_NAMES = {
+    "mean": "Среднее:",
+    "variance": "Дисперсия:",
+    "err_mean": "Погрешность ср.:",
+    "err_var": "Погрешность дисп.:",
+    "skewness": "Асимметрия:",
+    "kurtosis": "Эксцесс:",
+}
+FIELD_NAMES.update({f"p_{test.name}": f"{test.title}, p:" for test in quality.default_tests()})
+FIELD_NAMES["spectral"] = "Спектр. тест 3D, 1/ν:"
+SLOT_FIELDS = list(FIELD_NAMES)
+# p-значения ниже этого порога подсвечиваются как провал теста
+P_FAIL = 0.001
+FAIL_COLOR = "#FF5252"
+TEXT_DEFAULT = ("gray10", "#DCE4EE")
+# Период опроса очереди результатов фонового анализа, мс
+POLL_MS = 50
+BAR_COLORS = ('#4A90E2', '#50E3C2')
+
 class LabApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -37,6 +62,17 @@ class LabApp(ctk.CTk):
         self.n_entry.insert(0, "100000")
         self.n_entry.pack(fill="x", padx=20, pady=(0, 20))
 
+        # Выбор сравниваемых генераторов (по одному на график)
+        self.generator_menus = []
+        for i, default in enumerate(("custom", "builtin")):
+            label = ctk.CTkLabel(self.sidebar_frame, text=f"Генератор {i + 1}:", font=ctk.CTkFont(size=14))
+            label.pack(anchor="w", padx=20)
+            menu = ctk.CTkOptionMenu(self.sidebar_frame, values=list(generators.GENERATORS),
+                                     command=lambda name, i=i: self.select_generator(i, name))
+            menu.set(default)
+            menu.pack(fill="x", padx=20, pady=(0, 15))
+            self.generator_menus.append(menu)
+
         # Кнопка генерации
         self.generate_btn = ctk.CTkButton(self.sidebar_frame, text="Сгенерировать и проанализировать", 
                                           height=40, font=ctk.CTkFont(size=14, weight="bold"),
@@ -45,13 +81,14 @@ class LabApp(ctk.CTk):
 
         # Карточки со статистикой
         self.stats_cards = {}
+        self.card_titles = {}
         
         # Теоретическая карточка
-        self.create_stat_card("Теоретические значения", "theoretical", "#2B2B2B", ["mean", "variance"])
-        # Карточка Custom (LCG)
-        self.create_stat_card("Базовый датчик (LCG)", "custom", "#1E3D59", ["mean", "variance", "err_mean", "err_var"])
-        # Карточка Встроенного (MT)
-        self.create_stat_card("Встроенный датчик (MT)", "builtin", "#1E5939", ["mean", "variance", "err_mean", "err_var"])
+        self.create_stat_card("Теоретические значения", "theoretical", "#2B2B2B", ["mean", "variance", "skewness", "kurtosis"])
+        # Карточки выбранных генераторов
+        for i, color in enumerate(("#1E3D59", "#1E5939")):
+            name = self.generator_menus[i].get()
+            self.create_stat_card(generators.title(name), f"slot{i}", color, SLOT_FIELDS)
 
         # --- ПРАВАЯ ПАНЕЛЬ (Графики) ---
         self.plot_frame = ctk.CTkFrame(self, fg_color="#242424", corner_radius=15)
@@ -69,6 +106,13 @@ class LabApp(ctk.CTk):
         self.ax1 = self.figure.add_subplot(211)
         self.ax2 = self.figure.add_subplot(212)
         self.figure.tight_layout(pad=3.0)
+        self.bars = []
+
+        # Фоновый анализ: поток кладет промежуточные результаты в очередь,
+        # окно забирает их по таймеру. Номер запуска отсекает результаты старых запусков
+        self.results_queue = queue.Queue()
+        self.run_id = 0
+        self.cancel_event = threading.Event()
 
     def create_stat_card(self, title, key, bg_color, fields):
         """Создает красивую карточку для вывода статистики"""
@@ -77,16 +121,12 @@ class LabApp(ctk.CTk):
         
         title_label = ctk.CTkLabel(frame, text=title, font=ctk.CTkFont(size=16, weight="bold"))
         title_label.pack(pady=(10, 5), padx=10, anchor="w")
+        self.card_titles[key] = title_label
 
         self.stats_cards[key] = {}
         
         for field in fields:
-            text_name = {
-                "mean": "Среднее:",
-                "variance": "Дисперсия:",
-                "err_mean": "Погрешность ср.:",
-                "err_var": "Погрешность дисп.:"
-            }[field]
+            text_name = FIELD_NAMES[field]
             
             row = ctk.CTkFrame(frame, fg_color="transparent")
             row.pack(fill="x", padx=10, pady=2)
@@ -100,10 +140,7 @@ class LabApp(ctk.CTk):
             self.stats_cards[key][field] = lbl_val
 
     def run_analysis(self):
-        """Запуск расчета и обновление интерфейса"""
-        self.generate_btn.configure(state="disabled", text="Анализируем...")
-        self.update()
-
+        """Запуск расчета в фоновом потоке; интерфейс обновляется по мере поступления результатов"""
         try:
             n = int(self.n_entry.get())
             if n <= 0: raise ValueError
@@ -112,23 +149,107 @@ class LabApp(ctk.CTk):
             self.n_entry.insert(0, "100000")
             n = 100000
 
-        # Получаем данные из вашего engine.py
-        results = engine.get_analysis_results(n)
+        # Предыдущий запуск (если он еще идет) останавливается
+        self.cancel_analysis()
+
+        names = [menu.get() for menu in self.generator_menus]
+        self.generate_btn.configure(state="disabled", text="Анализируем... 0%")
+        self.prepare_plots(names)
+        worker = threading.Thread(target=self.analysis_worker, args=(self.run_id, n, names, self.cancel_event),
+                                  daemon=True)
+        worker.start()
+        self.after(POLL_MS, self.poll_results, self.run_id)
 
+    def cancel_analysis(self):
+        """Останавливает текущий запуск: его результаты с устаревшим номером отбрасываются"""
+        self.cancel_event.set()
+        self.cancel_event = threading.Event()
+        self.run_id += 1
+        self.generate_btn.configure(state="normal", text="Сгенерировать и проанализировать")
+
+    def analysis_worker(self, run_id, n, names, cancel):
+        """Фоновый поток: анализ кусками, после каждого куска — результаты в очередь.
+
+        Исключение тоже передается через очередь, иначе поток умрет молча,
+        а окно будет ждать результатов бесконечно.
+        """
+        try:
+            for partial in engine.iter_analysis_results(n, names):
+                if cancel.is_set():
+                    return
+                self.results_queue.put((run_id, dict(partial)))
+        except Exception as exc:
+            self.results_queue.put((run_id, exc))
+
+    def poll_results(self, run_id):
+        """Забирает из очереди самый свежий результат текущего запуска и обновляет окно"""
+        if run_id != self.run_id:
+            return
+        latest = None
+        error = None
+        while True:
+            try:
+                result_id, results = self.results_queue.get_nowait()
+            except queue.Empty:
+                break
+            if result_id != run_id:
+                continue
+            if isinstance(results, Exception):
+                error = results
+            else:
+                latest = results
+
+        if latest is not None:
+            self.show_results(latest)
+        if error is not None:
+            self.generate_btn.configure(state="normal", text="Сгенерировать и проанализировать")
+            messagebox.showerror("Ошибка анализа", f"{type(error).__name__}: {error}")
+            return
+        if latest is not None:
+            if latest["progress"] >= 1.0:
+                self.generate_btn.configure(state="normal", text="Сгенерировать и проанализировать")
+                return
+            self.generate_btn.configure(text=f"Анализируем... {latest['progress']:.0%}")
+        self.after(POLL_MS, self.poll_results, run_id)
+
+    def show_results(self, results):
         # Обновляем текстовые значения в карточках
         self.update_card("theoretical", results["theoretical"])
-        self.update_card("custom", results["custom"])
-        self.update_card("builtin", results["builtin"])
+        for i, name in enumerate(results["generators"]):
+            if name in results:
+                self.update_card(f"slot{i}", results[name])
 
-        # Отрисовываем графики
-        self.draw_plots(results)
+        # Обновляем высоты столбцов гистограмм
+        self.update_plots(results)
 
-        self.generate_btn.configure(state="normal", text="Сгенерировать и проанализировать")
+    def select_generator(self, slot, name):
+        """Смена генератора в слоте: новое название карточки, старые цифры сбрасываются.
+
+        Идущий запуск считает прежний набор генераторов, поэтому он отменяется:
+        иначе его результаты легли бы в карточки нового выбора.
+        """
+        self.cancel_analysis()
+        key = f"slot{slot}"
+        self.card_titles[key].configure(text=generators.title(name))
+        for label in self.stats_cards[key].values():
+            label.configure(text="—")
 
     def update_card(self, key, data):
         """Обновляет цифры в нужной карточке"""
+        data = dict(data)
+        for name, test in data.get("quality", {}).items():
+            data[f"p_{name}"] = test["p_value"]
+        for row in data.get("spectral", []):
+            if row["dim"] == 3:
+                data["spectral"] = row["distance"]
+
         for field, label in self.stats_cards[key].items():
-            if field in data:
+            if field not in data or data[field] is None:
+                label.configure(text="—", text_color=TEXT_DEFAULT)
+            elif field.startswith("p_"):
+                val = data[field]
+                label.configure(text=f"{val:.4f}", text_color=FAIL_COLOR if val < P_FAIL else TEXT_DEFAULT)
+            else:
                 # Форматируем красиво до 6 знаков (научный формат для малых погрешностей)
                 val = data[field]
                 if "err" in field and val < 0.0001:
@@ -137,32 +258,38 @@ class LabApp(ctk.CTk):
                     formatted_val = f"{val:.6f}"
                 label.configure(text=formatted_val)
 
-    def draw_plots(self, results):
-        """Рисует гистограммы распределения"""
-        data_custom = results['custom']['data']
-        data_builtin = results['builtin']['data']
-
-        self.ax1.clear()
-        self.ax2.clear()
-
-        # Гистограмма для базового генератора (LCG)
-        self.ax1.hist(data_custom, bins=50, density=True, color='#4A90E2', alpha=0.8, edgecolor='black')
-        self.ax1.axhline(1, color='#FF5252', linestyle='dashed', linewidth=2, label='Теоретическая плотность (U(0,1))')
-        self.ax1.set_title("Плотность распределения: Базовый датчик (LCG)", fontsize=12, pad=10)
-        self.ax1.set_xlim(0, 1)
-        self.ax1.legend(loc="upper right")
-        self.ax1.grid(color='#333333', linestyle='-', linewidth=0.5)
-
-        # Гистограмма для встроенного генератора (MT)
-        self.ax2.hist(data_builtin, bins=50, density=True, color='#50E3C2', alpha=0.8, edgecolor='black')
-        self.ax2.axhline(1, color='#FF5252', linestyle='dashed', linewidth=2, label='Теоретическая плотность (U(0,1))')
-        self.ax2.set_title("Плотность распределения: Встроенный датчик (Python MT)", fontsize=12, pad=10)
-        self.ax2.set_xlim(0, 1)
-        self.ax2.legend(loc="upper right")
-        self.ax2.grid(color='#333333', linestyle='-', linewidth=0.5)
+    def prepare_plots(self, names):
+        """Пустые гистограммы для выбранных генераторов; дальше меняются только высоты столбцов"""
+        edges = np.linspace(0, 1, engine.HIST_BINS + 1)
+        self.bars = []
+        for ax, name, color in zip((self.ax1, self.ax2), names, BAR_COLORS):
+            ax.clear()
+            bars = ax.bar(edges[:-1], np.zeros(engine.HIST_BINS), width=np.diff(edges), align='edge',
+                          color=color, alpha=0.8, edgecolor='black')
+            self.bars.append(bars)
+            ax.axhline(1, color='#FF5252', linestyle='dashed', linewidth=2, label='Теоретическая плотность (U(0,1))')
+            ax.set_title(f"Плотность распределения: {generators.title(name)}", fontsize=12, pad=10)
+            ax.set_xlim(0, 1)
+            ax.set_ylim(0, 1.3)
+            ax.legend(loc="upper right")
+            ax.grid(color='#333333', linestyle='-', linewidth=0.5)
 
         self.figure.tight_layout(pad=3.0)
-        self.canvas.draw()
+        self.canvas.draw_idle()
+
+    def update_plots(self, results):
+        """Гистограмма уже посчитана потоково: обновляем высоты готовых столбцов"""
+        for ax, bars, name in zip((self.ax1, self.ax2), self.bars, results['generators']):
+            if name not in results:
+                continue
+            hist = results[name]['histogram']
+            density = hist['counts'] / (hist['counts'].sum() * np.diff(hist['edges']))
+            for bar, height in zip(bars, density):
+                bar.set_height(height)
+            top = max(1.3, float(density.max()) * 1.1)
+            if top > ax.get_ylim()[1]:
+                ax.set_ylim(0, top)
+        self.canvas.draw_idle()
 
 if __name__ == "__main__":
     app = LabApp()
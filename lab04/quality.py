@@ -0,0 +1,537 @@
+import math
+from fractions import Fraction
+import numpy as np
+
+# Размер куска потока по умолчанию: тесты держат только накопленные счетчики
+CHUNK_SIZE = 1 << 20
+# Минимальное ожидаемое число попаданий в ячейку для хи-квадрат
+MIN_EXPECTED = 5
+
+
+# --- Распределения (без scipy) ---
+
+def _gamma_series(a, x):
+    """Регуляризованная нижняя неполная гамма-функция P(a, x) рядом"""
+    term = total = 1.0 / a
+    k = a
+    for _ in range(10000):
+        k += 1
+        term *= x / k
+        total += term
+        if abs(term) < abs(total) * 1e-15:
+            break
+    return total * math.exp(-x + a * math.log(x) - math.lgamma(a))
+
+
+def _gamma_fraction(a, x):
+    """Регуляризованная верхняя неполная гамма-функция Q(a, x) цепной дробью (Лентц)"""
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return h * math.exp(-x + a * math.log(x) - math.lgamma(a))
+
+
+def chi2_sf(x, dof):
+    """P(X >= x) для хи-квадрат с dof степенями свободы"""
+    if x <= 0:
+        return 1.0
+    a, half = dof / 2, x / 2
+    if half < a + 1:
+        return max(0.0, 1 - _gamma_series(a, half))
+    return _gamma_fraction(a, half)
+
+
+def normal_two_sided(z):
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def kolmogorov_sf(x):
+    """P(sqrt(n) * D >= x) для предельного распределения Колмогорова"""
+    if x < 0.2:
+        return 1.0
+    return min(1.0, max(0.0, 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * x * x) for k in range(1, 101))))
+
+
+def chi2_test(observed, probs, total):
+    """Хи-квадрат по наблюдаемым частотам; хвостовые ячейки с малым ожиданием объединяются"""
+    observed = np.asarray(observed, dtype=np.float64)
+    expected = np.asarray(probs, dtype=np.float64) * total
+    # Сливаем с конца, пока ожидание в последней ячейке мало
+    while expected.size > 2 and expected[-1] < MIN_EXPECTED:
+        observed = np.concatenate((observed[:-2], [observed[-2] + observed[-1]]))
+        expected = np.concatenate((expected[:-2], [expected[-2] + expected[-1]]))
+    while expected.size > 2 and expected[0] < MIN_EXPECTED:
+        observed = np.concatenate(([observed[0] + observed[1]], observed[2:]))
+        expected = np.concatenate(([expected[0] + expected[1]], expected[2:]))
+    if total == 0 or expected.min() <= 0:
+        return None, None, 0
+    stat = float(((observed - expected) ** 2 / expected).sum())
+    dof = expected.size - 1
+    return stat, chi2_sf(stat, dof), dof
+
+
+# --- Тесты: накопители по кускам потока ---
+
+class StreamTest:
+    """Тест, принимающий поток кусками: update(chunk) копит счетчики, result() — итог.
+
+    merge(other) складывает счетчики теста, прогнанного по другому участку
+    потока (в другом потоке выполнения). Кортежи, серии и интервалы на
+    стыке участков при этом теряются — по одному на стык.
+    """
+    name = ""
+    title = ""
+    # Аддитивные счетчики, которые складываются при слиянии
+    _additive = ("counts",)
+
+    def update(self, chunk):
+        raise NotImplementedError
+
+    def merge(self, other):
+        for attr in self._additive:
+            setattr(self, attr, getattr(self, attr) + getattr(other, attr))
+
+    def result(self):
+        raise NotImplementedError
+
+    def _result(self, statistic, p_value, **extra):
+        return dict(extra, title=self.title, statistic=statistic, p_value=p_value)
+
+
+class GroupedTest(StreamTest):
+    """Тест над непересекающимися группами по group_size значений; остаток переносится в следующий кусок"""
+    group_size = 1
+
+    def __init__(self):
+        self._tail = np.empty(0)
+
+    def update(self, chunk):
+        if self._tail.size:
+            chunk = np.concatenate((self._tail, chunk))
+        full = chunk.size - chunk.size % self.group_size
+        self._tail = chunk[full:].copy()
+        if full:
+            self.update_groups(chunk[:full].reshape(-1, self.group_size))
+
+    def update_groups(self, groups):
+        raise NotImplementedError
+
+
+class ChiSquareTest(StreamTest):
+    """Хи-квадрат частот попадания в bins равных интервалов"""
+    name = "chi2"
+    title = "Хи-квадрат"
+
+    def __init__(self, bins=100):
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, chunk):
+        self.counts += np.bincount((chunk * self.bins).astype(np.intp), minlength=self.bins)[:self.bins]
+
+    def result(self):
+        n = int(self.counts.sum())
+        stat, p, dof = chi2_test(self.counts, np.full(self.bins, 1 / self.bins), n)
+        return self._result(stat, p, dof=dof)
+
+
+class KSTest(StreamTest):
+    """Колмогоров–Смирнов по гистограмме из bins интервалов.
+
+    Эмпирическая функция распределения известна только на границах
+    интервалов, поэтому D занижено не более чем на 1 / bins; поток при этом
+    не нужно хранить и сортировать.
+    """
+    name = "ks"
+    title = "Колмогоров–Смирнов"
+
+    def __init__(self, bins=1 << 16):
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, chunk):
+        self.counts += np.bincount((chunk * self.bins).astype(np.intp), minlength=self.bins)[:self.bins]
+
+    def result(self):
+        n = int(self.counts.sum())
+        if n == 0:
+            return self._result(None, None)
+        ecdf = np.cumsum(self.counts) / n
+        edges = np.arange(1, self.bins + 1) / self.bins
+        d = float(np.abs(ecdf - edges).max())
+        sqrt_n = math.sqrt(n)
+        # Поправка Стивенса для конечных n
+        return self._result(d, kolmogorov_sf(d * (sqrt_n + 0.12 + 0.11 / sqrt_n)))
+
+
+class SerialCorrelationTest(StreamTest):
+    """Коэффициент корреляции соседних (с шагом lag) значений; при H0 r ~ N(0, 1/n)"""
+    name = "serial"
+    title = "Сериальная корреляция"
+    _additive = ("n", "sum_x", "sum_y", "sum_xx", "sum_yy", "sum_xy")
+
+    def __init__(self, lag=1):
+        self.lag = lag
+        self._prev = np.empty(0)
+        self.n = 0
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_yy = self.sum_xy = 0.0
+
+    def update(self, chunk):
+        # Центрируем, чтобы суммы по 1e8+ значений не теряли точность
+        values = np.concatenate((self._prev, chunk - 0.5))
+        x, y = values[:-self.lag], values[self.lag:]
+        self._prev = values[-self.lag:]
+        self.n += x.size
+        self.sum_x += float(x.sum())
+        self.sum_y += float(y.sum())
+        self.sum_xx += float(x @ x)
+        self.sum_yy += float(y @ y)
+        self.sum_xy += float(x @ y)
+
+    def result(self):
+        n = self.n
+        if n < 3:
+            return self._result(None, None)
+        cov = self.sum_xy - self.sum_x * self.sum_y / n
+        var_x = self.sum_xx - self.sum_x ** 2 / n
+        var_y = self.sum_yy - self.sum_y ** 2 / n
+        r = cov / math.sqrt(var_x * var_y)
+        return self._result(r, normal_two_sided(r * math.sqrt(n)), lag=self.lag)
+
+
+class GapTest(StreamTest):
+    """Тест интервалов: длины серий между попаданиями в [alpha, beta), длины >= t объединены"""
+    name = "gap"
+    title = "Интервалы"
+
+    def __init__(self, alpha=0.0, beta=0.5, t=10):
+        self.alpha, self.beta, self.t = alpha, beta, t
+        self.counts = np.zeros(t + 1, dtype=np.int64)
+        self._run = 0
+
+    def update(self, chunk):
+        hits = np.flatnonzero((chunk >= self.alpha) & (chunk < self.beta))
+        if hits.size == 0:
+            self._run += chunk.size
+            return
+        gaps = np.diff(hits, prepend=-1) - 1
+        gaps[0] += self._run
+        self._run = chunk.size - 1 - int(hits[-1])
+        self.counts += np.bincount(np.minimum(gaps, self.t), minlength=self.t + 1)
+
+    def result(self):
+        p = self.beta - self.alpha
+        probs = p * (1 - p) ** np.arange(self.t + 1)
+        probs[-1] = (1 - p) ** self.t
+        stat, p_value, dof = chi2_test(self.counts, probs, int(self.counts.sum()))
+        return self._result(stat, p_value, dof=dof)
+
+
+def _stirling2(n, k):
+    """Числа Стирлинга второго рода"""
+    if n == k:
+        return 1
+    if k == 0 or k > n:
+        return 0
+    return k * _stirling2(n - 1, k) + _stirling2(n - 1, k - 1)
+
+
+class PokerTest(GroupedTest):
+    """Покер-тест (Кнут): число различных цифр среди group_size цифр floor(d * u)"""
+    name = "poker"
+    title = "Покер-тест"
+
+    def __init__(self, d=10, group_size=5):
+        super().__init__()
+        self.d = d
+        self.group_size = group_size
+        self.counts = np.zeros(group_size + 1, dtype=np.int64)
+
+    def update_groups(self, groups):
+        digits = np.sort((groups * self.d).astype(np.int64), axis=1)
+        distinct = 1 + np.count_nonzero(np.diff(digits, axis=1), axis=1)
+        self.counts += np.bincount(distinct, minlength=self.group_size + 1)
+
+    def result(self):
+        k, d = self.group_size, self.d
+        probs = [math.perm(d, r) * _stirling2(k, r) / d ** k for r in range(1, k + 1)]
+        stat, p, dof = chi2_test(self.counts[1:], probs, int(self.counts.sum()))
+        return self._result(stat, p, dof=dof)
+
+
+class RunsTest(StreamTest):
+    """Серии вверх и вниз: число монотонных участков R, при H0
+    E[R] = (2n - 1) / 3, D[R] = (16n - 29) / 90"""
+    name = "runs"
+    title = "Серии вверх/вниз"
+    _additive = ("n", "changes")
+
+    def __init__(self):
+        self.n = 0
+        self.changes = 0
+        self._last = None
+        self._last_sign = 0
+
+    def update(self, chunk):
+        self.n += chunk.size
+        values = chunk if self._last is None else np.concatenate(([self._last], chunk))
+        if values.size < 2:
+            self._last = float(values[-1]) if values.size else self._last
+            return
+        signs = np.sign(np.diff(values))
+        if self._last_sign:
+            signs = np.concatenate(([self._last_sign], signs))
+        self.changes += int(np.count_nonzero(signs[1:] != signs[:-1]))
+        self._last = float(values[-1])
+        self._last_sign = int(signs[-1])
+
+    def result(self):
+        n = self.n
+        if n < 3:
+            return self._result(None, None)
+        runs = self.changes + 1
+        z = (runs - (2 * n - 1) / 3) / math.sqrt((16 * n - 29) / 90)
+        return self._result(runs, normal_two_sided(z), z=z)
+
+
+class BirthdaySpacingsTest(GroupedTest):
+    """Интервалы между днями рождения (Марсалья): m дней из года в days дней.
+
+    Число повторяющихся интервалов между упорядоченными днями распределено
+    примерно по Пуассону с lambda = m^3 / (4 * days); параметры по умолчанию
+    взяты из DIEHARD (lambda = 2).
+    """
+    name = "birthday"
+    title = "Дни рождения"
+
+    def __init__(self, m=1 << 9, days=1 << 24):
+        super().__init__()
+        self.group_size = m
+        self.days = days
+        self.lam = m ** 3 / (4 * days)
+        self.max_j = int(self.lam * 4) + 10
+        self.counts = np.zeros(self.max_j + 1, dtype=np.int64)
+
+    def update_groups(self, groups):
+        birthdays = np.sort((groups * self.days).astype(np.int64), axis=1)
+        spacings = np.sort(np.diff(birthdays, axis=1, prepend=0), axis=1)
+        repeats = np.count_nonzero(np.diff(spacings, axis=1) == 0, axis=1)
+        self.counts += np.bincount(np.minimum(repeats, self.max_j), minlength=self.max_j + 1)
+
+    def result(self):
+        lam = self.lam
+        probs = np.array([math.exp(-lam + j * math.log(lam) - math.lgamma(j + 1)) for j in range(self.max_j + 1)])
+        probs[-1] = max(0.0, 1 - probs[:-1].sum())
+        samples = int(self.counts.sum())
+        stat, p, dof = chi2_test(self.counts, probs, samples)
+        return self._result(stat, p, dof=dof, samples=samples)
+
+
+class CellTest(GroupedTest):
+    """Равномерность непересекающихся dim-мерных точек по k^dim ячейкам.
+
+    Точки LCG лежат на небольшом числе гиперплоскостей, и когда расстояние
+    между ними больше ширины ячейки, часть ячеек пустует (RANDU в 3D).
+    """
+
+    def __init__(self, dim=2, k=64):
+        super().__init__()
+        self.group_size = dim
+        self.k = k
+        self.name = f"cells{dim}d"
+        self.title = f"Ячейки {dim}D ({k}^{dim})"
+        self.counts = np.zeros(k ** dim, dtype=np.int64)
+
+    def update_groups(self, groups):
+        digits = (groups * self.k).astype(np.int64)
+        cells = digits @ (self.k ** np.arange(self.group_size, dtype=np.int64))
+        self.counts += np.bincount(cells, minlength=self.counts.size)
+
+    def result(self):
+        n = int(self.counts.sum())
+        stat, p, dof = chi2_test(self.counts, np.full(self.counts.size, 1 / self.counts.size), n)
+        return self._result(stat, p, dof=dof, empty_cells=int(np.count_nonzero(self.counts == 0)))
+
+
+def default_tests():
+    return [ChiSquareTest(), KSTest(), SerialCorrelationTest(), GapTest(), PokerTest(),
+            RunsTest(), BirthdaySpacingsTest(), CellTest(2, 64), CellTest(3, 16)]
+
+
+class Battery:
+    """Набор тестов над одним потоком: update(chunk) передает кусок всем тестам"""
+
+    def __init__(self, tests=None):
+        self.tests = default_tests() if tests is None else tests
+        self.n = 0
+
+    def update(self, chunk):
+        self.n += chunk.size
+        for test in self.tests:
+            test.update(chunk)
+
+    def merge(self, other):
+        self.n += other.n
+        for test, other_test in zip(self.tests, other.tests):
+            test.merge(other_test)
+
+    def results(self):
+        return {test.name: test.result() for test in self.tests}
+
+
+def run_battery(generator, n, chunk_size=CHUNK_SIZE, tests=None):
+    """Прогон тестов по n значениям генератора; в памяти только один кусок"""
+    battery = Battery(tests)
+    buffer = np.empty(min(n, chunk_size))
+    for start in range(0, n, chunk_size):
+        chunk = buffer[:min(chunk_size, n - start)]
+        generator.fill_float64(chunk)
+        battery.update(chunk)
+    return battery.results()
+
+
+# --- Спектральный тест LCG ---
+
+# Константы Эрмита gamma_t (заданы t-е степени): nu_t <= sqrt(gamma_t) * m^(1/t)
+HERMITE = {t: g ** (1 / t) for t, g in {2: 4 / 3, 3: 2, 4: 4, 5: 8, 6: 64 / 3, 7: 64, 8: 256}.items()}
+
+
+def _lll(basis, delta=Fraction(3, 4)):
+    """LLL-редукция целочисленного базиса (точная арифметика, малые размерности)"""
+    basis = [list(v) for v in basis]
+    n = len(basis)
+
+    def dot(u, v):
+        return sum(a * b for a, b in zip(u, v))
+
+    def gram_schmidt():
+        ortho, mu = [], [[Fraction(0)] * n for _ in range(n)]
+        for i in range(n):
+            v = [Fraction(x) for x in basis[i]]
+            for j in range(i):
+                mu[i][j] = dot(basis[i], ortho[j]) / dot(ortho[j], ortho[j])
+                v = [a - mu[i][j] * b for a, b in zip(v, ortho[j])]
+            ortho.append(v)
+        return ortho, mu
+
+    ortho, mu = gram_schmidt()
+    k = 1
+    while k < n:
+        for j in range(k - 1, -1, -1):
+            q = round(mu[k][j])
+            if q:
+                basis[k] = [a - q * b for a, b in zip(basis[k], basis[j])]
+                ortho, mu = gram_schmidt()
+        if dot(ortho[k], ortho[k]) >= (delta - mu[k][k - 1] ** 2) * dot(ortho[k - 1], ortho[k - 1]):
+            k += 1
+        else:
+            basis[k], basis[k - 1] = basis[k - 1], basis[k]
+            ortho, mu = gram_schmidt()
+            k = max(k - 1, 1)
+    return basis
+
+
+def _shortest(basis):
+    """Квадрат длины кратчайшего ненулевого вектора решетки: LLL + перебор Шнорра–Ойхнера.
+
+    Коэффициенты перебираются от последнего базисного вектора к первому; на
+    уровне k ортогональная проекция задает отрезок допустимых x_k вокруг
+    центра, значения обходятся от центра наружу, а радиус поиска сжимается
+    при каждом найденном более коротком векторе. Ветви за радиусом
+    отсекаются, поэтому перебор всегда точный. Вектор и -v не различаются:
+    старший ненулевой коэффициент берется положительным. Ортогонализация
+    ведется во float (базис после LLL хорошо обусловлен, к радиусу добавлен
+    запас), а длины кандидатов считаются точно в целых числах.
+    """
+    basis = _lll(basis)
+    n = len(basis)
+    best = min(sum(x * x for x in v) for v in basis)
+
+    b = np.array(basis, dtype=np.float64)
+    ortho = b.copy()
+    mu = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i):
+            mu[i, j] = b[i] @ ortho[j] / (ortho[j] @ ortho[j])
+            ortho[i] -= mu[i, j] * ortho[j]
+    norms = (ortho * ortho).sum(axis=1).tolist()
+    mu = mu.tolist()
+    coeffs = [0] * n
+    radius = best * (1 + 1e-9)
+
+    def search(k, partial, top):
+        nonlocal best, radius
+        center = -sum(mu[j][k] * coeffs[j] for j in range(k + 1, n))
+        # Обход x = x0, x0 ± 1, ... в порядке удаления от центра; с каждой стороны
+        # расстояние только растет, поэтому сторона бросается на первом выходе за радиус
+        up = round(center)
+        down = up - 1
+        if top:
+            up, down = max(up, 0), None
+        while up is not None or down is not None:
+            if down is None or (up is not None and abs(up - center) <= abs(down - center)):
+                x, up = up, up + 1
+                side = 'up'
+            else:
+                x, down = down, down - 1
+                side = 'down'
+            norm = partial + norms[k] * (x - center) ** 2
+            if norm > radius:
+                if side == 'up':
+                    up = None
+                else:
+                    down = None
+                continue
+            coeffs[k] = x
+            if k > 0:
+                search(k - 1, norm, top and x == 0)
+            elif not (top and x == 0):
+                v = [sum(coeffs[i] * basis[i][j] for i in range(n)) for j in range(n)]
+                length = sum(c * c for c in v)
+                if length < best:
+                    best = length
+                    radius = best * (1 + 1e-9)
+        coeffs[k] = 0
+
+    search(n - 1, 0.0, True)
+    return best
+
+
+def spectral_test(a, m, dims=range(2, 7)):
+    """Спектральный тест LCG с множителем a по модулю m.
+
+    nu_t — длина кратчайшего ненулевого вектора s двойственной решетки
+    (s_1 + a s_2 + ... + a^(t-1) s_t = 0 mod m): все t-мерные точки генератора
+    лежат на гиперплоскостях с расстоянием 1 / nu_t. Оценка качества
+    merit = nu_t / (sqrt(gamma_t) m^(1/t)) в (0, 1]; хорошие множители дают > 0.6.
+    """
+    result = []
+    for t in dims:
+        basis = [[m] + [0] * (t - 1)]
+        for i in range(1, t):
+            row = [0] * t
+            row[0] = -pow(a, i, m)
+            row[i] = 1
+            basis.append(row)
+        nu = math.sqrt(_shortest(basis))
+        result.append({
+            'dim': t,
+            'nu': nu,
+            'distance': 1 / nu,
+            'merit': nu / (math.sqrt(HERMITE[t]) * m ** (1 / t)),
+        })
+    return result
@@ -0,0 +1,91 @@
+import math
+import numpy as np
+
+
+class Moments:
+    """Однопроходные центральные моменты до 4-го порядка.
+
+    Кусок обрабатывается векторно (среднее и суммы степеней отклонений от
+    него), а затем сливается с накопленным по формулам Чана/Пебея. Те же
+    формулы сливают накопители разных потоков, поэтому результат не зависит
+    от разбиения выборки (с точностью до округления).
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+
+    def update(self, chunk):
+        if chunk.size == 0:
+            return
+        part = Moments()
+        part.n = chunk.size
+        part.mean = float(chunk.mean())
+        d = chunk - part.mean
+        d2 = d * d
+        part.m2 = float(d2.sum())
+        part.m3 = float(d2 @ d)
+        part.m4 = float(d2 @ d2)
+        self.merge(part)
+
+    def merge(self, other):
+        na, nb = self.n, other.n
+        if nb == 0:
+            return
+        if na == 0:
+            self.n, self.mean, self.m2, self.m3, self.m4 = other.n, other.mean, other.m2, other.m3, other.m4
+            return
+        n = na + nb
+        delta = other.mean - self.mean
+        delta_n = delta / n
+        self.m4 = (self.m4 + other.m4
+                   + delta * delta_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+                   + 6 * delta_n ** 2 * (na * na * other.m2 + nb * nb * self.m2)
+                   + 4 * delta_n * (na * other.m3 - nb * self.m3))
+        self.m3 = (self.m3 + other.m3
+                   + delta * delta_n ** 2 * na * nb * (na - nb)
+                   + 3 * delta_n * (na * other.m2 - nb * self.m2))
+        self.m2 = self.m2 + other.m2 + delta * delta_n * na * nb
+        self.mean = self.mean + delta_n * nb
+        self.n = n
+
+    def variance(self, ddof=1):
+        return self.m2 / (self.n - ddof) if self.n > ddof else math.nan
+
+    def skewness(self):
+        return math.sqrt(self.n) * self.m3 / self.m2 ** 1.5 if self.m2 > 0 else math.nan
+
+    def kurtosis(self):
+        """Коэффициент эксцесса (у нормального распределения 0)"""
+        return self.n * self.m4 / self.m2 ** 2 - 3 if self.m2 > 0 else math.nan
+
+
+class Histogram:
+    """Гистограмма с фиксированными интервалами на [low, high); значения вне отрезка прижимаются к краям"""
+
+    def __init__(self, bins=50, low=0.0, high=1.0):
+        self.bins = bins
+        self.low = low
+        self.high = high
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    @property
+    def edges(self):
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+    def update(self, chunk):
+        idx = ((chunk - self.low) * (self.bins / (self.high - self.low))).astype(np.intp)
+        np.clip(idx, 0, self.bins - 1, out=idx)
+        self.counts += np.bincount(idx, minlength=self.bins)
+
+    def merge(self, other):
+        self.counts += other.counts
+
+    def density(self):
+        """Оценка плотности по интервалам (площадь под гистограммой равна 1)"""
+        total = self.counts.sum()
+        width = (self.high - self.low) / self.bins
+        return self.counts / (total * width) if total else np.zeros(self.bins)
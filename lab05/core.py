@@ -1,5 +1,5 @@
-from collections import Counter
-import random
+import numpy as np
+from lab06 import variates
 
 MAGIC_ANSWERS = [
     "Бесспорно",
@@ -24,43 +24,89 @@ MAGIC_ANSWERS = [
     "Весьма сомнительно"
 ]
 
+# Общий генератор одиночных розыгрышей (get_yes_no, get_magic_8_ball)
+_RNG = np.random.default_rng()
+
 def get_yes_no(p=0.5):
-    return "ДА" if random.random() < p else "НЕТ"
+    return "ДА" if _RNG.random() < p else "НЕТ"
 
-def get_magic_8_ball():
+class CategoricalSampler:
+    """Выбор одного из m исходов с вероятностями, пропорциональными weights.
+
+    Метод псевдонимов (Уокер, Воуз): таблицы строятся один раз за O(m), после
+    чего розыгрыш стоит O(1) и не накапливает сумму вероятностей. Одно число
+    alpha дает и столбец (целая часть alpha * m), и второе равномерное число
+    (дробная часть), которое сравнивается с порогом столбца.
+    """
+
+    def __init__(self, weights, rng=None):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or weights.size == 0 or weights.min() < 0 or weights.sum() <= 0:
+            raise ValueError("веса должны быть неотрицательны и не все нулевые")
+        self.m = weights.size
+        self.probs = weights / weights.sum()
+        # Одиночный (draw) и массовый (sample) розыгрыши идут через один генератор
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.threshold, self.alias = variates.alias_tables(self.probs)
+        self._threshold_list = self.threshold.tolist()
+        self._alias_list = self.alias.tolist()
 
-    m = len(MAGIC_ANSWERS)
-    p_i = 1.0 / m  
+    def _pick(self, alpha):
+        t = alpha * self.m
+        k = int(t)
+        return k if t - k < self._threshold_list[k] else self._alias_list[k]
 
-    alpha = random.random()
+    def draw(self):
+        """Номер одного исхода"""
+        return self._pick(self.rng.random())
 
-    cumulative_p = 0.0
+    def sample(self, n):
+        """n номеров исходов (np.int64) одним векторным розыгрышем"""
+        t = self.rng.random(n) * self.m
+        k = t.astype(np.int64)
+        t -= k
+        return np.where(t < self.threshold[k], k, self.alias[k])
 
-    for k in range(m):
-        cumulative_p += p_i
+_MAGIC_SAMPLER = CategoricalSampler(np.ones(len(MAGIC_ANSWERS)), _RNG)
 
-        if alpha < cumulative_p:
-            return MAGIC_ANSWERS[k]
-        
-    return MAGIC_ANSWERS[-1]
+def get_magic_8_ball():
+    return MAGIC_ANSWERS[_MAGIC_SAMPLER.draw()]
 
-def run_simulation(mode, n_trials=10000):
+# Размер блока векторного розыгрыша в run_simulation
+SIM_BLOCK = 1 << 20
 
+def simulation_setup(mode, p=0.5):
+    """Исходы режима и их теоретические вероятности"""
     if mode == "YESNO":
-        results = [get_yes_no() for _ in range(n_trials)]
-        keys = ["ДА", "НЕТ"]
-        theoretical_p = 0.5
-    else:
-        results = [get_magic_8_ball() for _ in range(n_trials)]
-        keys = MAGIC_ANSWERS
-        theoretical_p = 1.0 / len(MAGIC_ANSWERS)
+        return ["ДА", "НЕТ"], np.array([p, 1 - p])
+    return MAGIC_ANSWERS, np.full(len(MAGIC_ANSWERS), 1.0 / len(MAGIC_ANSWERS))
+
+def _block_counts(sampler, n_trials):
+    """Частоты исходов за n_trials розыгрышей сэмплера блоками по SIM_BLOCK"""
+    counts = np.zeros(sampler.m, dtype=np.int64)
+    for start in range(0, n_trials, SIM_BLOCK):
+        block = min(SIM_BLOCK, n_trials - start)
+        counts += np.bincount(sampler.sample(block), minlength=sampler.m)
+    return counts
+
+def simulate_counts(probs, n_trials, method="blocks", rng=None):
+    """Частоты исходов за n_trials испытаний в постоянной памяти.
 
-    counts = Counter(results)
+    "blocks" — розыгрыш блоками по SIM_BLOCK испытаний методом псевдонимов
+    с подсчетом np.bincount; "multinomial" — сразу вектор частот одним
+    полиномиальным розыгрышем (то же распределение частот, O(m)).
+    """
+    if n_trials < 1:
+        raise ValueError("число испытаний должно быть не меньше 1")
+    rng = np.random.default_rng() if rng is None else rng
+    if method == "multinomial":
+        return rng.multinomial(n_trials, probs)
+    return _block_counts(CategoricalSampler(probs, rng), n_trials)
 
+def frequency_stats(keys, counts, probs, n_trials):
+    """Строки отчета: частота, эмпирическая и теоретическая вероятности, ошибка"""
     stats = []
-    
-    for key in keys:
-        n_k = counts.get(key, 0)
+    for key, n_k, theoretical_p in zip(keys, np.asarray(counts).tolist(), np.asarray(probs).tolist()):
         p_hat = n_k / n_trials
         stats.append({
             'answer': key,
@@ -69,4 +115,67 @@ def run_simulation(mode, n_trials=10000):
             'p_theory': theoretical_p,
             'diff': abs(p_hat - theoretical_p)
         })
-    return stats, n_trials
\ No newline at end of file
+    return stats
+
+def run_simulation(mode, n_trials=10000, method="blocks"):
+    keys, probs = simulation_setup(mode)
+    counts = simulate_counts(probs, n_trials, method)
+    return frequency_stats(keys, counts, probs, n_trials), n_trials
+
+# Число контрольных точек траектории сходимости (до удаления повторов)
+TRAJECTORY_POINTS = 60
+
+def log_checkpoints(n_trials, n_points=TRAJECTORY_POINTS):
+    """Возрастающие объемы 1 <= n <= n_trials, равномерные по логарифмической шкале"""
+    if n_trials < 1:
+        raise ValueError("число испытаний должно быть не меньше 1")
+    points = np.geomspace(1, n_trials, n_points).round().astype(np.int64)
+    return np.unique(np.append(points, n_trials))
+
+def run_trajectory(mode, n_trials=10000, n_points=TRAJECTORY_POINTS, method="blocks", rng=None, progress=None):
+    """Сходимость частот к вероятностям за один прогон эксперимента.
+
+    Испытания разыгрываются отрезками между контрольными точками
+    log_checkpoints, частоты накапливаются, поэтому опыт не повторяется
+    для каждого n. Результат — словарь массивов:
+    'n' (k,), 'counts' (k, m) — накопленные частоты, 'max_dev' (k,) —
+    max |n_i / n - p_i|, 'chi2' (k,) — статистика хи-квадрат Пирсона
+    (m - 1 степеней свободы), а также 'keys' и 'p_theory'.
+    progress(done, n_trials), если задан, вызывается после каждого блока
+    (не чаще чем раз в SIM_BLOCK испытаний).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    keys, probs = simulation_setup(mode)
+    checkpoints = log_checkpoints(n_trials, n_points)
+    if method == "multinomial":
+        draw = lambda block: rng.multinomial(block, probs)
+    else:
+        sampler = CategoricalSampler(probs, rng)
+        draw = lambda block: np.bincount(sampler.sample(block), minlength=probs.size)
+
+    counts = np.empty((checkpoints.size, probs.size), dtype=np.int64)
+    current = np.zeros(probs.size, dtype=np.int64)
+    done = 0
+    for i, n in enumerate(checkpoints.tolist()):
+        while done < n:
+            block = min(SIM_BLOCK, n - done)
+            current += draw(block)
+            done += block
+            if progress is not None:
+                progress(done, n_trials)
+        counts[i] = current
+
+    n = checkpoints[:, None]
+    expected = n * probs
+    max_dev = np.abs(counts / n - probs).max(axis=1)
+    # Исходы с нулевой вероятностью в статистику не входят
+    used = probs > 0
+    chi2 = ((counts[:, used] - expected[:, used]) ** 2 / expected[:, used]).sum(axis=1)
+    return {
+        'keys': keys,
+        'p_theory': probs,
+        'n': checkpoints,
+        'counts': counts,
+        'max_dev': max_dev,
+        'chi2': chi2,
+    }
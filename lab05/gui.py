@@ -2,23 +2,109 @@ import sys
 import math
 import random
 import time
-from PyQt6.QtWidgets import QApplication, QWidget, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QLabel
+import numpy as np
+from PyQt6.QtWidgets import (QApplication, QWidget, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QLabel,
+                             QProgressBar, QMessageBox)
 from PyQt6.QtGui import (QPainter, QColor, QRadialGradient, QLinearGradient, 
-                         QFont, QTransform, QPolygonF)
-from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF
-import core 
-
-class Particle:
-    def __init__(self, w, h):
-        self.x = random.uniform(0, w)
-        self.y = random.uniform(0, h)
-        self.z = random.uniform(0.1, 2.0) 
-        self.speed = random.uniform(0.2, 1.0)
-        self.brightness = random.randint(100, 255)
+                         QFont, QTransform, QPolygonF, QRegion)
+from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF, QRect, QObject, QRunnable, QThreadPool, pyqtSignal
+from lab05 import core
+
+# Запас (px) вокруг частицы в области перерисовки
+PARTICLE_MARGIN = 2
+# Сторона клетки (px), по которой собирается область перерисовки
+DIRTY_TILE = 8
+
+def dirty_region(left, top, right, bottom, tile=DIRTY_TILE):
+    """Объединение прямоугольников (массивы границ) одной QRegion без попарных united.
+
+    Прямоугольники закрашивают клетки сетки tile x tile в маске (двумерные
+    разностные суммы), а строки маски режутся на непрерывные отрезки. Отрезки
+    уже упорядочены по y, затем по x, не пересекаются и не соприкасаются
+    по горизонтали — это формат QRegion.setRects, так что область строится
+    одним вызовом из готового списка.
+    """
+    x0 = np.maximum(left, 0).astype(int) // tile
+    y0 = np.maximum(top, 0).astype(int) // tile
+    x1 = np.maximum(right, 0).astype(int) // tile + 1
+    y1 = np.maximum(bottom, 0).astype(int) // tile + 1
+    marks = np.zeros((y1.max() + 1, x1.max() + 1), dtype=np.int32)
+    np.add.at(marks, (y0, x0), 1)
+    np.add.at(marks, (y0, x1), -1)
+    np.add.at(marks, (y1, x0), -1)
+    np.add.at(marks, (y1, x1), 1)
+    mask = np.cumsum(np.cumsum(marks, axis=0), axis=1) > 0
+    edges = np.diff(np.pad(mask, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    ends = np.nonzero(edges == -1)[1]
+    region = QRegion()
+    region.setRects([QRect(x * tile, y * tile, (e - x) * tile, tile)
+                     for y, x, e in zip(rows.tolist(), starts.tolist(), ends.tolist())])
+    return region
+
+class ParticleField:
+    """Звездный фон: координаты и параметры частиц в массивах NumPy, сдвиг — один векторный шаг"""
+
+    def __init__(self, count, w, h):
+        self.x = np.random.uniform(0, w, count)
+        self.y = np.random.uniform(0, h, count)
+        self.z = np.random.uniform(0.1, 2.0, count)
+        self.speed = np.random.uniform(0.2, 1.0, count)
+        self.brightness = np.random.randint(100, 256, count)
 
     def update(self, h):
+        """Сдвигает частицы вверх; возвращает область, где фон изменился"""
+        old_y = self.y.copy()
         self.y -= self.speed * self.z
-        if self.y < 0: self.y = h
+        self.y[self.y < 0] = h
+        r = self.z + PARTICLE_MARGIN
+        # Прямоугольник каждой частицы накрывает старое и новое положение
+        # (при переносе вниз — два прямоугольника)
+        wrapped = self.y > old_y
+        top = np.minimum(old_y, self.y) - r
+        bottom = np.maximum(old_y, self.y) + r
+        top[wrapped] = self.y[wrapped] - r[wrapped]
+        bottom[wrapped] = h
+        left = np.concatenate((self.x - r, self.x[wrapped] - r[wrapped]))
+        right = np.concatenate((self.x + r, self.x[wrapped] + r[wrapped]))
+        top = np.concatenate((top, old_y[wrapped] - r[wrapped]))
+        bottom = np.concatenate((bottom, old_y[wrapped] + r[wrapped]))
+        return dirty_region(left, top, right, bottom)
+
+    def draw(self, painter):
+        for x, y, z, b in zip(self.x.tolist(), self.y.tolist(), self.z.tolist(), self.brightness.tolist()):
+            painter.setPen(QColor(255, 255, 255, b))
+            painter.drawEllipse(QPointF(x, y), z, z)
+
+class SimulationSignals(QObject):
+    progress = pyqtSignal(int)  # проценты
+    finished = pyqtSignal(str, object, object)  # режим, N, траектория
+    error = pyqtSignal(str)  # текст исключения
+
+class SimulationWorker(QRunnable):
+    """Прогон run_trajectory в пуле потоков; результат и прогресс приходят сигналами"""
+
+    def __init__(self, mode, n):
+        super().__init__()
+        self.mode = mode
+        self.n = n
+        self.signals = SimulationSignals()
+        self._percent = -1
+
+    def _progress(self, done, total):
+        percent = done * 100 // total
+        if percent != self._percent:
+            self._percent = percent
+            self.signals.progress.emit(percent)
+
+    def run(self):
+        # Без сигнала об ошибке окно осталось бы занятым навсегда
+        try:
+            traj = core.run_trajectory(self.mode, self.n, progress=self._progress)
+        except Exception as exc:
+            self.signals.error.emit(f"{type(exc).__name__}: {exc}")
+            return
+        self.signals.finished.emit(self.mode, self.n, traj)
 
 class BeautifulApp(QWidget):
     def __init__(self):
@@ -50,6 +136,13 @@ class BeautifulApp(QWidget):
         self.controls_panel.addWidget(self.label_n)
         self.controls_panel.addWidget(self.input_n)
         self.controls_panel.addWidget(self.btn_run)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedWidth(160)
+        self.progress_bar.setStyleSheet("QProgressBar { color: white; border: 1px solid #00FFCC; text-align: center; }"
+                                        "QProgressBar::chunk { background: #00FFCC; }")
+        self.progress_bar.hide()
+        self.controls_panel.addWidget(self.progress_bar)
         self.controls_panel.addStretch()
         
         self.layout.addLayout(self.controls_panel)
@@ -59,11 +152,14 @@ class BeautifulApp(QWidget):
         self.timer.start(16)
         
         self.mode = "8BALL" 
-        self.particles = []
+        self.particles = None
+        self.pool = QThreadPool.globalInstance()
+        self.worker = None
         self.show_stats = False
         
         self.stats_data = {"8BALL": None, "YESNO": None}
         self.n_vals = {"8BALL": 0, "YESNO": 0}
+        self.trajectory = {"8BALL": None, "YESNO": None}
         
         self.ball_shake = 0
         self.ball_text = ""
@@ -78,24 +174,54 @@ class BeautifulApp(QWidget):
         self.flip_duration = 0
 
     def start_simulation(self):
-        """Метод вызывается при нажатии кнопки"""
+        """Метод вызывается при нажатии кнопки: прогон идет в пуле потоков"""
+        if self.worker is not None:
+            return
         try:
             n = int(self.input_n.text())
             if n <= 0: return
         except:
             n = 10000
-            
-        self.stats_data[self.mode], self.n_vals[self.mode] = core.run_simulation(self.mode, n)
+
+        self.worker = SimulationWorker(self.mode, n)
+        self.worker.signals.progress.connect(self.progress_bar.setValue)
+        self.worker.signals.finished.connect(self.simulation_finished)
+        self.worker.signals.error.connect(self.simulation_failed)
+        self.btn_run.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.pool.start(self.worker)
+
+    def simulation_finished(self, mode, n, traj):
+        # Один прогон: итоговая таблица — последняя точка траектории
+        self.trajectory[mode] = traj
+        self.stats_data[mode] = core.frequency_stats(traj['keys'], traj['counts'][-1], traj['p_theory'], n)
+        self.n_vals[mode] = n
+        self.reset_worker()
+        self.mode = mode
         self.show_stats = True
+        self.update()
+
+    def simulation_failed(self, message):
+        self.reset_worker()
+        QMessageBox.critical(self, "Ошибка моделирования", message)
 
-    def init_particles(self):
-        if not self.particles:
-            for _ in range(150):
-                self.particles.append(Particle(self.width(), self.height()))
+    def reset_worker(self):
+        """Снимает состояние «идет прогон»: можно запускать следующий"""
+        self.worker = None
+        self.btn_run.setEnabled(True)
+        self.progress_bar.hide()
+
+    def object_rect(self):
+        """Область шара/монеты с учетом левитации и тряски"""
+        reach = 170
+        return QRect(int(self.width() / 2 - reach), int(self.height() / 2 - reach), 2 * reach, 2 * reach)
 
     def game_loop(self):
-        self.init_particles()
-        for p in self.particles: p.update(self.height())
+        # Анимация идет и при открытом отчете: paintEvent рисует его поверх грязной области
+        if self.particles is None:
+            self.particles = ParticleField(150, self.width(), self.height())
+        dirty = self.particles.update(self.height())
             
         if self.is_predicting and self.mode == "8BALL":
             if self.prediction_timer > 0:
@@ -123,18 +249,21 @@ class BeautifulApp(QWidget):
                 self.coin_spin_speed = max(0.5, self.coin_spin_speed - 0.5)
             self.coin_rotation += self.coin_spin_speed
 
-        self.update()
+        # Перерисовываются только частицы и центральный объект
+        self.update(dirty.united(self.object_rect()))
 
     def mousePressEvent(self, event):
         if self.childAt(event.pos()): return 
 
         if self.show_stats:
             self.show_stats = False
+            self.update()
             return
 
         w = self.width()
         if 20 <= event.pos().y() <= 60:
             self.mode = "8BALL" if event.pos().x() < w/2 else "YESNO"
+            self.update()
             return
 
         if self.mode == "8BALL" and not self.is_predicting:
@@ -148,15 +277,15 @@ class BeautifulApp(QWidget):
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        # QPainter уже обрезан по event.region(): вне грязной области ничего не рисуется
 
         bg_grad = QLinearGradient(0, 0, 0, self.height())
         bg_grad.setColorAt(0, QColor(10, 15, 30))
         bg_grad.setColorAt(1, QColor(40, 20, 60))
         painter.fillRect(self.rect(), bg_grad)
 
-        for p in self.particles:
-            painter.setPen(QColor(255, 255, 255, p.brightness))
-            painter.drawEllipse(QPointF(p.x, p.y), p.z, p.z)
+        if self.particles is not None:
+            self.particles.draw(painter)
 
         self.draw_header(painter)
 
@@ -208,7 +337,7 @@ class BeautifulApp(QWidget):
 
     def draw_stats(self, painter):
         w, h = self.width(), self.height()
-        painter.setBrush(QColor(0, 0, 0, 240))
+        painter.setBrush(QColor(0, 0, 0, 220))
         painter.drawRect(0, 0, w, h)
         
         painter.setPen(QColor(0, 255, 204))
@@ -231,9 +360,47 @@ class BeautifulApp(QWidget):
             painter.drawText(50, y, line)
             y += 22
         
+        traj = self.trajectory[self.mode]
+        if traj is not None and traj['n'].size > 1:
+            left, width = w * 0.6, w * 0.4 - 50
+            height = (h - 300) / 2
+            ref = 1 / np.sqrt(traj['n'])
+            self.draw_curve(painter, QRectF(left, 120, width, height), traj['n'],
+                            [(traj['max_dev'], QColor(0, 255, 204)), (ref, QColor(255, 80, 80))],
+                            "max |p_emp - p_theo|  (красная: 1/√N)", log_y=True)
+            df = np.full(traj['n'].size, float(traj['p_theory'].size - 1))
+            self.draw_curve(painter, QRectF(left, 180 + height, width, height), traj['n'],
+                            [(traj['chi2'], QColor(0, 255, 204)), (df, QColor(255, 80, 80))],
+                            "χ²  (красная: m - 1)", log_y=False)
+
         painter.setPen(Qt.GlobalColor.white)
         painter.drawText(50, h-80, "Кликните в любом месте, чтобы закрыть отчет")
 
+    def draw_curve(self, painter, rect, n, series, title, log_y):
+        """Кривые series [(значения, цвет)] от N в логарифмическом масштабе по оси N"""
+        x = np.log10(n)
+        ys = [np.log10(np.maximum(v, 1e-12)) if log_y else v for v, _ in series]
+        y_min = min(float(y.min()) for y in ys)
+        y_max = max(float(y.max()) for y in ys)
+        if y_max <= y_min:
+            y_max = y_min + 1
+        x_span = max(float(x[-1] - x[0]), 1e-12)
+
+        painter.setPen(QColor(100, 100, 150))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(rect)
+        painter.setPen(Qt.GlobalColor.white)
+        painter.drawText(QPointF(rect.left(), rect.top() - 8), title)
+        painter.drawText(QPointF(rect.left(), rect.bottom() + 16), f"N = {n[0]}")
+        painter.drawText(QRectF(rect.left(), rect.bottom() + 2, rect.width(), 18),
+                         Qt.AlignmentFlag.AlignRight, f"N = {n[-1]}")
+
+        px = rect.left() + (x - x[0]) / x_span * rect.width()
+        for y, (_, color) in zip(ys, series):
+            py = rect.bottom() - (y - y_min) / (y_max - y_min) * rect.height()
+            painter.setPen(color)
+            painter.drawPolyline(QPolygonF([QPointF(a, b) for a, b in zip(px.tolist(), py.tolist())]))
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = BeautifulApp()
@@ -0,0 +1,276 @@
+import math
+import numpy as np
+from lab04 import generators
+
+# Длина блока: временные массивы одного блока помещаются в кэш
+BLOCK_SIZE = 1 << 16
+
+
+def lab04_source(name='pcg64', seed=None):
+    """Равномерный датчик из реестра lab04 по имени.
+
+    При seed=None зерно берется из энтропии ОС, поэтому датчики, созданные без
+    зерна, независимы. Для воспроизводимости зерно нужно передать явно.
+    """
+    return generators.create(name, np.random.SeedSequence().entropy if seed is None else seed)
+
+
+class Sampler:
+    """Векторный генератор случайной величины поверх равномерного датчика.
+
+    Датчик — любой объект с fill_float64(out), заполняющий буфер числами из
+    [0, 1) (генераторы lab04). Выход считается блоками по BLOCK_SIZE, поэтому
+    временные массивы не растут с объемом выборки. Таблицы (если нужны)
+    строятся один раз в конструкторе.
+    """
+
+    dtype = np.float64
+
+    def __init__(self, source=None):
+        self.source = lab04_source() if source is None else source
+        self._buffer = np.empty(BLOCK_SIZE)
+
+    def uniform(self, n):
+        """n равномерных чисел; при n <= BLOCK_SIZE — вид на внутренний буфер"""
+        out = self._buffer[:n] if n <= BLOCK_SIZE else np.empty(n)
+        self.source.fill_float64(out)
+        return out
+
+    def fill(self, out):
+        for start in range(0, out.size, BLOCK_SIZE):
+            self._fill_block(out[start:start + BLOCK_SIZE])
+
+    def _fill_block(self, out):
+        raise NotImplementedError
+
+    def sample(self, n):
+        out = np.empty(n, dtype=self.dtype)
+        self.fill(out)
+        return out
+
+
+class InverseCDF(Sampler):
+    """Метод обратной функции: X = F^-1(U), ppf — векторная обратная функция распределения"""
+
+    def __init__(self, ppf, source=None):
+        super().__init__(source)
+        self.ppf = ppf
+
+    def _fill_block(self, out):
+        out[...] = self.ppf(self.uniform(out.size))
+
+
+class Exponential(Sampler):
+    """Показательное распределение: X = -ln(1 - U) / rate"""
+
+    def __init__(self, rate=1.0, source=None):
+        super().__init__(source)
+        self.rate = rate
+
+    def _fill_block(self, out):
+        u = self.uniform(out.size)
+        np.negative(u, out=u)
+        np.log1p(u, out=out)
+        out *= -1.0 / self.rate
+
+
+class BoxMuller(Sampler):
+    """Нормальное распределение N(mu, sigma^2) методом Бокса–Мюллера: из пары U — пара X"""
+
+    def __init__(self, mu=0.0, sigma=1.0, source=None):
+        super().__init__(source)
+        self.mu = mu
+        self.sigma = sigma
+
+    def _fill_block(self, out):
+        half = (out.size + 1) // 2
+        u = self.uniform(2 * half)
+        # 1 - U лежит в (0, 1], поэтому логарифм конечен; все операции на месте
+        radius, angle = u[:half], u[half:]
+        np.negative(radius, out=radius)
+        np.log1p(radius, out=radius)
+        radius *= -2.0
+        np.sqrt(radius, out=radius)
+        radius *= self.sigma
+        angle *= 2 * math.pi
+        np.cos(angle, out=out[:half])
+        out[:half] *= radius
+        tail = out[half:]
+        np.sin(angle[:tail.size], out=tail)
+        tail *= radius[:tail.size]
+        out += self.mu
+
+
+# Параметры зиккурата Марсальи–Цанга для 256 слоев
+ZIGGURAT_LAYERS = 256
+ZIGGURAT_R = 3.6541528853610088
+ZIGGURAT_V = 0.00492867323399
+
+
+class Ziggurat(Sampler):
+    """Нормальное распределение методом зиккурата (Марсалья, Цанг).
+
+    Плотность накрыта ZIGGURAT_LAYERS слоями равной площади. Кандидат берется
+    из одного равномерного числа: целая часть U * 256 — номер слоя, дробная —
+    абсцисса. Почти все кандидаты (~99%) принимаются сравнением с таблицей.
+    Остальные проверяются под кривой (клинья) или берутся из хвоста |x| > r,
+    и только для них нужны экспонента и логарифм.
+    """
+
+    def __init__(self, mu=0.0, sigma=1.0, source=None):
+        super().__init__(source)
+        self.mu = mu
+        self.sigma = sigma
+        n, r, v = ZIGGURAT_LAYERS, ZIGGURAT_R, ZIGGURAT_V
+        x = np.empty(n + 1)
+        x[0] = v / math.exp(-r * r / 2)
+        x[1] = r
+        for i in range(1, n - 1):
+            x[i + 1] = math.sqrt(-2 * math.log(v / x[i] + math.exp(-x[i] * x[i] / 2)))
+        x[n] = 0.0
+        self.x = x
+        self.f = np.exp(-x * x / 2)
+        self._layer = np.empty(BLOCK_SIZE, dtype=np.intp)
+        self._bound = np.empty(BLOCK_SIZE)
+
+    def _tail(self, count):
+        """count значений из хвоста |x| > r (метод Марсальи)"""
+        r = ZIGGURAT_R
+        result = np.empty(0)
+        while result.size < count:
+            need = count - result.size
+            u = self.uniform(2 * need).copy()
+            tx = -np.log1p(-u[:need]) / r
+            ty = -np.log1p(-u[need:])
+            result = np.concatenate((result, (r + tx)[2 * ty > tx * tx]))
+        return result[:count]
+
+    def _fill_block(self, out):
+        self._fill_standard(out)
+        out *= self.sigma
+        out += self.mu
+
+    def _fill_standard(self, out):
+        """Блок значений N(0, 1)"""
+        n = out.size
+        # Кандидаты пишутся прямо в out, рабочие массивы выделены заранее
+        layer = self._layer[:n]
+        bound = self._bound[:n]
+        t = self.uniform(n)
+        t *= ZIGGURAT_LAYERS
+        layer[...] = t
+        t -= layer
+        t *= 2
+        t -= 1
+        np.take(self.x, layer, out=out)
+        out *= t
+        np.take(self.x[1:], layer, out=bound)
+        np.abs(out, out=t)
+        rest = np.flatnonzero(t >= bound)
+
+        if rest.size:
+            f = self.f
+            z = out[rest]
+            rest_layer = layer[rest]
+            retry = np.zeros(rest.size, dtype=bool)
+            in_wedge = rest_layer > 0
+            if in_wedge.any():
+                lw = rest_layer[in_wedge]
+                y = f[lw] + self.uniform(lw.size) * (f[lw + 1] - f[lw])
+                retry[in_wedge] = y >= np.exp(-z[in_wedge] ** 2 / 2)
+            in_base = ~in_wedge
+            if in_base.any():
+                z[in_base] = np.copysign(self._tail(int(in_base.sum())), z[in_base])
+            out[rest] = z
+            # Отвергнутые кандидаты заменяются независимыми значениями
+            if retry.any():
+                again = rest[retry]
+                fresh = np.empty(again.size)
+                self._fill_standard(fresh)
+                out[again] = fresh
+
+
+class Alias(Sampler):
+    """Дискретная величина по ряду распределения методом псевдонимов (Уокер, Воуз).
+
+    Таблицы строятся за O(m), розыгрыш — O(1) на значение: U * m дает столбец
+    (целая часть) и второе равномерное число (дробная часть), которое
+    сравнивается с порогом столбца.
+    """
+
+    def __init__(self, values, probs, source=None):
+        super().__init__(source)
+        self.values = np.asarray(values)
+        self.dtype = self.values.dtype
+        probs = np.asarray(probs, dtype=np.float64)
+        if probs.ndim != 1 or probs.size == 0 or probs.min() < 0 or probs.sum() <= 0:
+            raise ValueError("вероятности должны быть неотрицательны и не все нулевые")
+        self.probs = probs / probs.sum()
+        self.threshold, self.alias = alias_tables(self.probs)
+
+    def sample_codes(self, n):
+        """Номера значений (int64), без подстановки самих значений"""
+        codes = np.empty(n, dtype=np.int64)
+        m = self.probs.size
+        for start in range(0, n, BLOCK_SIZE):
+            block = codes[start:start + BLOCK_SIZE]
+            t = self.uniform(block.size) * m
+            column = t.astype(np.int64)
+            t -= column
+            block[...] = np.where(t < self.threshold[column], column, self.alias[column])
+        return codes
+
+    def _fill_block(self, out):
+        out[...] = self.values[self.sample_codes(out.size)]
+
+
+def alias_tables(probs):
+    """Таблицы Воуза: порог и псевдоним для каждого из m столбцов"""
+    m = probs.size
+    scaled = probs * m
+    threshold = np.ones(m)
+    alias = np.arange(m)
+    small = [i for i in range(m) if scaled[i] < 1]
+    large = [i for i in range(m) if scaled[i] >= 1]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        threshold[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1 - scaled[s]
+        (small if scaled[l] < 1 else large).append(l)
+    # Остатки — из-за округления, их столбцы заполнены целиком
+    for i in small + large:
+        threshold[i] = 1.0
+    return threshold, alias
+
+
+class PoissonTable(Sampler):
+    """Пуассоновское распределение обращением таблицы функции распределения.
+
+    Таблица строится один раз на отрезке lambda ± 12 sqrt(lambda) (+10), вне
+    которого вероятность пренебрежимо мала; вероятности считаются через
+    логарифм, поэтому годятся и большие lambda. Розыгрыш — двоичный поиск U
+    в таблице (np.searchsorted).
+    """
+
+    dtype = np.int64
+
+    def __init__(self, lam, source=None):
+        super().__init__(source)
+        if lam < 0:
+            raise ValueError("lambda должна быть неотрицательной")
+        self.lam = lam
+        if lam == 0:
+            self.offset, self.cdf = 0, np.array([1.0])
+            return
+        spread = 12 * math.sqrt(lam) + 10
+        self.offset = int(max(0, math.floor(lam - spread)))
+        k = np.arange(self.offset, int(math.ceil(lam + spread)) + 1)
+        log_pmf = k * math.log(lam) - lam - np.array([math.lgamma(i + 1) for i in k])
+        pmf = np.exp(log_pmf - log_pmf.max())
+        self.cdf = np.cumsum(pmf / pmf.sum())
+        self.cdf[-1] = 1.0
+
+    def _fill_block(self, out):
+        idx = np.searchsorted(self.cdf, self.uniform(out.size), side='right')
+        out[...] = idx + self.offset
@@ -0,0 +1,185 @@
+"""Марковская модель погоды в непрерывном времени (единица времени — день).
+
+Пример:
+    python -m lab07.markov --chains 10000 --years 100
+"""
+import argparse
+import time
+import numpy as np
+from lab06 import variates
+
+STATES = ["Ясно", "Облачно", "Пасмурно"]
+# Интенсивности переходов i -> j (в день); диагональ не используется
+DEFAULT_RATES = np.array([
+    [0.0, 0.4, 0.1],
+    [0.3, 0.0, 0.3],
+    [0.1, 0.5, 0.0],
+])
+DAYS_PER_YEAR = 365.0
+# Цепи обрабатываются порциями: временные массивы порции помещаются в кэш
+CHAIN_BLOCK = 1 << 16
+
+
+def generator_matrix(rates):
+    """Инфинитезимальная матрица Q: вне диагонали — интенсивности, сумма строки равна 0"""
+    q = np.array(rates, dtype=np.float64)
+    if q.ndim != 2 or q.shape[0] != q.shape[1]:
+        raise ValueError("матрица интенсивностей должна быть квадратной")
+    np.fill_diagonal(q, 0.0)
+    if q.min() < 0:
+        raise ValueError("интенсивности должны быть неотрицательны")
+    np.fill_diagonal(q, -q.sum(axis=1))
+    return q
+
+
+def stationary_distribution(q):
+    """Стационарное распределение: решение pi Q = 0, sum(pi) = 1.
+
+    Одно из уравнений pi Q = 0 линейно зависимо от остальных, поэтому оно
+    заменяется условием нормировки и система решается напрямую.
+    """
+    k = q.shape[0]
+    a = q.T.copy()
+    a[-1] = 1.0
+    b = np.zeros(k)
+    b[-1] = 1.0
+    return np.linalg.solve(a, b)
+
+
+class WeatherChains:
+    """Много независимых цепей Маркова с непрерывным временем, состояния — массивы NumPy.
+
+    Время пребывания в состоянии i показательно с интенсивностью q_i = -Q_ii,
+    следующее состояние выбирается по вложенной цепи P_ij = Q_ij / q_i
+    методом псевдонимов (таблицы на каждую строку). Всем активным цепям
+    шаг делается одновременно: разыгрываются сразу все времена пребывания и
+    все переходы. Время в состояниях и число переходов i -> j накапливаются
+    при каждом advance, поэтому доли времени доступны в любой момент.
+    """
+
+    def __init__(self, rates=DEFAULT_RATES, n_chains=1000, initial=0, source=None):
+        self.q = generator_matrix(rates)
+        self.k = self.q.shape[0]
+        self.exit_rate = -np.diag(self.q)
+        if self.exit_rate.min() <= 0:
+            raise ValueError("из каждого состояния должен быть переход")
+        self._mean_holding = 1 / self.exit_rate
+        self.source = variates.lab04_source() if source is None else source
+        self._exponential = variates.Exponential(1.0, self.source)
+
+        jump = self.q / self.exit_rate[:, None]
+        np.fill_diagonal(jump, 0.0)
+        tables = [variates.alias_tables(row) for row in jump]
+        self.threshold = np.array([t for t, _ in tables])
+        self.alias = np.array([a for _, a in tables])
+        self._threshold_flat = self.threshold.ravel()
+        self._alias_flat = self.alias.ravel()
+
+        self.state = np.full(n_chains, initial, dtype=np.intp) if np.isscalar(initial) \
+            else np.array(initial, dtype=np.intp)
+        self.n_chains = self.state.size
+        # Остаток времени пребывания в текущем состоянии
+        self.remaining = self._holding(self.state)
+        self.time = 0.0
+        self.occupancy = np.zeros(self.k)
+        self.transitions = np.zeros((self.k, self.k), dtype=np.int64)
+
+    def _uniform(self, n):
+        out = np.empty(n)
+        self.source.fill_float64(out)
+        return out
+
+    def _holding(self, state):
+        hold = self._exponential.sample(state.size)
+        hold *= self._mean_holding.take(state)
+        return hold
+
+    def _jump(self, state):
+        # Одно равномерное число: целая часть U * k — столбец, дробная — сравнение с порогом
+        t = self._uniform(state.size)
+        t *= self.k
+        column = t.astype(np.intp)
+        t -= column
+        cell = state * self.k + column
+        return np.where(t < self._threshold_flat.take(cell), column, self._alias_flat.take(cell))
+
+    def _advance_block(self, state, remaining, dt):
+        """Продвигает порцию цепей на dt дней (массивы меняются на месте).
+
+        Активные цепи (с переходом до конца шага) хранятся сжатыми массивами:
+        номер цепи, состояние, остаток пребывания и остаток шага.
+        """
+        k = self.k
+        pos = np.arange(state.size)
+        s = state.copy()
+        rem = remaining.copy()
+        left = np.full(state.size, float(dt))
+        while pos.size:
+            jumps = rem <= left
+            self.occupancy += np.bincount(s, weights=np.minimum(rem, left), minlength=k)
+            if not jumps.all():
+                # Цепи без перехода до конца шага: остаток пребывания уменьшается
+                stay = ~jumps
+                state[pos[stay]] = s[stay]
+                remaining[pos[stay]] = rem[stay] - left[stay]
+                pos, s, rem, left = pos[jumps], s[jumps], rem[jumps], left[jumps]
+            left -= rem
+            new = self._jump(s)
+            self.transitions += np.bincount(s * k + new, minlength=k * k).reshape(k, k)
+            s = new
+            rem = self._holding(s)
+
+    def advance(self, dt):
+        """Продвигает все цепи на dt дней"""
+        for start in range(0, self.n_chains, CHAIN_BLOCK):
+            block = slice(start, start + CHAIN_BLOCK)
+            self._advance_block(self.state[block], self.remaining[block], dt)
+        self.time += dt
+
+    def occupancy_fractions(self):
+        """Доли времени в состояниях по всем цепям с начала моделирования"""
+        total = self.occupancy.sum()
+        return self.occupancy / total if total else np.zeros(self.k)
+
+    def state_fractions(self):
+        """Доли цепей в каждом состоянии в текущий момент"""
+        return np.bincount(self.state, minlength=self.k) / self.n_chains
+
+    def empirical_rates(self):
+        """Оценка интенсивностей: число переходов i -> j / время в состоянии i"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.transitions / self.occupancy[:, None]
+
+
+def simulate(rates=DEFAULT_RATES, n_chains=10000, days=DAYS_PER_YEAR, step=None, source=None):
+    """Моделирует n_chains цепей на days дней; step — шаг накопления (по умолчанию весь отрезок сразу)"""
+    chains = WeatherChains(rates, n_chains, source=source)
+    step = days if step is None else step
+    while chains.time < days:
+        chains.advance(min(step, days - chains.time))
+    return chains
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Марковская модель погоды: доли времени и стационарное распределение")
+    parser.add_argument('--chains', type=int, default=10000)
+    parser.add_argument('--years', type=float, default=100.0)
+    parser.add_argument('--generator', default='pcg64', help="датчик из lab04/generators.py")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    chains = simulate(n_chains=args.chains, days=args.years * DAYS_PER_YEAR,
+                      source=variates.lab04_source(args.generator, args.seed))
+    elapsed = time.perf_counter() - start
+
+    pi = stationary_distribution(chains.q)
+    empirical = chains.occupancy_fractions()
+    print(f"Цепей: {args.chains}, лет: {args.years:g}, время: {elapsed:.2f} с")
+    print(f"{'Состояние':<10} | {'эмпир.':>8} | {'стац.':>8} | {'ошибка':>8}")
+    for name, p_emp, p_theo in zip(STATES, empirical, pi):
+        print(f"{name:<10} | {p_emp:8.5f} | {p_theo:8.5f} | {abs(p_emp - p_theo):8.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Пуассоновский поток заявок: моменты поступления во многих повторениях сразу.
+
+Пример:
+    python -m lab08.poisson --rate 2 --T 5 --reps 1000000
+"""
+import argparse
+import math
+import time
+import numpy as np
+from lab06 import variates
+
+# Повторения обрабатываются порциями примерно по EVENT_BUDGET ожидаемых заявок,
+# чтобы временные массивы не росли ни с числом повторений, ни с rate * T
+EVENT_BUDGET = 1 << 22
+
+
+class Arrivals:
+    """Моменты поступления заявок во всех повторениях.
+
+    times — все моменты подряд (в каждом повторении по возрастанию),
+    counts[r] — число заявок в повторении r; моменты повторения r —
+    times[offsets[r]:offsets[r + 1]].
+    """
+
+    def __init__(self, times, counts, T):
+        self.times = times
+        self.counts = counts
+        self.T = T
+
+    @property
+    def offsets(self):
+        offsets = np.zeros(self.counts.size + 1, dtype=np.int64)
+        np.cumsum(self.counts, out=offsets[1:])
+        return offsets
+
+    def replication(self, r):
+        offsets = self.offsets
+        return self.times[offsets[r]:offsets[r + 1]]
+
+    def replication_index(self):
+        """Номер повторения для каждого момента из times"""
+        return np.repeat(np.arange(self.counts.size), self.counts)
+
+
+def _gaps_block(rate, T, n, source):
+    """Метод интервалов: накопленные суммы показательных интервалов, по столбцам блоками"""
+    lam = rate * T
+    width = int(lam + 3 * math.sqrt(lam)) + 1
+    exponential = variates.Exponential(rate, source)
+    clock = np.zeros(n)
+    active = np.arange(n)
+    reps, parts = [], []
+    while active.size:
+        c = exponential.sample(active.size * width).reshape(active.size, width)
+        np.cumsum(c, axis=1, out=c)
+        c += clock[active, None]
+        inside = c < T
+        # Моменты возрастают, поэтому inside — начало строки; построчный порядок сохраняется
+        parts.append(c[inside])
+        reps.append(np.repeat(active, inside.sum(axis=1)))
+        clock[active] = c[:, -1]
+        active = active[c[:, -1] < T]
+    rep = np.concatenate(reps)
+    times = np.concatenate(parts)
+    # Части уже упорядочены по повторениям: устойчивая сортировка сливает несколько серий
+    order = np.argsort(rep, kind='stable')
+    return times[order], np.bincount(rep, minlength=n)
+
+
+def _order_block(rate, T, n, source):
+    """Метод порядковых статистик: N ~ Poisson(rate T), затем N упорядоченных равномерных на [0, T).
+
+    Упорядоченные равномерные получаются без сортировки (представление
+    Реньи): U_(i) = S_i / S_{N+1}, где S_i — суммы показательных
+    интервалов, поэтому хватает одной накопленной суммы по всем повторениям.
+    """
+    counts = variates.PoissonTable(rate * T, source).sample(n)
+    # В каждом повторении N + 1 интервалов; последний только нормирует
+    sizes = counts + 1
+    ends = np.cumsum(sizes)
+    s = variates.Exponential(1.0, source).sample(int(ends[-1]) if n else 0)
+    np.cumsum(s, out=s)
+    base = np.zeros(n)
+    base[1:] = s[ends[:-1] - 1]
+    total = s[ends - 1] - base
+    keep = np.ones(s.size, dtype=bool)
+    keep[ends - 1] = False
+    rep = np.repeat(np.arange(n), counts)
+    times = (s[keep] - base[rep]) * (T / total[rep])
+    return times, counts
+
+
+def generate(rate, T, n_reps, method="order", source=None):
+    """Однородный поток интенсивности rate на [0, T) в n_reps повторениях.
+
+    method="gaps" — накопленные суммы показательных интервалов,
+    method="order" — число заявок из Poisson(rate T) и порядковые статистики.
+    """
+    if rate < 0 or T <= 0:
+        raise ValueError("нужны rate >= 0 и T > 0")
+    if n_reps < 1:
+        raise ValueError("нужно n_reps >= 1")
+    source = variates.lab04_source() if source is None else source
+    block_fn = _gaps_block if method == "gaps" else _order_block
+    if rate == 0:
+        return Arrivals(np.empty(0), np.zeros(n_reps, dtype=np.int64), T)
+    rep_block = max(1, EVENT_BUDGET // math.ceil(rate * T))
+    times, counts = [], []
+    for start in range(0, n_reps, rep_block):
+        t, c = block_fn(rate, T, min(rep_block, n_reps - start), source)
+        times.append(t)
+        counts.append(c)
+    return Arrivals(np.concatenate(times), np.concatenate(counts), T)
+
+
+def thinning(intensity, rate_max, T, n_reps, method="order", source=None):
+    """Неоднородный поток с интенсивностью intensity(t) <= rate_max (метод прореживания Льюиса–Шедлера).
+
+    Строится однородный поток rate_max, и момент t оставляется с
+    вероятностью intensity(t) / rate_max; intensity — векторная функция.
+    """
+    source = variates.lab04_source() if source is None else source
+    base = generate(rate_max, T, n_reps, method, source)
+    accept_prob = np.asarray(intensity(base.times), dtype=np.float64) / rate_max
+    if accept_prob.size and (accept_prob.min() < 0 or accept_prob.max() > 1 + 1e-12):
+        raise ValueError("интенсивность должна лежать в [0, rate_max]")
+    u = np.empty(base.times.size)
+    source.fill_float64(u)
+    keep = u < accept_prob
+    counts = np.bincount(base.replication_index()[keep], minlength=n_reps)
+    return Arrivals(base.times[keep], counts, T)
+
+
+def mean_count(intensity, T, points=10001):
+    """Lambda(T) = интеграл интенсивности по [0, T) (формула трапеций)"""
+    t = np.linspace(0, T, points)
+    y = np.asarray(intensity(t), dtype=np.float64)
+    return float(((y[1:] + y[:-1]) * np.diff(t)).sum() / 2)
+
+
+def poisson_pmf(k, lam):
+    k = np.asarray(k)
+    if lam == 0:
+        return (k == 0).astype(np.float64)
+    log_pmf = k * math.log(lam) - lam - np.array([math.lgamma(i + 1) for i in k.ravel()]).reshape(k.shape)
+    return np.exp(log_pmf)
+
+
+def count_statistics(counts, lam=None):
+    """Распределение числа заявок по повторениям: частоты, среднее, дисперсия.
+
+    При заданном lam (= Lambda(T)) добавляются теоретические вероятности
+    Пуассона, хи-квадрат (ячейки с ожидаемой частотой < 5 объединены в хвосты)
+    и его число степеней свободы.
+    """
+    n = counts.size
+    freq = np.bincount(counts)
+    values = np.arange(freq.size)
+    mean = float(counts.mean())
+    stats = {
+        'n': n,
+        'values': values,
+        'freq': freq,
+        'p_empirical': freq / n,
+        'mean': mean,
+        'var': float(counts.var(ddof=1)) if n > 1 else math.nan,
+    }
+    if lam is not None:
+        pmf = poisson_pmf(values, lam)
+        stats['p_theory'] = pmf
+        stats['mean_theory'] = lam
+        stats['var_theory'] = lam
+        expected = pmf * n
+        # Хвост за последним наблюденным значением относится к последней ячейке
+        expected[-1] += n * max(0.0, 1 - pmf.sum())
+        observed = freq.astype(np.float64)
+        cells_o, cells_e = [], []
+        acc_o = acc_e = 0.0
+        for o, e in zip(observed.tolist(), expected.tolist()):
+            acc_o += o
+            acc_e += e
+            if acc_e >= 5:
+                cells_o.append(acc_o)
+                cells_e.append(acc_e)
+                acc_o = acc_e = 0.0
+        if cells_e:
+            cells_o[-1] += acc_o
+            cells_e[-1] += acc_e
+        o, e = np.array(cells_o), np.array(cells_e)
+        stats['chi2'] = float(((o - e) ** 2 / e).sum()) if e.size else math.nan
+        stats['df'] = max(e.size - 1, 0)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пуассоновский поток: распределение числа заявок за интервал T")
+    parser.add_argument('--rate', type=float, default=2.0, help="интенсивность (заявок в единицу времени)")
+    parser.add_argument('--T', type=float, default=5.0)
+    parser.add_argument('--reps', type=int, default=1_000_000)
+    parser.add_argument('--method', choices=['order', 'gaps'], default='order')
+    parser.add_argument('--generator', default='pcg64', help="датчик из lab04/generators.py")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    arrivals = generate(args.rate, args.T, args.reps, args.method,
+                        variates.lab04_source(args.generator, args.seed))
+    elapsed = time.perf_counter() - start
+    lam = args.rate * args.T
+    stats = count_statistics(arrivals.counts, lam)
+
+    print(f"Повторений: {args.reps}, заявок: {arrivals.times.size}, метод: {args.method}, время: {elapsed:.2f} с")
+    print(f"Среднее: {stats['mean']:.4f} (теор. {lam:.4f}), дисперсия: {stats['var']:.4f} (теор. {lam:.4f})")
+    print(f"Хи-квадрат: {stats['chi2']:.2f}, степеней свободы: {stats['df']}")
+    print(f"{'k':>4} | {'p_emp':>8} | {'p_theo':>8}")
+    for k, p_emp, p_theo in zip(stats['values'].tolist(), stats['p_empirical'].tolist(), stats['p_theory'].tolist()):
+        if p_theo > 1e-4 or p_emp > 0:
+            print(f"{k:>4} | {p_emp:8.5f} | {p_theo:8.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Обработка выходных данных моделирования: доверительные интервалы вместо одного прогона.
+
+Пример:
+    python -m lab09.analysis --lam 0.9 --mu 1 --target 0.02 --relative --workers 4
+"""
+import argparse
+import math
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from lab06 import variates
+from lab09 import des, lindley
+
+DEFAULT_SEED = 52
+CONFIDENCE = 0.95
+# Датчики lab04, не принимающие зерно: повторения с ними невоспроизводимы и не независимы
+UNSEEDED_GENERATORS = ('builtin',)
+
+
+def student_cdf(t, df):
+    """Функция распределения Стьюдента при целом df >= 1 (конечный ряд по cos^2 угла atan(t / sqrt(df)))"""
+    theta = math.atan(t / math.sqrt(df))
+    c2 = math.cos(theta) ** 2
+    # 1 + c2/2 + (1*3)/(2*4) c2^2 + ... при четном df, 1 + (2/3) c2 + (2*4)/(3*5) c2^2 + ... при нечетном
+    term = total = 1.0
+    for k in range(2 if df % 2 == 0 else 3, df - 1, 2):
+        term *= c2 * (k - 1) / k
+        total += term
+    if df % 2 == 0:
+        central = math.sin(theta) * total
+    elif df == 1:
+        central = 2 * theta / math.pi
+    else:
+        central = 2 * (theta + math.sin(theta) * math.cos(theta) * total) / math.pi
+    # central = P(|T| < |t|) со знаком t
+    return 0.5 + central / 2
+
+
+def student_pdf(t, df):
+    return math.exp(math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - math.log(df * math.pi) / 2
+                    - (df + 1) / 2 * math.log1p(t * t / df))
+
+
+def student_quantile(p, df):
+    """Квантиль распределения Стьюдента.
+
+    При df = 1, 2 — точные формулы. Иначе начальное приближение дает
+    разложение Корниша–Фишера по нормальному квантилю (при df = 3 для
+    p = 0.975 оно ошибается на 4e-3), и два шага Ньютона по student_cdf
+    доводят погрешность до ~1e-7 при любом df.
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    z2 = z * z
+    t = (z
+         + z * (z2 + 1) / (4 * df)
+         + z * ((5 * z2 + 16) * z2 + 3) / (96 * df ** 2)
+         + z * (((3 * z2 + 19) * z2 + 17) * z2 - 15) / (384 * df ** 3)
+         + z * ((((79 * z2 + 776) * z2 + 1482) * z2 - 1920) * z2 - 945) / (92160 * df ** 4))
+    for _ in range(2):
+        t -= (student_cdf(t, df) - p) / student_pdf(t, df)
+    return t
+
+
+def confidence_interval(values, confidence=CONFIDENCE):
+    """Среднее и полуширина t-интервала по независимым наблюдениям"""
+    values = np.asarray(values, dtype=np.float64)
+    n = values.size
+    mean = float(values.mean())
+    if n < 2:
+        return mean, math.inf
+    t = student_quantile(0.5 + confidence / 2, n - 1)
+    return mean, t * float(values.std(ddof=1)) / math.sqrt(n)
+
+
+# --- Разогрев ---
+
+def mser(series, batch=5):
+    """Точка усечения разогрева по правилу MSER-5 (Уайт).
+
+    Ряд сворачивается в средние по batch значений, и выбирается d <= n/2,
+    минимизирующее sum_{i>d} (y_i - mean_d)^2 / (n - d)^2 — оценку
+    дисперсии среднего после отбрасывания первых d групп. Суммы хвостов
+    считаются накопленными суммами с конца, поэтому все d проверяются за O(n).
+    Возвращает число отбрасываемых значений исходного ряда.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n = series.size // batch
+    if n < 2:
+        return 0
+    y = series[:n * batch].reshape(n, batch).mean(axis=1)
+    tail_sum = np.cumsum(y[::-1])[::-1]
+    tail_sq = np.cumsum((y * y)[::-1])[::-1]
+    count = np.arange(n, 0, -1)
+    # sum (y - mean)^2 = sum y^2 - (sum y)^2 / m
+    sse = tail_sq - tail_sum * tail_sum / count
+    score = sse / (count * count)
+    d = int(np.argmin(score[:n // 2 + 1]))
+    return d * batch
+
+
+def welch(replications, window=5, tolerance=0.01):
+    """Метод Уэлча: среднее по повторениям, сглаженное скользящим окном 2 window + 1.
+
+    Возвращает сглаженную кривую и точку усечения — автоматическую замену
+    визуального выбора: первое попадание кривой в полосу вокруг уровня
+    второй половины. Ширина полосы — большее из tolerance |уровня| и двух
+    стандартных отклонений кривой во второй половине (собственный шум);
+    усечение — не более половины ряда.
+    """
+    curve = np.asarray(replications, dtype=np.float64).mean(axis=0)
+    kernel = np.ones(2 * window + 1) / (2 * window + 1)
+    smoothed = np.convolve(curve, kernel, mode='valid')
+    tail = smoothed[smoothed.size // 2:]
+    level = tail.mean()
+    band = max(tolerance * abs(level), 2 * tail.std())
+    inside = np.flatnonzero(np.abs(smoothed - level) <= band)
+    cut = int(inside[0]) if inside.size else curve.size
+    return smoothed, min(cut + window, curve.size // 2)
+
+
+def batch_means(series, n_batches=20, confidence=CONFIDENCE):
+    """Метод групповых средних по одному длинному прогону: среднее и полуширина интервала"""
+    series = np.asarray(series, dtype=np.float64)
+    size = series.size // n_batches
+    if size == 0:
+        raise ValueError("ряд короче числа групп")
+    means = series[series.size - size * n_batches:].reshape(n_batches, size).mean(axis=1)
+    return confidence_interval(means, confidence)
+
+
+# --- Повторения ---
+
+def replication_seeds(seed, count, start=0):
+    """Зерна независимых повторений start, ..., start + count - 1 из SeedSequence(seed).spawn.
+
+    Потомки SeedSequence дают статистически независимые потоки; зерно —
+    целое, поэтому годится для любого датчика из lab04/generators.py.
+    """
+    children = np.random.SeedSequence(seed).spawn(start + count)[start:]
+    return [int.from_bytes(c.generate_state(4, np.uint32).tobytes(), 'little') for c in children]
+
+
+def seeded_source(generator, seed):
+    """Датчик lab04 с зерном seed; датчики из UNSEEDED_GENERATORS отвергаются"""
+    if generator in UNSEEDED_GENERATORS:
+        raise ValueError(f"датчик {generator} не принимает зерно: повторения были бы невоспроизводимы")
+    return variates.lab04_source(generator, seed)
+
+
+def lindley_task(lam, mu, customers, batch, generator, seed):
+    """Одно повторение M/M/1 (рекурсия Линдли): ряд средних ожиданий по группам из batch заявок"""
+    source = seeded_source(generator, seed)
+    series = lindley.WaitSeries(variates.Exponential(lam, source), variates.Exponential(mu, source), batch)
+    return series.extend(customers)
+
+
+def des_task(lam, mu, servers, horizon, interval, generator, seed):
+    """Одно повторение M/M/n (ядро des.py): ряд средних по времени L на отрезках длины interval"""
+    source = seeded_source(generator, seed)
+    sim = des.Simulator()
+    system = des.QueueSystem(sim, des.exponential_stream(lam, source), des.exponential_stream(mu, source),
+                             servers=des.Servers(servers))
+    system.start()
+    stats = system.stats
+    series = np.empty(int(horizon // interval))
+    previous = 0.0
+    for i in range(series.size):
+        sim.run(until=(i + 1) * interval)
+        stats.advance(sim.now, system.in_system, system.waiting, system.servers.busy)
+        series[i] = (stats.area_system - previous) / interval
+        previous = stats.area_system
+    return series
+
+
+def _run_task(args):
+    task, params, seed = args
+    return task(*params, seed=seed)
+
+
+def run_replications(task, params, seeds, workers=1):
+    """Выходные ряды повторений task(*params, seed=s); при workers > 1 — в пуле процессов"""
+    jobs = [(task, params, s) for s in seeds]
+    if workers <= 1:
+        return [_run_task(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_task, jobs))
+
+
+def truncation_point(series_list, warmup="mser"):
+    """Общая точка усечения разогрева для повторений одинаковой длины.
+
+    Правило (MSER или Уэлча) применяется к среднему по повторениям ряду:
+    у него мала дисперсия, и остается только переходный процесс. MSER по
+    отдельному короткому ряду отбрасывает и случайные выбросы вверх, что
+    смещает оценку вниз. warmup — "mser", "welch" или число значений.
+    """
+    if warmup == "mser":
+        return mser(np.mean(series_list, axis=0))
+    if warmup == "welch":
+        return welch(series_list)[1]
+    return int(warmup or 0)
+
+
+def sequential_replications(task, params, target, relative=False, confidence=CONFIDENCE, initial=10,
+                            max_replications=1000, workers=1, seed=DEFAULT_SEED, warmup="mser"):
+    """Повторения добавляются, пока полуширина интервала не станет <= target.
+
+    Оценка повторения — среднее его выходного ряда после общей точки
+    усечения разогрева (truncation_point). После каждого шага нужное число
+    повторений оценивается как R (h / target)^2 (полуширина убывает как
+    1 / sqrt(R)), поэтому время работы определяется требуемой точностью, а
+    не заранее заданным объемом. relative=True — target задан относительно
+    |среднего|.
+    """
+    outputs = []
+    planned = initial
+    while True:
+        seeds = replication_seeds(seed, planned - len(outputs), start=len(outputs))
+        outputs.extend(run_replications(task, params, seeds, workers))
+        d = truncation_point(outputs, warmup)
+        estimates = np.array([series[d:].mean() for series in outputs])
+        mean, half_width = confidence_interval(estimates, confidence)
+        goal = target * abs(mean) if relative else target
+        if half_width <= goal or len(outputs) >= max_replications:
+            break
+        needed = math.ceil(len(outputs) * (half_width / goal) ** 2)
+        # Не меньше числа процессов за шаг и не больше чем вдвое за раз (оценка h еще неточна)
+        planned = min(max_replications, max(needed, len(outputs) + max(workers, 1)), 2 * len(outputs))
+    return {
+        'mean': mean,
+        'half_width': half_width,
+        'confidence': confidence,
+        'replications': len(outputs),
+        'estimates': estimates,
+        'truncation': d,
+    }
+
+
+def sequential_batch_means(stream, target, relative=False, confidence=CONFIDENCE, initial=100_000,
+                           max_customers=10 ** 9, n_batches=20):
+    """Один прогон (WaitSeries) удлиняется вдвое, пока полуширина по групповым средним > target"""
+    series = stream.extend(initial)
+    while True:
+        d = mser(series)
+        mean, half_width = batch_means(series[d:], n_batches, confidence)
+        goal = target * abs(mean) if relative else target
+        if half_width <= goal or stream.customers >= max_customers:
+            break
+        series = np.concatenate((series, stream.extend(stream.customers)))
+    return {'mean': mean, 'half_width': half_width, 'confidence': confidence,
+            'customers': stream.customers, 'truncation': d * stream.batch}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="M/M/1: доверительный интервал для Wq с заданной точностью")
+    parser.add_argument('--lam', type=float, default=0.9)
+    parser.add_argument('--mu', type=float, default=1.0)
+    parser.add_argument('--target', type=float, default=0.02, help="требуемая полуширина интервала")
+    parser.add_argument('--relative', action='store_true', help="target относительно среднего")
+    parser.add_argument('--method', choices=['replications', 'batch'], default='replications')
+    parser.add_argument('--warmup', choices=['mser', 'welch'], default='mser', help="правило усечения разогрева")
+    parser.add_argument('--customers', type=int, default=200_000, help="заявок в одном повторении")
+    parser.add_argument('--batch', type=int, default=1000, help="заявок в одной точке выходного ряда")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--generator', default='pcg64', help="датчик из lab04/generators.py")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+    if args.generator in UNSEEDED_GENERATORS:
+        parser.error(f"датчик {args.generator} не принимает зерно, нужен датчик с зерном")
+
+    start = time.perf_counter()
+    if args.method == 'replications':
+        result = sequential_replications(lindley_task, (args.lam, args.mu, args.customers, args.batch, args.generator),
+                                         args.target, args.relative, workers=args.workers, seed=args.seed,
+                                         warmup=args.warmup)
+        size = f"повторений: {result['replications']}, разогрев: {result['truncation'] * args.batch} заявок"
+    else:
+        source = seeded_source(args.generator, args.seed)
+        stream = lindley.WaitSeries(variates.Exponential(args.lam, source), variates.Exponential(args.mu, source),
+                                    args.batch)
+        result = sequential_batch_means(stream, args.target, args.relative)
+        size = f"заявок: {result['customers']}, разогрев: {result['truncation']} заявок"
+    elapsed = time.perf_counter() - start
+
+    rho = args.lam / args.mu
+    # При rho >= 1 стационарного режима нет: теория — NaN
+    theory = rho / (args.mu - args.lam) if rho < 1 else math.nan
+    print(f"Wq = {result['mean']:.4f} ± {result['half_width']:.4f} ({result['confidence']:.0%}), "
+          f"теория: {theory:.4f}")
+    print(f"{size}, время: {elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
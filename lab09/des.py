@@ -0,0 +1,427 @@
+"""Ядро дискретно-событийного моделирования и модель системы массового обслуживания.
+
+Календарь будущих событий — двоичная куча (heapq) из записей
+[время, номер, обработчик, аргумент]: сравнение идет по времени, при
+равенстве — по порядку планирования, без вызовов Python-кода. Случайные
+величины разыгрываются заранее блоками (variate_stream) датчиками lab04/lab06.
+"""
+import itertools
+import math
+import sys
+from collections import deque
+from heapq import heappop, heappush
+from lab06 import variates
+
+# Значений в одном заранее разыгранном блоке
+STREAM_BLOCK = 1 << 14
+
+
+class Simulator:
+    """Модельное время и календарь событий.
+
+    Запись события в куче — список [время, номер, обработчик, аргумент];
+    номер из itertools.count упорядочивает одновременные события по
+    порядку планирования. Отмена обнуляет обработчик (ленивое удаление).
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.events = 0
+        self._heap = []
+        self._seq = itertools.count()
+
+    def schedule(self, delay, handler, payload=None):
+        """Планирует handler(payload) через delay; возвращает запись события (для cancel)"""
+        entry = [self.now + delay, next(self._seq), handler, payload]
+        heappush(self._heap, entry)
+        return entry
+
+    @staticmethod
+    def cancel(entry):
+        entry[2] = None
+
+    def run(self, until=math.inf, max_events=None):
+        """Обрабатывает события с временем <= until (и не более max_events); возвращает их число"""
+        heap = self._heap
+        # Целый предел: сравнение int с float (math.inf) в цикле заметно медленнее
+        limit = sys.maxsize if max_events is None else max_events
+        count = 0
+        while count < limit and heap:
+            entry = heappop(heap)
+            t = entry[0]
+            if t > until:
+                heappush(heap, entry)
+                break
+            handler = entry[2]
+            if handler is None:
+                continue
+            self.now = t
+            handler(entry[3])
+            count += 1
+        if until != math.inf and (not heap or heap[0][0] > until):
+            self.now = max(self.now, until)
+        self.events += count
+        return count
+
+
+def variate_stream(sampler, block=STREAM_BLOCK):
+    """Поток значений случайной величины: функция без аргументов.
+
+    sampler — генератор из lab06/variates.py (метод sample(n)); значения
+    разыгрываются блоками и переводятся в списки Python, а выдача значения —
+    __next__ итератора itertools.chain (вызов C-функции без кадра Python).
+    """
+    blocks = iter(lambda: sampler.sample(block).tolist(), None)
+    return itertools.chain.from_iterable(blocks).__next__
+
+
+class Constant:
+    """Детерминированная «случайная» величина"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+def exponential_stream(rate, source=None, block=STREAM_BLOCK):
+    return variate_stream(variates.Exponential(rate, source), block)
+
+
+class Customer:
+    """Заявка: моменты поступления и начала обслуживания, длительность, нетерпеливость, ресурс"""
+
+    __slots__ = ('arrival', 'start', 'service', 'demand', 'renege_event')
+
+    def __init__(self, arrival, service, demand=1):
+        self.arrival = arrival
+        self.start = None
+        self.service = service
+        self.demand = demand
+        self.renege_event = None
+
+
+# --- Накопители статистики ---
+
+class QueueStatistics:
+    """Средние по времени L, Lq и число занятых приборов, наблюдения W, Wq и Wr.
+
+    Wq — ожидание заявок, дождавшихся обслуживания, Wr — ожидание ушедших
+    из очереди (нетерпеливость); вместе это ожидание всех принятых заявок.
+
+    Состояние системы кусочно-постоянно, поэтому перед каждым его изменением
+    достаточно одного вызова advance: площади под всеми тремя величинами
+    наращиваются сразу.
+    """
+
+    __slots__ = ('start', 'last', 'area_system', 'area_queue', 'area_busy', 'W', 'Wq', 'Wr')
+
+    def __init__(self, now=0.0):
+        self.W = Tally()
+        self.Wq = Tally()
+        self.Wr = Tally()
+        self.reset(now)
+
+    def advance(self, now, in_system, waiting, busy):
+        dt = now - self.last
+        self.area_system += in_system * dt
+        self.area_queue += waiting * dt
+        self.area_busy += busy * dt
+        self.last = now
+
+    def reset(self, now):
+        """Сбрасывает накопленное (например, после разогрева)"""
+        self.start = now
+        self.last = now
+        self.area_system = 0.0
+        self.area_queue = 0.0
+        self.area_busy = 0.0
+        self.W.reset()
+        self.Wq.reset()
+        self.Wr.reset()
+
+    def means(self):
+        span = self.last - self.start
+        if span <= 0:
+            return math.nan, math.nan, math.nan
+        return self.area_system / span, self.area_queue / span, self.area_busy / span
+
+
+class Tally:
+    """Выборочные среднее и дисперсия наблюдений (W, Wq)"""
+
+    __slots__ = ('n', 'total', 'total_sq')
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, x):
+        self.n += 1
+        self.total += x
+        self.total_sq += x * x
+
+    def reset(self):
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def mean(self):
+        return self.total / self.n if self.n else math.nan
+
+    def variance(self):
+        if self.n < 2:
+            return math.nan
+        return max(0.0, (self.total_sq - self.total * self.total / self.n) / (self.n - 1))
+
+
+# --- Политики ---
+
+class FIFOQueue:
+    """Очередь «первым пришел — первым обслужен»"""
+
+    __slots__ = ('items', 'capacity')
+
+    def __init__(self, capacity=math.inf):
+        self.items = deque()
+        self.capacity = capacity
+
+    def __len__(self):
+        return len(self.items)
+
+    def full(self):
+        return len(self.items) >= self.capacity
+
+    def push(self, customer):
+        self.items.append(customer)
+
+    def peek(self):
+        """Заявка, которая будет выбрана следующей"""
+        return self.items[0]
+
+    def pop(self):
+        return self.items.popleft()
+
+    def remove(self, customer):
+        self.items.remove(customer)
+
+
+class LIFOQueue(FIFOQueue):
+    """Очередь «последним пришел — первым обслужен»"""
+
+    __slots__ = ()
+
+    def peek(self):
+        return self.items[-1]
+
+    def pop(self):
+        return self.items.pop()
+
+
+class Servers:
+    """n одинаковых приборов, заявке нужен один"""
+
+    __slots__ = ('n', 'busy')
+
+    def __init__(self, n=1):
+        self.n = n
+        self.busy = 0
+
+    def can_start(self, customer):
+        return self.busy < self.n
+
+    def acquire(self, customer):
+        self.busy += 1
+
+    def release(self, customer):
+        self.busy -= 1
+
+    def fits(self, customer):
+        """Может ли заявка быть обслужена хотя бы в пустой системе"""
+        return True
+
+
+class ResourcePool(Servers):
+    """Общий ресурс объема n: заявке нужно customer.demand единиц"""
+
+    __slots__ = ()
+
+    def can_start(self, customer):
+        return self.busy + customer.demand <= self.n
+
+    def acquire(self, customer):
+        self.busy += customer.demand
+
+    def release(self, customer):
+        self.busy -= customer.demand
+
+    def fits(self, customer):
+        return customer.demand <= self.n
+
+
+class NoReneging:
+    """Заявки ждут сколько угодно"""
+
+    def patience(self):
+        return None
+
+
+class Reneging:
+    """Нетерпеливость: заявка покидает очередь, прождав patience() (поток или число)"""
+
+    def __init__(self, patience):
+        self._patience = patience if callable(patience) else Constant(patience)
+
+    def patience(self):
+        return self._patience()
+
+
+# --- Модель ---
+
+class QueueSystem:
+    """Система массового обслуживания поверх Simulator.
+
+    interarrival, service, demand — потоки значений (variate_stream,
+    Constant или любая функция без аргументов); servers — политика приборов
+    (Servers, ResourcePool), queue — политика очереди (FIFOQueue, LIFOQueue,
+    capacity=0 — система с отказами), reneging — политика нетерпеливости.
+    Характеристики L, Lq, W, Wq и загрузка копятся в QueueStatistics.
+    """
+
+    def __init__(self, sim, interarrival, service, servers=None, queue=None, reneging=None, demand=None):
+        self.sim = sim
+        self.interarrival = interarrival
+        self.service = service
+        self.demand = demand
+        self.servers = Servers(1) if servers is None else servers
+        self.queue = FIFOQueue() if queue is None else queue
+        self.reneging = NoReneging() if reneging is None else reneging
+        self.in_system = 0
+        self.waiting = 0
+        self.stats = QueueStatistics(sim.now)
+        self.arrived = 0
+        self.served = 0
+        self.rejected = 0
+        self.reneged = 0
+        # Календарь и обработчики — для планирования на горячем пути без вызова schedule
+        self._heap = sim._heap
+        self._seq = sim._seq
+        self._on_arrive = self._arrive
+        self._on_depart = self._depart
+
+    def start(self):
+        self.sim.schedule(self.interarrival(), self._arrive)
+
+    def set_interarrival(self, interarrival):
+        """Меняет поток заявок с текущего момента.
+
+        Уже запланированное поступление отменяется и разыгрывается заново из
+        нового потока, иначе одна заявка пришла бы по старой интенсивности.
+        Для показательных интервалов это точно (нет последействия).
+        """
+        for entry in self._heap:
+            if entry[2] == self._on_arrive:
+                entry[2] = None
+        self.interarrival = interarrival
+        self.sim.schedule(interarrival(), self._arrive)
+
+    def reset_statistics(self):
+        """Начинает накопление заново с текущего момента (отбрасывает разогрев)"""
+        self.stats.reset(self.sim.now)
+        self.arrived = self.served = self.rejected = self.reneged = 0
+
+    def _arrive(self, _):
+        now = self.sim.now
+        heappush(self._heap, [now + self.interarrival(), next(self._seq), self._on_arrive, None])
+        self.arrived += 1
+        customer = Customer(now, self.service(), 1 if self.demand is None else self.demand())
+        servers = self.servers
+        if not self.waiting and servers.can_start(customer):
+            # stats.advance и Tally.add на горячем пути раскрыты на месте: вызов метода дороже самих сложений
+            stats = self.stats
+            dt = now - stats.last
+            stats.area_system += self.in_system * dt
+            stats.area_busy += servers.busy * dt
+            stats.last = now
+            self.in_system += 1
+            self._begin(customer, now)
+        elif self.queue.full() or not servers.fits(customer):
+            self.rejected += 1
+        else:
+            self.stats.advance(now, self.in_system, self.waiting, servers.busy)
+            self.in_system += 1
+            self.waiting += 1
+            self.queue.push(customer)
+            patience = self.reneging.patience()
+            if patience is not None:
+                customer.renege_event = self.sim.schedule(patience, self._renege, customer)
+
+    def _begin(self, customer, now):
+        customer.start = now
+        if customer.renege_event is not None:
+            Simulator.cancel(customer.renege_event)
+        self.servers.acquire(customer)
+        wq = self.stats.Wq
+        wait = now - customer.arrival
+        wq.n += 1
+        wq.total += wait
+        wq.total_sq += wait * wait
+        heappush(self._heap, [now + customer.service, next(self._seq), self._on_depart, customer])
+
+    def _depart(self, customer):
+        now = self.sim.now
+        servers = self.servers
+        stats = self.stats
+        dt = now - stats.last
+        stats.area_system += self.in_system * dt
+        stats.area_queue += self.waiting * dt
+        stats.area_busy += servers.busy * dt
+        stats.last = now
+        servers.release(customer)
+        self.in_system -= 1
+        w = stats.W
+        sojourn = now - customer.arrival
+        w.n += 1
+        w.total += sojourn
+        w.total_sq += sojourn * sojourn
+        self.served += 1
+        # Очередь разбирается, пока освободившихся приборов (ресурса) хватает
+        if self.waiting:
+            queue = self.queue
+            while self.waiting and servers.can_start(queue.peek()):
+                self.waiting -= 1
+                self._begin(queue.pop(), now)
+
+    def _renege(self, customer):
+        now = self.sim.now
+        self.stats.advance(now, self.in_system, self.waiting, self.servers.busy)
+        self.stats.Wr.add(now - customer.arrival)
+        self.queue.remove(customer)
+        self.waiting -= 1
+        self.in_system -= 1
+        self.reneged += 1
+
+    def summary(self):
+        stats = self.stats
+        stats.advance(self.sim.now, self.in_system, self.waiting, self.servers.busy)
+        L, Lq, busy = stats.means()
+        return {
+            'time': self.sim.now,
+            'arrived': self.arrived,
+            'served': self.served,
+            'rejected': self.rejected,
+            'reneged': self.reneged,
+            'L': L,
+            'Lq': Lq,
+            'W': stats.W.mean(),
+            'Wq': stats.Wq.mean(),
+            # Ожидание всех принятых заявок: обслуженных и ушедших из очереди
+            'Wq_admitted': (stats.Wq.total + stats.Wr.total) / (stats.Wq.n + stats.Wr.n)
+            if stats.Wq.n + stats.Wr.n else math.nan,
+            'utilization': busy / self.servers.n,
+            'p_reject': self.rejected / self.arrived if self.arrived else math.nan,
+        }
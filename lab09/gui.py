@@ -0,0 +1,167 @@
+import tkinter as tk
+from tkinter import ttk
+from lab09 import monitor
+
+FRAME_MS = 16  # ~60 кадров/с
+HISTORY = 600  # точек на графике числа заявок
+QUEUE_CELLS = 30  # заявок очереди, рисуемых квадратами
+
+
+class QueueApp:
+    """Анимация работы СМО: модель считается в отдельном процессе, окно только читает снимки"""
+
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Система массового обслуживания")
+        self.root.geometry("1000x640")
+        self.ring = None
+        self.process = None
+        self.stop = None
+        self.next_index = 0
+        self.history = []
+        self.previous = None
+
+        panel = ttk.Frame(root, padding=8)
+        panel.pack(side=tk.LEFT, fill=tk.Y)
+        self.vars = {}
+        for key, label, value in (('lam', "Интенсивность потока λ", "1.8"),
+                                  ('mu', "Интенсивность обслуживания μ", "1.0"),
+                                  ('servers', "Приборов c", "2"),
+                                  ('buffer', "Мест в очереди (пусто — ∞)", "20"),
+                                  ('theta', "Нетерпеливость θ", "0.1"),
+                                  ('until', "Модельное время", "1000000")):
+            ttk.Label(panel, text=label).pack(anchor=tk.W)
+            self.vars[key] = tk.StringVar(value=value)
+            ttk.Entry(panel, textvariable=self.vars[key], width=14).pack(anchor=tk.W, pady=(0, 6))
+        ttk.Button(panel, text="Старт", command=self.start).pack(fill=tk.X, pady=2)
+        ttk.Button(panel, text="Стоп", command=self.stop_run).pack(fill=tk.X, pady=2)
+        self.info = tk.StringVar()
+        ttk.Label(panel, textvariable=self.info, justify=tk.LEFT, font=("Consolas", 9)).pack(anchor=tk.W, pady=10)
+
+        self.canvas = tk.Canvas(root, background="#101820", highlightthickness=0)
+        self.canvas.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.after(FRAME_MS, self.poll)
+
+    def params(self):
+        """Параметры модели из полей ввода; ValueError с пояснением, если они недопустимы"""
+        buffer = self.vars['buffer'].get().strip()
+        params = {
+            'lam': float(self.vars['lam'].get()),
+            'mu': float(self.vars['mu'].get()),
+            'servers': int(self.vars['servers'].get()),
+            'buffer': int(buffer) if buffer else None,
+            'theta': float(self.vars['theta'].get()),
+        }
+        # Ошибки модели проявились бы только в дочернем процессе, поэтому проверяем здесь
+        if not (params['lam'] > 0 and params['mu'] > 0):
+            raise ValueError("нужны λ > 0 и μ > 0")
+        if params['servers'] < 1:
+            raise ValueError("нужен хотя бы один прибор")
+        if params['buffer'] is not None and params['buffer'] < 0:
+            raise ValueError("число мест в очереди не может быть отрицательным")
+        if not params['theta'] >= 0:
+            raise ValueError("нужно θ >= 0")
+        return params
+
+    def start(self):
+        self.stop_run()
+        try:
+            params = self.params()
+            until = float(self.vars['until'].get())
+            if not until > 0:
+                raise ValueError("модельное время должно быть > 0")
+        except ValueError as exc:
+            self.info.set(f"Неверные параметры:\n{exc}")
+            return
+        self.ring, self.process, self.stop = monitor.start(params, until)
+        self.next_index = 0
+        self.history = []
+        self.previous = None
+
+    def stop_run(self):
+        if self.process is not None:
+            self.stop.set()
+            self.process.join()
+            self.ring.close()
+        self.ring = self.process = self.stop = None
+
+    def close(self):
+        self.stop_run()
+        self.root.destroy()
+
+    def poll(self):
+        """Читает новые снимки (без ожидания модели) и перерисовывает кадр"""
+        if self.ring is not None:
+            self.next_index, rows = self.ring.read_since(self.next_index)
+            if rows.size:
+                self.history.extend(rows[:, monitor.FIELD['in_system']].tolist())
+                del self.history[:-HISTORY]
+            latest = self.ring.latest()
+            if latest is not None:
+                self.draw(latest)
+                self.previous = latest
+            # Процесс завершился, не отметив конец моделирования, — он упал
+            if not self.process.is_alive() and not self.ring.finished:
+                code = self.process.exitcode
+                self.stop_run()
+                self.info.set(f"Процесс моделирования завершился\nс ошибкой (код {code})")
+        self.root.after(FRAME_MS, self.poll)
+
+    def draw(self, s):
+        f = monitor.FIELD
+        c = self.canvas
+        c.delete("all")
+        w, h = c.winfo_width(), c.winfo_height()
+
+        servers, busy, waiting = int(s[f['servers']]), int(s[f['busy']]), int(s[f['waiting']])
+        # Приборы
+        size = min(60, (w - 40) / max(servers, 1) - 10)
+        for i in range(servers):
+            x = 20 + i * (size + 10)
+            c.create_rectangle(x, 30, x + size, 30 + size, outline="#00FFCC",
+                               fill="#00FFCC" if i < busy else "")
+        c.create_text(20, 15, anchor=tk.W, fill="white", text=f"Приборы: занято {busy} из {servers}")
+
+        # Очередь
+        y = 60 + size
+        c.create_text(20, y, anchor=tk.W, fill="white", text=f"Очередь: {waiting}")
+        for i in range(min(waiting, QUEUE_CELLS)):
+            x = 20 + i * 22
+            c.create_rectangle(x, y + 15, x + 16, y + 31, outline="", fill="#FFAA33")
+        if waiting > QUEUE_CELLS:
+            c.create_text(20 + QUEUE_CELLS * 22 + 10, y + 23, anchor=tk.W, fill="#FFAA33",
+                          text=f"+{waiting - QUEUE_CELLS}")
+
+        # Число заявок в системе по последним снимкам
+        top, bottom = y + 60, h - 20
+        if len(self.history) > 1 and bottom > top:
+            peak = max(max(self.history), 1)
+            step = (w - 40) / (HISTORY - 1)
+            points = []
+            for i, value in enumerate(self.history):
+                points += [20 + i * step, bottom - value / peak * (bottom - top)]
+            c.create_line(*points, fill="#00FFCC")
+            c.create_text(20, top - 10, anchor=tk.W, fill="white", text=f"Заявок в системе (макс. {peak:g})")
+
+        # Счетчики и события с прошлого кадра
+        lines = [f"t = {s[f['time']]:.0f}",
+                 f"поступило: {s[f['arrived']]:.0f}",
+                 f"обслужено: {s[f['served']]:.0f}",
+                 f"отказов: {s[f['rejected']]:.0f}",
+                 f"ушло из очереди: {s[f['reneged']]:.0f}"]
+        wall = s[f['wall']]
+        if wall > 0:
+            lines.append(f"событий/с: {s[f['events']] / wall:,.0f}".replace(",", " "))
+        if self.previous is not None:
+            delta = s - self.previous
+            lines.append(f"за кадр: +{delta[f['arrived']]:.0f} / -{delta[f['served']]:.0f}")
+        if self.ring.finished:
+            lines.append("моделирование завершено")
+        self.info.set("\n".join(lines))
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = QueueApp(root)
+    root.mainloop()
@@ -0,0 +1,227 @@
+"""Однолинейная система с очередью FIFO (G/G/1) по рекурсии Линдли, без календаря событий.
+
+Пример:
+    python -m lab09.lindley --lam 0.99 --mu 1 --customers 100000000
+"""
+import argparse
+import math
+import time
+import numpy as np
+from lab06 import variates
+from lab09 import mm1
+
+# Заявок в одном блоке: заранее разыгранные массивы блока помещаются в память с запасом
+LINDLEY_BLOCK = 1 << 20
+# Длины очереди выше этой в распределение не различаются (последняя ячейка — «не меньше»)
+MAX_QUEUE_BINS = 1 << 12
+
+
+def lindley_waits(interarrival, service, carry=0.0):
+    """Времена ожидания W_i по рекурсии W_{i+1} = max(0, W_i + S_i - A_{i+1}) без цикла Python.
+
+    interarrival[i] — интервал перед i-й заявкой, service[i] — ее обслуживание,
+    carry — время пребывания W + S последней заявки предыдущего блока.
+    С суммами Z_i = carry - A_0 + sum_{j=1..i} (S_{j-1} - A_j) рекурсия
+    раскрывается в W_i = Z_i - min(0, min_{k<=i} Z_k): хватает np.cumsum и
+    np.minimum.accumulate.
+    """
+    z = np.empty_like(interarrival)
+    z[0] = carry - interarrival[0]
+    np.subtract(service[:-1], interarrival[1:], out=z[1:])
+    np.cumsum(z, out=z)
+    running_min = np.minimum.accumulate(z)
+    np.minimum(running_min, 0.0, out=running_min)
+    z -= running_min
+    return z
+
+
+def _fill(sampler, out):
+    if isinstance(sampler, (int, float)):
+        out.fill(sampler)
+    else:
+        sampler.fill(out)
+
+
+class LindleyStatistics:
+    """Накопленные суммы по заявкам: ожидание, пребывание, обслуживание, длина очереди при поступлении"""
+
+    def __init__(self, max_queue=MAX_QUEUE_BINS):
+        self.n = 0
+        self.sum_wait = 0.0
+        self.sum_wait_sq = 0.0
+        self.sum_sojourn = 0.0
+        self.sum_sojourn_sq = 0.0
+        self.sum_service = 0.0
+        self.start = None
+        self.end = 0.0
+        self.queue_counts = np.zeros(max_queue, dtype=np.int64)
+
+    def update(self, arrivals, waits, service, departures, in_system):
+        if self.start is None:
+            self.start = float(arrivals[0])
+        sojourn = waits + service
+        self.n += waits.size
+        self.sum_wait += float(waits.sum())
+        self.sum_wait_sq += float(waits @ waits)
+        self.sum_sojourn += float(sojourn.sum())
+        self.sum_sojourn_sq += float(sojourn @ sojourn)
+        self.sum_service += float(service.sum())
+        self.end = float(departures[-1])
+        if in_system is not None:
+            np.minimum(in_system, self.queue_counts.size - 1, out=in_system)
+            self.queue_counts += np.bincount(in_system, minlength=self.queue_counts.size)
+
+    def summary(self):
+        n = self.n
+        # Заявки уходят в порядке поступления: площадь под N(t) на [начало, последний уход]
+        # равна сумме времен пребывания, под Nq(t) — сумме ожиданий
+        span = self.end - self.start
+        result = {
+            'customers': n,
+            'W': self.sum_sojourn / n,
+            'Wq': self.sum_wait / n,
+            'W_var': self.sum_sojourn_sq / n - (self.sum_sojourn / n) ** 2,
+            'Wq_var': self.sum_wait_sq / n - (self.sum_wait / n) ** 2,
+            'L': self.sum_sojourn / span,
+            'Lq': self.sum_wait / span,
+            'utilization': self.sum_service / span,
+        }
+        if self.queue_counts.any():
+            result['queue_distribution'] = self.queue_counts / self.queue_counts.sum()
+        return result
+
+
+def simulate(interarrival, service, n_customers, warmup=0, queue_lengths=True, block=LINDLEY_BLOCK):
+    """G/G/1 FIFO на n_customers заявках (после warmup отброшенных).
+
+    interarrival и service — генераторы lab06/variates.py (метод fill) или
+    числа (детерминированные интервалы). При queue_lengths=True считается
+    распределение числа заявок в системе, которое застает приходящая заявка:
+    уходы в FIFO упорядочены, поэтому оно находится двоичным поиском
+    момента прихода среди моментов ухода (np.searchsorted).
+    """
+    stats = LindleyStatistics()
+    a = np.empty(block)
+    s = np.empty(block)
+    carry = 0.0
+    clock = 0.0
+    # Моменты ухода заявок прошлых блоков, которые еще могут быть в системе
+    pending = np.empty(0)
+    total = warmup + n_customers
+    done = 0
+    while done < total:
+        size = min(block, total - done)
+        a_block, s_block = a[:size], s[:size]
+        _fill(interarrival, a_block)
+        _fill(service, s_block)
+        waits = lindley_waits(a_block, s_block, carry)
+        arrivals = np.cumsum(a_block)
+        arrivals += clock
+        departures = arrivals + waits
+        departures += s_block
+        carry = float(departures[-1] - arrivals[-1])
+        clock = float(arrivals[-1])
+
+        in_system = None
+        if queue_lengths:
+            all_departures = np.concatenate((pending, departures))
+            # Заявки с номером >= i уходят позже момента прихода i-й, поэтому в поиск не мешают
+            in_system = np.arange(pending.size, pending.size + size) \
+                - np.searchsorted(all_departures, arrivals, side='right')
+            pending = all_departures[all_departures > clock]
+
+        skip = max(0, warmup - done)
+        if skip < size:
+            stats.update(arrivals[skip:], waits[skip:], s_block[skip:], departures[skip:],
+                         None if in_system is None else in_system[skip:])
+        done += size
+    return stats.summary()
+
+
+class WaitSeries:
+    """Продолжаемый ряд средних времен ожидания по группам из batch заявок.
+
+    extend(n) моделирует следующие n заявок тем же потоком (время
+    пребывания последней заявки переносится) и возвращает n // batch
+    средних — выходной ряд для анализа разогрева и метода групповых средних.
+    """
+
+    def __init__(self, interarrival, service, batch=1000):
+        self.interarrival = interarrival
+        self.service = service
+        self.batch = batch
+        self.carry = 0.0
+        self.customers = 0
+
+    def extend(self, n_customers):
+        n_batches = n_customers // self.batch
+        means = np.empty(n_batches)
+        per_block = max(1, LINDLEY_BLOCK // self.batch)
+        for start in range(0, n_batches, per_block):
+            count = min(per_block, n_batches - start)
+            size = count * self.batch
+            a, s = np.empty(size), np.empty(size)
+            _fill(self.interarrival, a)
+            _fill(self.service, s)
+            waits = lindley_waits(a, s, self.carry)
+            self.carry = float(waits[-1] + s[-1])
+            means[start:start + count] = waits.reshape(count, self.batch).mean(axis=1)
+        self.customers += n_batches * self.batch
+        return means
+
+
+def mm1_queue_distribution(lam, mu, size):
+    """P(N = k) = (1 - rho) rho^k для M/M/1; последняя ячейка — P(N >= size - 1)"""
+    rho = lam / mu
+    p = (1 - rho) * rho ** np.arange(size)
+    p[-1] = rho ** (size - 1)
+    return p
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="G/G/1 по рекурсии Линдли и сравнение с теорией M/M/1")
+    parser.add_argument('--lam', type=float, default=0.9, help="интенсивность потока заявок")
+    parser.add_argument('--mu', type=float, default=1.0, help="интенсивность обслуживания")
+    parser.add_argument('--customers', type=int, default=10_000_000)
+    parser.add_argument('--warmup', type=int, default=0)
+    parser.add_argument('--service', choices=['exp', 'det'], default='exp',
+                        help="обслуживание: показательное или постоянное 1/mu")
+    parser.add_argument('--no-queue', action='store_true', help="не считать распределение длины очереди")
+    parser.add_argument('--generator', default='pcg64', help="датчик из lab04/generators.py")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    source = variates.lab04_source(args.generator, args.seed)
+    interarrival = variates.Exponential(args.lam, source)
+    service = variates.Exponential(args.mu, source) if args.service == 'exp' else 1 / args.mu
+
+    start = time.perf_counter()
+    result = simulate(interarrival, service, args.customers, args.warmup, not args.no_queue)
+    elapsed = time.perf_counter() - start
+
+    print(f"Заявок: {result['customers']}, время: {elapsed:.2f} с ({result['customers'] / elapsed / 1e6:.1f} млн заявок/с)")
+    rho = args.lam / args.mu
+    # При rho >= 1 стационарного режима нет: в столбце теории — NaN
+    expected = {}
+    if args.service == 'exp' and rho < 1:
+        expected = mm1.theory(args.lam, args.mu)
+    elif args.service == 'det' and rho < 1:
+        # M/D/1: формула Поллачека–Хинчина
+        wq = rho / (2 * args.mu * (1 - rho))
+        expected = {'Wq': wq, 'W': wq + 1 / args.mu, 'Lq': args.lam * wq,
+                    'L': args.lam * (wq + 1 / args.mu), 'utilization': rho}
+    print(f"{'':<12} | {'модель':>10} | {'теория':>10}")
+    for key in ('L', 'Lq', 'W', 'Wq', 'utilization'):
+        theory = expected.get(key, math.nan)
+        print(f"{key:<12} | {result[key]:10.4f} | {theory:10.4f}")
+
+    if 'queue_distribution' in result and args.service == 'exp':
+        p = result['queue_distribution']
+        p_theory = mm1_queue_distribution(args.lam, args.mu, p.size) if rho < 1 else np.full(p.size, math.nan)
+        print(f"{'N':>4} | {'модель':>8} | {'теория':>8}")
+        for k in range(min(10, p.size)):
+            print(f"{k:>4} | {p[k]:8.5f} | {p_theory[k]:8.5f}")
+
+
+if __name__ == "__main__":
+    main()
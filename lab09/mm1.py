@@ -0,0 +1,62 @@
+"""Система M/M/1: моделирование ядром des.py и сравнение с теорией.
+
+Пример:
+    python -m lab09.mm1 --lam 0.9 --mu 1 --customers 1000000
+"""
+import argparse
+import math
+import time
+from lab06 import variates
+from lab09 import des
+
+
+def theory(lam, mu):
+    """Стационарные характеристики M/M/1 (нужно rho = lam / mu < 1)"""
+    rho = lam / mu
+    if rho >= 1:
+        raise ValueError("система не стационарна: rho >= 1")
+    return {
+        'L': rho / (1 - rho),
+        'Lq': rho * rho / (1 - rho),
+        'W': 1 / (mu - lam),
+        'Wq': rho / (mu - lam),
+        'utilization': rho,
+    }
+
+
+def simulate(lam, mu, customers, generator='pcg64', seed=None):
+    """Модель M/M/1 до поступления customers заявок; возвращает систему и симулятор"""
+    source = variates.lab04_source(generator, seed)
+    sim = des.Simulator()
+    system = des.QueueSystem(sim, des.exponential_stream(lam, source), des.exponential_stream(mu, source))
+    system.start()
+    # На заявку приходится два события: поступление и уход
+    while system.arrived < customers and sim.run(max_events=2 * (customers - system.arrived)):
+        pass
+    return system, sim
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="M/M/1: моделирование и теоретические характеристики")
+    parser.add_argument('--lam', type=float, default=0.9, help="интенсивность потока заявок")
+    parser.add_argument('--mu', type=float, default=1.0, help="интенсивность обслуживания")
+    parser.add_argument('--customers', type=int, default=1_000_000)
+    parser.add_argument('--generator', default='pcg64', help="датчик из lab04/generators.py")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    system, sim = simulate(args.lam, args.mu, args.customers, args.generator, args.seed)
+    elapsed = time.perf_counter() - start
+    result = system.summary()
+    # При rho >= 1 стационарного режима нет: в столбце теории — NaN
+    expected = theory(args.lam, args.mu) if args.lam < args.mu else {}
+
+    print(f"Событий: {sim.events}, время: {elapsed:.2f} с ({sim.events / elapsed / 1e6:.2f} млн событий/с)")
+    print(f"{'':<12} | {'модель':>10} | {'теория':>10}")
+    for key in ('L', 'Lq', 'W', 'Wq', 'utilization'):
+        print(f"{key:<12} | {result[key]:10.4f} | {expected.get(key, math.nan):10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Публикация состояния модели для визуализации без замедления моделирования.
+
+Модель работает в отдельном процессе и после каждой порции событий пишет
+снимок (время, длины очереди, занятость приборов, счетчики) в кольцевой
+буфер в разделяемой памяти. Визуализация читает последний снимок с частотой
+кадров; ни одна из сторон не ждет другую и не берет блокировок.
+"""
+import multiprocessing as mp
+import statistics
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from lab06 import variates
+from lab09 import des
+
+# Поля снимка (все float64)
+FIELDS = ('time', 'in_system', 'waiting', 'busy', 'servers', 'arrived', 'served', 'rejected', 'reneged',
+          'events', 'wall')
+FIELD = {name: i for i, name in enumerate(FIELDS)}
+# Заголовок: число опубликованных снимков, признак завершения, емкость, зарезервировано
+HEADER_WORDS = 4
+RING_CAPACITY = 4096
+# Событий между снимками: запись снимка (~ мкс) на фоне порции (~ мс) стоит < 1%
+PUBLISH_EVENTS = 2048
+
+
+class SnapshotRing:
+    """Кольцевой буфер снимков для одного писателя и одного читателя (SPSC) в разделяемой памяти.
+
+    Каждый слот защищен счетчиком, как seqlock: писатель помечает слот -1,
+    пишет данные, записывает в счетчик номер снимка и только затем
+    увеличивает общий счетчик. Читатель копирует слот и принимает копию,
+    если после копирования счетчик слота равен ожидаемому номеру. Номера
+    в слоте только растут, поэтому любая запись, задевшая копию, оставила
+    бы в счетчике -1 или больший номер: такой слот пропускается. Писатель
+    никогда не ждет читателя: старые снимки просто затираются.
+    """
+
+    def __init__(self, name=None, capacity=RING_CAPACITY):
+        size = 8 * (HEADER_WORDS + capacity * (1 + len(FIELDS)))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+            capacity = int(np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=self.shm.buf)[2])
+        self.capacity = capacity
+        buf = self.shm.buf
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=buf)
+        self.seqs = np.ndarray((capacity,), dtype=np.int64, buffer=buf, offset=8 * HEADER_WORDS)
+        self.data = np.ndarray((capacity, len(FIELDS)), dtype=np.float64, buffer=buf,
+                               offset=8 * (HEADER_WORDS + capacity))
+        if self.owner:
+            self.header[:] = (0, 0, capacity, 0)
+            self.seqs[:] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def count(self):
+        return int(self.header[0])
+
+    @property
+    def finished(self):
+        return bool(self.header[1])
+
+    def finish(self):
+        self.header[1] = 1
+
+    def publish(self, values):
+        n = int(self.header[0])
+        slot = n % self.capacity
+        self.seqs[slot] = -1
+        self.data[slot] = values
+        self.seqs[slot] = n
+        self.header[0] = n + 1
+
+    def latest(self):
+        """Последний целый снимок (массив по FIELDS) или None"""
+        n = int(self.header[0])
+        while n > 0:
+            slot = (n - 1) % self.capacity
+            row = self.data[slot].copy()
+            if self.seqs[slot] == n - 1:
+                return row
+            # Слот переписан, пока копировали: берем более новый номер
+            n = int(self.header[0])
+        return None
+
+    def read_since(self, start):
+        """Целые снимки с номерами >= start (не старше емкости буфера); возвращает (номер следующего, строки)"""
+        n = int(self.header[0])
+        start = max(start, n - self.capacity)
+        if start >= n:
+            return n, np.empty((0, len(FIELDS)))
+        index = np.arange(start, n)
+        slots = index % self.capacity
+        rows = self.data[slots].copy()
+        valid = self.seqs[slots] == index
+        return n, rows[valid]
+
+    def close(self):
+        # Виды на буфер должны исчезнуть до закрытия разделяемой памяти
+        del self.header, self.seqs, self.data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def snapshot(system, wall_start):
+    sim = system.sim
+    return (sim.now, system.in_system, system.waiting, system.servers.busy, system.servers.n,
+            system.arrived, system.served, system.rejected, system.reneged, sim.events,
+            time.perf_counter() - wall_start)
+
+
+def run_published(system, ring, until, publish_events=PUBLISH_EVENTS, stop=None):
+    """Моделирует до момента until, публикуя снимок после каждых publish_events событий"""
+    sim = system.sim
+    wall_start = time.perf_counter()
+    ring.publish(snapshot(system, wall_start))
+    while sim.now < until and not (stop is not None and stop.is_set()):
+        if not sim.run(until=until, max_events=publish_events):
+            break
+        ring.publish(snapshot(system, wall_start))
+    ring.publish(snapshot(system, wall_start))
+    ring.finish()
+
+
+def build_system(lam, mu, servers=1, buffer=None, theta=0.0, generator='pcg64', seed=None):
+    """Система M/M/c[/K][+M] на ядре des.py"""
+    source = variates.lab04_source(generator, seed)
+    sim = des.Simulator()
+    queue = des.FIFOQueue() if buffer is None else des.FIFOQueue(buffer)
+    reneging = des.Reneging(des.exponential_stream(theta, source)) if theta > 0 else None
+    system = des.QueueSystem(sim, des.exponential_stream(lam, source), des.exponential_stream(mu, source),
+                             servers=des.Servers(servers), queue=queue, reneging=reneging)
+    system.start()
+    return system
+
+
+def simulation_process(ring_name, params, until, stop, publish_events=PUBLISH_EVENTS):
+    """Точка входа процесса моделирования: подключается к буферу по имени и публикует снимки"""
+    ring = SnapshotRing(ring_name)
+    try:
+        run_published(build_system(**params), ring, until, publish_events, stop=stop)
+    finally:
+        ring.close()
+
+
+def start(params, until, capacity=RING_CAPACITY, publish_events=PUBLISH_EVENTS):
+    """Запускает моделирование в отдельном процессе; возвращает (буфер, процесс, событие остановки).
+
+    publish_events=None — без промежуточных снимков: только первый и последний.
+    """
+    ring = SnapshotRing(capacity=capacity)
+    # spawn: дочерний процесс не наследует состояние окна (Tk) родителя
+    context = mp.get_context('spawn')
+    stop = context.Event()
+    process = context.Process(target=simulation_process, args=(ring.name, params, until, stop, publish_events),
+                              daemon=True)
+    process.start()
+    return ring, process, stop
+
+
+def process_rate(params, until, publish_events=PUBLISH_EVENTS):
+    """Скорость (событий/с) одного прогона через start(): по последнему снимку, без времени запуска процесса"""
+    ring, process, _ = start(params, until, publish_events=publish_events)
+    process.join()
+    last = ring.latest()
+    ring.close()
+    if process.exitcode != 0 or last is None:
+        raise RuntimeError(f"процесс моделирования завершился с кодом {process.exitcode}")
+    return last[FIELD['events']] / last[FIELD['wall']]
+
+
+def overhead(params, until, repeat=15):
+    """Медианы скорости без снимков и со снимками по repeat парам прогонов в дочерних процессах.
+
+    Прогоны идут так же, как в окне (start, spawn). Оба прогона пары
+    моделируют одну и ту же траекторию (общее зерно) и идут друг за другом,
+    поэтому разница между ними — цена снимков, а не разброс траекторий
+    или дрейф частоты процессора.
+    Возвращает (без снимков, со снимками, медиана относительных потерь по парам).
+    """
+    plain, published, losses = [], [], []
+    for seed in range(repeat):
+        paired = dict(params, seed=seed)
+        a = process_rate(paired, until, publish_events=None)
+        b = process_rate(paired, until)
+        plain.append(a)
+        published.append(b)
+        losses.append(1 - b / a)
+    return statistics.median(plain), statistics.median(published), statistics.median(losses)
+
+
+def snapshot_cost(params, repeat=100_000):
+    """Среднее время (с) записи одного снимка в буфер: снять состояние и опубликовать"""
+    system = build_system(**params)
+    ring = SnapshotRing()
+    wall_start = time.perf_counter()
+    for _ in range(repeat):
+        ring.publish(snapshot(system, wall_start))
+    cost = (time.perf_counter() - wall_start) / repeat
+    ring.close()
+    return cost
+
+
+def _grouped(value):
+    return f"{value:,.0f}".replace(",", " ")
+
+
+if __name__ == "__main__":
+    params = dict(lam=0.9, mu=1.0, servers=1)
+    plain, published, loss = overhead(params, 300_000)
+    print(f"без снимков: {_grouped(plain)} событий/с, со снимками: {_grouped(published)} событий/с "
+          f"(потери: {loss * 100:+.1f}%, медиана по парам прогонов)")
+    # Прямая оценка: доля записи снимка во времени порции из PUBLISH_EVENTS событий
+    cost = snapshot_cost(params)
+    print(f"запись снимка: {cost * 1e6:.1f} мкс, {cost * published / PUBLISH_EVENTS * 100:.3f}% времени порции")
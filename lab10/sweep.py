@@ -0,0 +1,214 @@
+"""Перебор параметров системы M/M/c/K с нетерпеливыми заявками и сравнение с аналитикой.
+
+Сетка: интенсивность потока x число приборов x число мест в очереди.
+Пример:
+    python -m lab10.sweep --lam 0.5 4 8 --servers 1 2 4 --buffers 0 5 20 --theta 0.2 --out sweep.csv
+"""
+import argparse
+import csv
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import numpy as np
+from lab09 import analysis, des
+
+COLUMNS = [
+    'lam', 'mu', 'servers', 'buffer', 'theta', 'horizon', 'arrived',
+    'p_block', 'p_block_theory', 'p_abandon', 'p_abandon_theory',
+    'L', 'L_theory', 'Lq', 'Lq_theory', 'Wq', 'Wq_theory', 'Wq_admitted', 'Wq_admitted_theory', 'utilization',
+    'erlang_b', 'erlang_c', 'seconds',
+]
+
+
+# --- Аналитика ---
+
+@lru_cache(maxsize=None)
+def erlang_b(c, a):
+    """Вероятность отказа M/M/c/c при нагрузке a = lam / mu.
+
+    Рекурсия B(0) = 1, B(k) = a B(k-1) / (k + a B(k-1)) не содержит
+    факториалов и степеней, поэтому устойчива при любых c и a.
+    """
+    b = 1.0
+    for k in range(1, c + 1):
+        b = a * b / (k + a * b)
+    return b
+
+
+@lru_cache(maxsize=None)
+def erlang_c(c, a):
+    """Вероятность ожидания в M/M/c с бесконечной очередью: C = c B / (c - a (1 - B)); при a >= c — 1"""
+    if a >= c:
+        return 1.0
+    b = erlang_b(c, a)
+    return c * b / (c - a * (1 - b))
+
+
+@lru_cache(maxsize=None)
+def mmck_impatience(lam, mu, c, buffer, theta):
+    """Стационарные характеристики M/M/c/K+M (K = c + buffer) как процесса гибели и размножения.
+
+    В состоянии n > c интенсивность ухода c mu + (n - c) theta (обслуживание
+    и нетерпеливость). Вероятности считаются в логарифмах, поэтому большие
+    c и K не переполняют float.
+    """
+    k = c + buffer
+    n = np.arange(1, k + 1)
+    death = np.minimum(n, c) * mu + np.maximum(n - c, 0) * theta
+    log_p = np.concatenate(([0.0], np.cumsum(np.log(lam / death))))
+    p = np.exp(log_p - log_p.max())
+    p /= p.sum()
+    states = np.arange(k + 1)
+    queue = np.maximum(states - c, 0)
+    L = float(states @ p)
+    Lq = float(queue @ p)
+    p_block = float(p[-1])
+    admitted = lam * (1 - p_block)
+    return {
+        'p_block': p_block,
+        'p_abandon': theta * Lq / lam,
+        'L': L,
+        'Lq': Lq,
+        # Среднее ожидание всех принятых заявок (обслуженных и ушедших) по закону Литтла;
+        # при theta = 0 все принятые обслуживаются, и это ожидание обслуженных
+        'Wq': Lq / admitted if admitted > 0 else math.nan,
+    }
+
+
+# --- Моделирование ---
+
+def run_chain(lams, mu, servers, buffer, theta, horizon, warmup, rewarmup, generator, seed):
+    """Ячейки с общими servers, buffer, theta по возрастанию lam одной моделью.
+
+    Состояние системы переносится в следующую ячейку: меняется только поток
+    заявок, а разогрев сокращается до rewarmup, потому что соседняя точка
+    сетки стартует почти со своего стационарного режима.
+    """
+    source = analysis.seeded_source(generator, seed)
+    sim = des.Simulator()
+    reneging = des.Reneging(des.exponential_stream(theta, source)) if theta > 0 else None
+    system = des.QueueSystem(sim, des.exponential_stream(lams[0], source), des.exponential_stream(mu, source),
+                             servers=des.Servers(servers), queue=des.FIFOQueue(buffer), reneging=reneging)
+    system.start()
+    rows = []
+    for i, lam in enumerate(lams):
+        start = time.perf_counter()
+        if i:
+            system.set_interarrival(des.exponential_stream(lam, source))
+        sim.run(until=sim.now + (warmup if i == 0 else rewarmup))
+        system.reset_statistics()
+        sim.run(until=sim.now + horizon)
+        rows.append(cell_row(lam, mu, servers, buffer, theta, horizon, system.summary(),
+                             time.perf_counter() - start))
+    return rows
+
+
+def cell_row(lam, mu, servers, buffer, theta, horizon, summary, seconds):
+    theory = mmck_impatience(lam, mu, servers, buffer, theta)
+    arrived = summary['arrived']
+    return {
+        'lam': lam,
+        'mu': mu,
+        'servers': servers,
+        'buffer': buffer,
+        'theta': theta,
+        'horizon': horizon,
+        'arrived': arrived,
+        'p_block': summary['p_reject'],
+        'p_block_theory': theory['p_block'],
+        'p_abandon': summary['reneged'] / arrived if arrived else math.nan,
+        'p_abandon_theory': theory['p_abandon'],
+        'L': summary['L'],
+        'L_theory': theory['L'],
+        'Lq': summary['Lq'],
+        'Lq_theory': theory['Lq'],
+        'Wq': summary['Wq'],
+        # Моделируемое Wq — ожидание обслуженных заявок: при theta > 0 его формула здесь не выводится,
+        # базой для сравнения служит ожидание всех принятых заявок (Wq_admitted)
+        'Wq_theory': theory['Wq'] if theta == 0 else math.nan,
+        'Wq_admitted': summary['Wq_admitted'],
+        'Wq_admitted_theory': theory['Wq'],
+        'utilization': summary['utilization'],
+        'erlang_b': erlang_b(servers, lam / mu),
+        'erlang_c': erlang_c(servers, lam / mu),
+        'seconds': seconds,
+    }
+
+
+def chains(lams, servers_list, buffers, chain_length):
+    """Задания: для каждой пары (servers, buffer) — отрезки сетки lam по chain_length точек"""
+    lams = sorted(lams)
+    step = max(1, chain_length)
+    for servers in servers_list:
+        for buffer in buffers:
+            for start in range(0, len(lams), step):
+                yield tuple(lams[start:start + step]), servers, buffer
+
+
+def sweep(lams, servers_list, buffers, out, mu=1.0, theta=0.0, horizon=20_000.0, warmup=2_000.0, rewarmup=None,
+          workers=1, chain_length=None, generator='pcg64', seed=analysis.DEFAULT_SEED):
+    """Считает все ячейки сетки и дописывает строки в CSV out по мере готовности заданий.
+
+    Задания (цепочки соседних lam) раздаются пулу процессов; каждое
+    получает свое зерно из SeedSequence.spawn. Возвращает число ячеек.
+    """
+    rewarmup = warmup / 4 if rewarmup is None else rewarmup
+    chain_length = len(lams) if chain_length is None else chain_length
+    jobs = list(chains(lams, servers_list, buffers, chain_length))
+    seeds = analysis.replication_seeds(seed, len(jobs))
+    args = [(job_lams, mu, servers, buffer, theta, horizon, warmup, rewarmup, generator, s)
+            for (job_lams, servers, buffer), s in zip(jobs, seeds)]
+
+    done = 0
+    with open(out, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        f.flush()
+
+        def write(rows):
+            writer.writerows(rows)
+            f.flush()
+            return len(rows)
+
+        if workers <= 1:
+            for a in args:
+                done += write(run_chain(*a))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(run_chain, *a) for a in args]
+                for future in as_completed(futures):
+                    done += write(future.result())
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="M/M/c/K с нетерпеливостью: перебор параметров и аналитика")
+    parser.add_argument('--lam', type=float, nargs=3, metavar=('START', 'STOP', 'NUM'), default=[0.5, 4.0, 8],
+                        help="сетка интенсивности потока: np.linspace(START, STOP, NUM)")
+    parser.add_argument('--mu', type=float, default=1.0)
+    parser.add_argument('--servers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--buffers', type=int, nargs='+', default=[0, 5, 20], help="мест в очереди")
+    parser.add_argument('--theta', type=float, default=0.2, help="интенсивность ухода из очереди (0 — терпеливые)")
+    parser.add_argument('--horizon', type=float, default=20_000.0, help="время накопления статистики в ячейке")
+    parser.add_argument('--warmup', type=float, default=2_000.0)
+    parser.add_argument('--chain-length', type=int, default=None, help="ячеек в одном задании (по умолчанию вся ось lam)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--generator', default='pcg64', help="датчик из lab04/generators.py")
+    parser.add_argument('--seed', type=int, default=analysis.DEFAULT_SEED)
+    parser.add_argument('--out', default='sweep.csv')
+    args = parser.parse_args(argv)
+    if args.generator in analysis.UNSEEDED_GENERATORS:
+        parser.error(f"датчик {args.generator} не принимает зерно, нужен датчик с зерном")
+
+    start, stop, num = args.lam
+    lams = np.linspace(start, stop, int(num)).tolist()
+    begin = time.perf_counter()
+    cells = sweep(lams, args.servers, args.buffers, args.out, args.mu, args.theta, args.horizon, args.warmup,
+                  workers=args.workers, chain_length=args.chain_length, generator=args.generator, seed=args.seed)
+    print(f"Ячеек: {cells}, время: {time.perf_counter() - begin:.1f} с, результаты: {args.out}")
+
+
+if __name__ == "__main__":
+    main()